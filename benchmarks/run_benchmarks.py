@@ -0,0 +1,230 @@
+"""benchmark suite for magi on synthetic series from magi.utils.gen_synthetic_ts
+
+runs tsclean, R, prophet and accuracy on 1k, 10k and 100k series (by default) with every scheduler and appends
+one json record per run to a results file, so throughput and memory can be compared between versions, along with
+the time a fresh interpreter takes to import magi (which shouldn't start R, Prophet or plotly)
+and the pickled size of the tasks R_dataframe sends to workers (which shouldn't grow with the number of series)
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 1000 --benchmarks R accuracy --schedulers pool --output results.jsonl
+
+each record has the benchmark, its settings, number of series, wall time, series per second, peak resident memory
+of the process that ran it and of its R worker processes, magi version, git commit, python version and time of run
+-every case runs in a fresh python process, peak resident memory is a high water mark of the whole process so
+ cases run one after another in one process would each report the largest peak of any case before them
+-a case's peak includes generating its synthetic dataframe, which is the same for every case of a size
+"""
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import platform
+import subprocess
+import tracemalloc
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    #not available on windows, memory columns are left null
+    resource = None
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+
+import sphinx_doc
+from magi.utils import gen_synthetic_ts
+
+DEFAULT_SIZES = (1000,10000,100000)
+BENCHMARKS = ('import','tsclean','R','prophet','accuracy','payload')
+
+#modules timed by the import benchmark
+IMPORT_MODULES = ('magi.core','magi.plotting','magi.accuracy','magi.stream')
+SCHEDULERS = ('pool','dask')
+
+def _peak_rss_mb():
+    """peak resident memory of this process and of its (finished and reaped) child processes in MB"""
+    if resource is None:
+        return None, None
+    #ru_maxrss is in kilobytes on linux and bytes on mac
+    scale = 1024.0**2 if sys.platform == 'darwin' else 1024.0
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss/scale)
+
+def _git_commit():
+    """current git commit of the repo, None if not in a git checkout"""
+    try:
+        return subprocess.check_output(['git','rev-parse','HEAD'],cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _import_seconds(repeats=5):
+    """best of repeats wall times of importing IMPORT_MODULES in a fresh python process,
+    with a check that the import left R, Prophet and plotly unloaded
+    """
+    code = ('import sys, time; start = time.perf_counter(); import %s; seconds = time.perf_counter() - start; '
+            'loaded = [m for m in ("rpy2","fbprophet","plotly") if m in sys.modules]; '
+            'assert not loaded, "loaded at import: %%s" %% loaded; print(seconds)') % ', '.join(IMPORT_MODULES)
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)),'..')
+    times = [float(subprocess.check_output([sys.executable,'-c',code],cwd=root).decode().strip()) for _ in range(repeats)]
+    return min(times)
+
+def _cases(benchmarks, schedulers, args):
+    """yields (benchmark name, settings dict, function of dataframe running it) for every benchmark and scheduler"""
+    import pandas as pd
+    from magi.core import forecast
+    from magi.accuracy import accuracy_frame
+    from magi.profiling import Profiler
+
+    def make_forecast(df, scheduler):
+        return forecast(time_series=df,forecast_periods=args.horizon,frequency=args.frequency,
+                        n_workers=args.workers,scheduler=scheduler)
+
+    for name in benchmarks:
+        if name == 'tsclean':
+            yield name, {'backend':'numpy'}, lambda df: make_forecast(df,None).tsclean(backend='numpy')
+            for scheduler in schedulers:
+                yield name, {'backend':'R','scheduler':scheduler,'batch_size':args.batch_size}, \
+                    lambda df, scheduler=scheduler: make_forecast(df,scheduler).tsclean(batch_size=args.batch_size)
+        elif name == 'R':
+            for scheduler in schedulers:
+                yield name, {'model':args.model,'scheduler':scheduler}, \
+                    lambda df, scheduler=scheduler: make_forecast(df,scheduler).R(model=args.model)
+                if args.batch_size is not None:
+                    yield name, {'model':args.model,'scheduler':scheduler,'batch_size':args.batch_size}, \
+                        lambda df, scheduler=scheduler: make_forecast(df,scheduler).R(model=args.model,batch_size=args.batch_size)
+            yield name, {'model':'snaive','backend':'numpy'}, lambda df: make_forecast(df,None).R(model='snaive',backend='numpy')
+        elif name == 'prophet':
+            #prophet always runs through dask
+            yield name, {'scheduler':'dask'}, lambda df: make_forecast(df,'dask').prophet()
+            yield name, {'scheduler':'dask','predict_history':False,'interval_method':'analytic'}, \
+                lambda df: make_forecast(df,'dask').prophet(predict_history=False,interval_method='analytic')
+        elif name == 'accuracy':
+            def run_accuracy(df):
+                #naive one step forecasts as the predictions being scored
+                return accuracy_frame(df.iloc[1:],df.shift(1).iloc[1:],insample=df,freq=args.frequency)
+            yield name, {}, run_accuracy
+        elif name == 'payload':
+            for scheduler in schedulers:
+                def run_payload(df, scheduler=scheduler):
+                    profiler = Profiler()
+                    forecast(time_series=df,forecast_periods=args.horizon,frequency=args.frequency,n_workers=args.workers,
+                             scheduler=scheduler,profiler=profiler).R(model=args.model)
+                    tasks = profiler.task_summary()
+                    #the bound on task size is asserted in tests/test_distributed.py, here sizes are only recorded
+                    column_bytes = len(pickle.dumps(pd.Series(np.zeros(len(df)),index=df.index,name=df.columns[0]),
+                                                    protocol=pickle.HIGHEST_PROTOCOL))
+                    return {'max_task_bytes':int(tasks.loc['R_series','max_bytes']),
+                            'column_bytes':column_bytes,
+                            'total_task_bytes':int(tasks['total_bytes'].sum()),
+                            'shared_bytes':int(tasks.loc['R_series_shared','max_bytes'])}
+                yield name, {'model':args.model,'scheduler':scheduler}, run_payload
+
+def _record(name, settings):
+    """returns result record of a benchmark with the fields every run has"""
+    return {'benchmark':name,
+            'settings':settings,
+            'magi_version':sphinx_doc.__version__,
+            'git_commit':_git_commit(),
+            'python_version':platform.python_version(),
+            'timestamp':time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'error':None}
+
+def _write(args, record):
+    with open(args.output,'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+def _case_argv(args, size, case):
+    """command line that runs case number case at size in a fresh process with the same settings as args"""
+    argv = [sys.executable,os.path.abspath(__file__),'--sizes',str(size),'--case',str(case),
+            '--benchmarks'] + list(args.benchmarks) + ['--schedulers'] + list(args.schedulers)
+    for name in ('nrows','frequency','horizon','model','batch_size','workers','seed','output'):
+        value = getattr(args,name)
+        if value is not None:
+            argv += ['--' + name,str(value)]
+    if args.tracemalloc:
+        argv.append('--tracemalloc')
+    return argv
+
+def run_case(args):
+    """runs case number args.case of the first size in this process and appends its record to args.output"""
+    from magi.pool import shutdown_pool
+    size = args.sizes[0]
+    name, settings, func = list(_cases(args.benchmarks,args.schedulers,args))[args.case]
+    df = gen_synthetic_ts(nseries=size,nrows=args.nrows,seasonal_period=args.frequency,seed=args.seed)
+    record = _record(name,settings)
+    record.update({'nseries':size,'nrows':args.nrows})
+    if args.tracemalloc:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        extra = func(df)
+        if isinstance(extra, dict):
+            record.update(extra)
+    except Exception as e:
+        record['error'] = '%s: %s' % (type(e).__name__,e)
+    seconds = time.perf_counter() - start
+    record['seconds'] = seconds
+    record['series_per_second'] = size/seconds if record['error'] is None else None
+    if args.tracemalloc:
+        record['python_peak_mb'] = tracemalloc.get_traced_memory()[1]/1024.0**2
+        tracemalloc.stop()
+    #R workers only count toward the children's peak once they have exited and been reaped
+    shutdown_pool()
+    record['peak_rss_mb'], record['children_peak_rss_mb'] = _peak_rss_mb()
+
+    print('%-9s %-60s %7d series %9.2fs %s' % (name,json.dumps(settings),size,seconds,record['error'] or ''))
+    _write(args,record)
+
+def run(args):
+    """runs every benchmark at every size, each case in its own process, and appends one record per run to args.output"""
+    if args.case is not None:
+        return run_case(args)
+
+    if 'import' in args.benchmarks:
+        record = _record('import',{'modules':list(IMPORT_MODULES)})
+        record['seconds'] = None
+        try:
+            record['seconds'] = _import_seconds()
+        except (subprocess.CalledProcessError, ValueError) as e:
+            record['error'] = '%s: %s' % (type(e).__name__,e)
+        print('%-9s %-60s %9s %s' % ('import',', '.join(IMPORT_MODULES),
+                                      '' if record['seconds'] is None else '%.2fs' % record['seconds'],record['error'] or ''))
+        _write(args,record)
+
+    cases = list(_cases(args.benchmarks,args.schedulers,args))
+    for size in args.sizes:
+        for case, (name, settings, _) in enumerate(cases):
+            returncode = subprocess.call(_case_argv(args,size,case))
+            if returncode != 0:
+                #the case process died before writing its record (e.g. killed for running out of memory)
+                record = _record(name,settings)
+                record.update({'nseries':size,'nrows':args.nrows,'seconds':None,'series_per_second':None,
+                               'error':'case process exited with code %d' % returncode})
+                print('%-9s %-60s %7d series %9s %s' % (name,json.dumps(settings),size,'',record['error']))
+                _write(args,record)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='benchmarks magi on synthetic series')
+    parser.add_argument('--sizes',type=int,nargs='+',default=list(DEFAULT_SIZES),help='numbers of series')
+    parser.add_argument('--benchmarks',nargs='+',default=list(BENCHMARKS),choices=BENCHMARKS)
+    parser.add_argument('--schedulers',nargs='+',default=list(SCHEDULERS),choices=SCHEDULERS)
+    parser.add_argument('--nrows',type=int,default=60,help='periods of the longest series')
+    parser.add_argument('--frequency',type=int,default=12)
+    parser.add_argument('--horizon',type=int,default=12)
+    parser.add_argument('--model',default='ets(rdata)',help='R model string')
+    parser.add_argument('--batch_size',type=int,default=500,help='columns per R call for batched runs')
+    parser.add_argument('--workers',type=int,default=None,help='R worker processes (defaults to number of cpus)')
+    parser.add_argument('--seed',type=int,default=0)
+    parser.add_argument('--tracemalloc',action='store_true',help='also record peak python heap (slows runs down)')
+    parser.add_argument('--output',default=os.path.join(os.path.dirname(os.path.abspath(__file__)),'results.jsonl'),
+                        help='json lines file results are appended to')
+    parser.add_argument('--case',type=int,default=None,help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    np.seterr(all='ignore')
+    run(args)
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,8 @@
+import warnings
 import numpy as np
 import pandas as pd
-import dask
 
-def accuracy(actual,predicted=None,separate_series=False):
+def accuracy(actual,predicted=None,separate_series=False,freq=1):
     
     """returns accuracy measures
     
@@ -12,7 +12,8 @@ def accuracy(actual,predicted=None,separate_series=False):
         actual: actual values as numpy array or time series
         predicted: predicted values as numpy array or time series
         separate_series: only used for data frames. if set to true, will calculate accuracy metrics 
-            for each series in parallel using dask and return as dataframe instead of overall accuracy
+            for each series in one vectorized pass (see accuracy_frame) and return as dataframe instead of overall accuracy
+        freq: seasonal period of naive forecast used to scale MASE (only used when separate_series is True)
         
     Returns:
         accuracy_dict: dictionary of accuracy measures
@@ -51,19 +52,13 @@ def accuracy(actual,predicted=None,separate_series=False):
             
         #separate logic if input is dataframe
         elif isinstance(actual, pd.core.frame.DataFrame):
-            actual = actual.apply(pd.to_numeric).fillna(0)
-            predicted = predicted.apply(pd.to_numeric).fillna(0)
             #calculate accuracy metrics for all series if set to true
             if separate_series:
-                output_series = []
-                for i in actual:
-                    forecasted_dict = dask.delayed(accuracy)(actual[i],predicted[i])
-                    output_series.append(forecasted_dict)
-                total = dask.delayed(output_series).compute()
-                forecast_df = pd.DataFrame(total,index=actual.columns).T
-            else:
-                actual = actual.values.flatten()
-                predicted = predicted.values.flatten()
+                return accuracy_frame(actual,predicted,freq=freq)
+            actual = actual.apply(pd.to_numeric).fillna(0)
+            predicted = predicted.apply(pd.to_numeric).fillna(0)
+            actual = actual.values.flatten()
+            predicted = predicted.values.flatten()
                 
         else:
             raise TypeError('your inputs must be formatted as a numpy ndarray, pandas series or dataframe')
@@ -82,11 +77,140 @@ def accuracy(actual,predicted=None,separate_series=False):
     ACF1 = acf1(actual,predicted)
         
     accuracy_dict = {'MAPE':MAPE,'SMAPE':SMAPE,'ME':ME,'MAE':MAE,'MSE':MSE,'RMSE':RMSE,'ThielsU':ThielsU,'ACF1':ACF1}
-    if separate_series:
-        #return dataframe instead of separate series is true
-        return forecast_df
     return accuracy_dict
 
+def accuracy_frame(actual,predicted,insample=None,freq=1,min_val=1,chunk_size=10000):
+    
+    """returns accuracy measures for every series (column) of a dataframe computed in one vectorized pass
+    
+    null values in either actual or predicted are masked out per series rather than filled, so series
+    with different start and end dates (e.g. fitted values from R_dataframe) are scored only where both exist
+    columns are scored chunk_size at a time, so the float copies and masks built for each pass stay the same size
+    however many series there are
+    
+    Args:
+        actual: dataframe of actual values, one column per series
+        predicted: dataframe of predicted values with same columns (rows are aligned on index)
+        insample: dataframe of in sample values used to scale MASE (defaults to actual)
+        freq: seasonal period of naive forecast used to scale MASE
+        min_val: constant added to actual values in MAPE to avoid division by zero
+        chunk_size: number of series scored per vectorized pass
+        
+    Returns:
+        accuracy_df: dataframe with accuracy measures as rows and series as columns
+        
+    """
+    index = actual.index.intersection(predicted.index)
+    columns = actual.columns
+    blocks = []
+    for i in range(0, len(columns), chunk_size):
+        block = columns[i:i + chunk_size]
+        insample_block = None if insample is None else insample[block]
+        blocks.append(_accuracy_block(actual.loc[index,block],predicted.loc[index,block],insample_block,freq,min_val))
+    if not blocks:
+        return _accuracy_block(actual,predicted,insample,freq,min_val)
+    return pd.concat(blocks,axis=1)
+
+def _accuracy_block(actual,predicted,insample,freq,min_val):
+    """accuracy measures of every column of a block of series, see accuracy_frame"""
+    actual = actual.apply(pd.to_numeric)
+    predicted = predicted.apply(pd.to_numeric)
+    a = actual.values.astype(float)
+    p = predicted.values.astype(float)
+    valid = ~np.isnan(a) & ~np.isnan(p)
+    n = valid.sum(axis=0)
+
+    with np.errstate(divide='ignore',invalid='ignore'):
+        error = np.where(valid,a - p,0.0)
+        a_valid = np.where(valid,a,0.0)
+        p_valid = np.where(valid,p,0.0)
+        sse = np.sum(error**2,axis=0)
+        me = np.sum(error,axis=0)/n
+        mae = np.sum(np.abs(error),axis=0)/n
+        mse = sse/n
+        #same shifted actuals as mean_absolute_percentage_error
+        shifted = a_valid + min_val
+        mape = np.sum(np.where(valid,np.abs((shifted - p_valid)/shifted),0.0),axis=0)/n*100
+        smape = np.sum(np.where(valid,2.0*np.abs(error)/(np.abs(a_valid) + np.abs(p_valid)),0.0),axis=0)/n*100
+        theil_u = np.sqrt(sse/np.sum(a_valid**2,axis=0))
+
+        #lag 1 autocorrelation of errors, masked points contribute nothing to either sum
+        centered = np.where(valid,error - me,0.0)
+        acf_1 = np.sum(centered[1:]*centered[:-1],axis=0)/np.sum(centered**2,axis=0)
+
+        #MASE scaled by in sample mean absolute error of seasonal naive forecast
+        if insample is None:
+            ins = a
+        else:
+            ins = insample.apply(pd.to_numeric).values.astype(float)
+        naive_error = np.abs(ins[freq:] - ins[:-freq])
+        naive_valid = ~np.isnan(naive_error)
+        scale = np.sum(np.where(naive_valid,naive_error,0.0),axis=0)/naive_valid.sum(axis=0)
+        mase_val = mae/scale
+
+    return pd.DataFrame([mape,smape,me,mae,mse,np.sqrt(mse),sse,theil_u,acf_1,mase_val],
+                        index=['MAPE','SMAPE','ME','MAE','MSE','RMSE','SSE','ThielsU','ACF1','MASE'],
+                        columns=actual.columns)
+
+#quantiles of every metric reported by accuracy_summary
+QUANTILES = (0.05,0.25,0.5,0.75,0.95)
+
+def accuracy_summary(obj, bins=50, top_k=10, rank_metric='MASE'):
+    """summarizes accuracy measures of many series with vectorized quantiles, histograms and the worst series
+    -infinite values (e.g. MAPE of all zero series) count as missing in quantiles and histograms
+    -histogram range of each metric is its 1st to 99th percentile, so a few extreme series don't squash every
+     other series into one bin, values outside it are counted in the end bins
+
+    Args:
+        obj: dataframe of accuracy measures as rows and series as columns (from accuracy_frame)
+        bins: number of histogram bins of each metric
+        top_k: number of worst series to return
+        rank_metric: metric the worst series are ranked by (first metric if it isn't in the dataframe)
+
+    Returns:
+        quantiles_df: dataframe with metrics as rows and count, mean, min, quantiles and max as columns
+        histograms: dict of metric to (counts, bin edges) arrays
+        worst_df: dataframe of the top_k series with the largest absolute rank_metric, series as rows
+    """
+    values = obj.values.astype(float)
+    values[~np.isfinite(values)] = np.nan
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=1)
+    with warnings.catch_warnings():
+        #metrics that are null for every series give all null rows
+        warnings.simplefilter('ignore',category=RuntimeWarning)
+        #every quantile (and the histogram limits) of every metric from one sort per metric
+        quantile_values = np.nanquantile(values,(0.0,0.01) + QUANTILES + (0.99,1.0),axis=1).T
+        means = np.nanmean(values,axis=1)
+    limits = quantile_values[:,[1,-2]]
+    quantile_values = np.delete(quantile_values,[1,quantile_values.shape[1] - 2],axis=1)
+    columns = ['min'] + ['p%d' % int(round(q*100)) for q in QUANTILES] + ['max']
+    quantiles_df = pd.DataFrame(quantile_values,index=obj.index,columns=columns)
+    quantiles_df.insert(0,'mean',means)
+    quantiles_df.insert(0,'count',counts)
+
+    histograms = {}
+    for i, metric in enumerate(obj.index):
+        metric_values = values[i,valid[i]]
+        if len(metric_values) == 0:
+            continue
+        low, high = limits[i]
+        if high <= low:
+            #every series (bar a few outliers) has the same value
+            low, high = low - 0.5, low + 0.5
+        histograms[metric] = np.histogram(np.clip(metric_values,low,high),bins=bins,range=(low,high))
+
+    rank = obj.index.get_loc(rank_metric) if rank_metric in obj.index else 0
+    scores = np.where(valid[rank],np.abs(values[rank]),-np.inf)
+    top_k = min(top_k,len(scores))
+    if top_k == 0:
+        worst = np.array([],dtype=int)
+    else:
+        #partial sort, only the top_k series are ordered
+        worst = np.argpartition(-scores,top_k - 1)[:top_k]
+        worst = worst[np.argsort(-scores[worst],kind='mergesort')]
+    worst_df = pd.DataFrame(obj.values[:,worst].T,index=obj.columns[worst],columns=obj.index)
+    return quantiles_df, histograms, worst_df
 
 
 # The mean absolute percentage error (MAPE), is a measure of prediction
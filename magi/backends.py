@@ -0,0 +1,48 @@
+#R (through rpy2) and Prophet (and therefore pystan) are only loaded the first time they are needed, so importing
+#magi doesn't start embedded R or stan and short lived jobs that never fit a model don't pay for them
+_backends = {}
+
+#R packages magi needs, installed by install_r_packages
+R_PACKAGES = ('ggplot2','forecast')
+
+def get_R():
+    """returns rpy2.robjects with embedded R started, pandas conversion activated and the forecast package
+    attached, initializing them on the first call in each process
+
+    Returns:
+        robjects: rpy2.robjects module
+    """
+    robjects = _backends.get('R')
+    if robjects is None:
+        import rpy2.robjects as robjects
+        from rpy2.robjects import pandas2ri
+        from rpy2.robjects.packages import importr
+        pandas2ri.activate()
+        try:
+            #attach forecast once per process so library(forecast) is not rerun per series
+            importr('forecast')
+        except Exception:
+            #error class differs between rpy2 versions
+            raise ImportError("R package forecast isn't installed, install it with magi.backends.install_r_packages()")
+        _backends['R'] = robjects
+    return robjects
+
+def get_prophet():
+    """returns Prophet class, importing fbprophet on the first call in each process"""
+    Prophet = _backends.get('prophet')
+    if Prophet is None:
+        from fbprophet import Prophet
+        _backends['prophet'] = Prophet
+    return Prophet
+
+def install_r_packages(packages=R_PACKAGES, repos='https://cloud.r-project.org'):
+    """installs R packages magi needs (never done at import, run once when setting up an environment)
+
+    Args:
+        packages: names of R packages to install
+        repos: CRAN mirror to install from
+    """
+    from rpy2.robjects.packages import importr
+    from rpy2.robjects.vectors import StrVector
+    utils = importr('utils')
+    utils.install_packages(StrVector(packages),repos=repos)
@@ -0,0 +1,250 @@
+import numpy as np
+from statistics import NormalDist
+
+#R forecast package functions that have a closed form numpy implementation here
+BASELINE_MODELS = ('naive','snaive','meanf','rwf','thetaf')
+
+def is_baseline_model(model):
+    """checks whether R model string is one of the baseline models that can run without R"""
+    return model.split('(')[0].strip() in BASELINE_MODELS
+
+def baseline_forecast(values, model, forecast_periods, frequency, confidence_level=80.0):
+
+    """forecasts every column of a 2d array at once with closed form versions of R forecast baseline models
+    -columns may start and end on different rows (leading and trailing nulls), interior nulls aren't supported
+    -prediction intervals use the normal approximation for every model (meanf in R uses a t distribution)
+    -thetaf optimizes the simple exponential smoothing parameter by grid search with the first value as initial
+     level, so it can differ slightly from R which also optimizes the initial level
+
+    Args:
+        values: 2d float array of rows x series
+        model: one of naive, snaive, meanf, rwf, rwf(rdata,drift=TRUE), thetaf
+        forecast_periods: periods to forecast for
+        frequency: frequency of time series (seasonal period used by snaive and thetaf)
+        confidence_level: confidence level for prediction intervals
+
+    Returns:
+        forecast_arrays: dict with
+            mean, lower, upper: forecast_periods x series arrays
+            fitted, residuals: rows x series arrays aligned to the input rows
+            method: method name as reported by R
+            level: confidence level
+    """
+    name = model.split('(')[0].strip()
+    if name not in BASELINE_MODELS:
+        raise ValueError('%s is not supported by the numpy backend, use one of %s' % (model,', '.join(BASELINE_MODELS)))
+    drift = 'drift=TRUE' in model.replace(' ','')
+
+    values = np.asarray(values,dtype=float)
+    if values.ndim == 1:
+        values = values.reshape(-1,1)
+    y, shift, lengths = _align_right(values)
+    steps = np.arange(forecast_periods).reshape(-1,1)
+
+    with np.errstate(divide='ignore',invalid='ignore'):
+        if name == 'naive' or (name == 'rwf' and not drift):
+            mean, se, fitted = _lagwalk(y,1,steps)
+            method = 'Naive method' if name == 'naive' else 'Random walk'
+        elif name == 'snaive':
+            mean, se, fitted = _lagwalk(y,frequency,steps)
+            method = 'Seasonal naive method'
+        elif name == 'rwf':
+            mean, se, fitted = _drift(y,lengths,steps)
+            method = 'Random walk with drift'
+        elif name == 'meanf':
+            mean, se, fitted = _meanf(y,lengths,steps)
+            method = 'Mean'
+        else:
+            mean, se, fitted = _thetaf(y,lengths,frequency,steps)
+            method = 'Theta'
+
+        z = NormalDist().inv_cdf(0.5 + confidence_level/200.0)
+        residuals = y - fitted
+
+    return {'mean':mean,
+            'lower':mean - z*se,
+            'upper':mean + z*se,
+            'fitted':_restore(fitted,shift),
+            'residuals':_restore(residuals,shift),
+            'method':method,
+            'level':confidence_level}
+
+def _align_right(values):
+    """shifts every column down so its last non null value sits on the last row
+
+    Returns:
+        aligned: rows x series array with nulls above the start of each series
+        shift: rows each column was shifted down by
+        lengths: number of rows from first to last non null value of each column
+    """
+    n, k = values.shape
+    notnull = ~np.isnan(values)
+    has_values = notnull.any(axis=0)
+    starts = notnull.argmax(axis=0)
+    ends = n - 1 - notnull[::-1].argmax(axis=0)
+    lengths = np.where(has_values,ends - starts + 1,0)
+    shift = n - 1 - ends
+    rows = np.arange(n).reshape(-1,1) - shift
+    aligned = np.where(rows >= 0,values[np.maximum(rows,0),np.arange(k)],np.nan)
+    return aligned, shift, lengths
+
+def _restore(aligned, shift):
+    """inverse of _align_right, moves every column back to its original rows"""
+    n, k = aligned.shape
+    rows = np.arange(n).reshape(-1,1) + shift
+    return np.where(rows < n,aligned[np.minimum(rows,n - 1),np.arange(k)],np.nan)
+
+def _lag(y, lag):
+    """lags every column by lag rows, filling the first rows with nulls"""
+    lagged = np.full(y.shape,np.nan)
+    lagged[lag:] = y[:-lag]
+    return lagged
+
+def _masked_mean(x, axis=0):
+    """mean ignoring nulls that returns null for all null slices without warning"""
+    valid = ~np.isnan(x)
+    return np.where(valid,x,0.0).sum(axis=axis)/valid.sum(axis=axis)
+
+def _lagwalk(y, lag, steps):
+    """naive (lag 1) and seasonal naive (lag = frequency) forecasts"""
+    fitted = _lag(y,lag)
+    sigma = np.sqrt(_masked_mean((y - fitted)**2))
+    #repeat last lag observations over the horizon
+    mean = y[-lag:][steps.ravel() % lag]
+    se = sigma*np.sqrt(steps//lag + 1)
+    return mean, se, fitted
+
+def _drift(y, lengths, steps):
+    """random walk with drift, drift is the mean of the first differences"""
+    naive_fitted = _lag(y,1)
+    drift = _masked_mean(y - naive_fitted)
+    fitted = naive_fitted + drift
+    residuals = y - fitted
+    valid = ~np.isnan(residuals)
+    sigma = np.sqrt((np.where(valid,residuals,0.0)**2).sum(axis=0)/(valid.sum(axis=0) - 1))
+    horizon = steps + 1
+    mean = y[-1] + horizon*drift
+    se = sigma*np.sqrt(horizon*(1 + horizon/(lengths - 1.0)))
+    return mean, se, fitted
+
+def _meanf(y, lengths, steps):
+    """forecasts every period with the mean of the series"""
+    valid = ~np.isnan(y)
+    ybar = _masked_mean(y)
+    sd = np.sqrt((np.where(valid,y - ybar,0.0)**2).sum(axis=0)/(lengths - 1.0))
+    fitted = np.where(valid,ybar,np.nan)
+    mean = np.repeat(ybar.reshape(1,-1),len(steps),axis=0)
+    se = np.repeat((sd*np.sqrt(1 + 1.0/lengths)).reshape(1,-1),len(steps),axis=0)
+    return mean, se, fitted
+
+def centered_moving_average(y, m):
+    """centred moving average of order m down every column (2 x m moving average for even m, like R decompose)
+    -rows whose window runs past either end of the data or includes a null are null
+    """
+    n, k = y.shape
+    if m % 2 == 0:
+        weights = np.r_[0.5,np.ones(m - 1),0.5]/m
+    else:
+        weights = np.ones(m)/m
+    half = len(weights)//2
+    trend = np.full((n,k),np.nan)
+    if n > 2*half:
+        moving_average = np.zeros((n - 2*half,k))
+        for i, weight in enumerate(weights):
+            moving_average += weight*y[i:n - 2*half + i]
+        trend[half:n - half] = moving_average
+    return trend
+
+def _seasonal_factors(y, lengths, m):
+    """multiplicative seasonal factors from classical decomposition for series that pass thetaf's seasonality test
+
+    Returns:
+        seasonal: rows x series seasonal factors (1 for non seasonal series)
+        figure: m x series seasonal figure indexed by position in season counted from each series start
+        is_seasonal: boolean array, True where series was seasonally adjusted
+    """
+    n, k = y.shape
+    valid = ~np.isnan(y)
+    is_seasonal = (m > 1) & (lengths > 2*m)
+    if not is_seasonal.any():
+        return np.ones((n,k)), np.ones((max(m,1),k)), is_seasonal
+
+    #90% one sided test on the autocorrelation at the seasonal lag, same as thetaf
+    centered = np.where(valid,y - _masked_mean(y),0.0)
+    denominator = (centered**2).sum(axis=0)
+    acf = np.array([(centered[lag:]*centered[:-lag]).sum(axis=0)/denominator for lag in range(1,m + 1)])
+    stat = np.sqrt((1 + 2*(acf[:-1]**2).sum(axis=0))/lengths)
+    is_seasonal = is_seasonal & (np.abs(acf[-1])/stat > NormalDist().inv_cdf(0.95))
+
+    ratio = y/centered_moving_average(y,m)
+
+    #average detrended values by position in season, then normalize figure to mean 1
+    phase = (np.arange(n).reshape(-1,1) - (n - lengths)) % m
+    figure = np.empty((m,k))
+    for p in range(m):
+        selected = (phase == p) & ~np.isnan(ratio)
+        figure[p] = np.where(selected,ratio,0.0).sum(axis=0)/selected.sum(axis=0)
+    figure = figure/figure.mean(axis=0)
+    figure = np.where(is_seasonal,figure,1.0)
+    seasonal = np.where(valid,figure[phase,np.arange(k)],np.nan)
+    return seasonal, figure, is_seasonal
+
+def _ses_sse(x, alphas):
+    """sum of squared one step errors of simple exponential smoothing for alphas (candidates x series)"""
+    level = np.full(alphas.shape,np.nan)
+    sse = np.zeros(alphas.shape)
+    for t in range(x.shape[0]):
+        error = x[t] - level
+        sse += np.where(np.isnan(error),0.0,error**2)
+        level = np.where(np.isnan(x[t]),level,np.where(np.isnan(level),x[t],level + alphas*error))
+    return sse
+
+def _ses(x):
+    """simple exponential smoothing with alpha picked by a coarse then fine grid search for every column
+
+    Returns:
+        level: final level (point forecast) of each series
+        fitted: one step ahead fitted values
+        alpha: smoothing parameter of each series
+        sse: sum of squared errors of each series
+    """
+    k = x.shape[1]
+    coarse = np.repeat(np.arange(0.05,1.0,0.1).reshape(-1,1),k,axis=1)
+    best = coarse[np.argmin(_ses_sse(x,coarse),axis=0),np.arange(k)]
+    fine = np.clip(best + np.arange(-0.05,0.0501,0.01).reshape(-1,1),1e-4,0.9999)
+    alpha = fine[np.argmin(_ses_sse(x,fine),axis=0),np.arange(k)]
+
+    level = np.full(k,np.nan)
+    fitted = np.full(x.shape,np.nan)
+    for t in range(x.shape[0]):
+        fitted[t] = level
+        error = x[t] - level
+        level = np.where(np.isnan(x[t]),level,np.where(np.isnan(level),x[t],level + alpha*error))
+    errors = x - fitted
+    sse = np.where(np.isnan(errors),0.0,errors**2).sum(axis=0)
+    return level, fitted, alpha, sse
+
+def _thetaf(y, lengths, m, steps):
+    """theta method: simple exponential smoothing with drift equal to half the linear trend slope,
+    applied to seasonally adjusted data when the series is seasonal
+    """
+    n, k = y.shape
+    seasonal, figure, is_seasonal = _seasonal_factors(y,lengths,m)
+    x = y/seasonal
+    level, ses_fitted, alpha, sse = _ses(x)
+    alpha = np.maximum(alpha,1e-10)
+
+    #half the slope of a linear regression on time
+    valid = ~np.isnan(x)
+    time_index = np.where(valid,np.arange(n).reshape(-1,1) - (n - lengths),np.nan)
+    time_centered = np.where(valid,time_index - _masked_mean(time_index),0.0)
+    x_centered = np.where(valid,x - _masked_mean(x),0.0)
+    half_slope = (time_centered*x_centered).sum(axis=0)/(time_centered**2).sum(axis=0)/2
+
+    mean = level + half_slope*(steps + (1 - (1 - alpha)**lengths)/alpha)
+    if m > 1:
+        mean = mean*figure[(lengths + steps) % m,np.arange(k)]
+    fitted = ses_fitted*seasonal
+    sigma2 = sse/(lengths - 2.0)
+    se = np.sqrt(sigma2)*np.sqrt(steps*alpha**2 + 1)
+    return mean, se, fitted
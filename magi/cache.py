@@ -0,0 +1,215 @@
+import os
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+
+#bump when cached outputs change so entries written by older versions are never read back
+CACHE_VERSION = 1
+
+#outputs stored for every series, the rest (x, full_fit, full_actuals) are rebuilt from the input series on a hit
+CACHED_OUTPUTS = ('method','predicted','lower','upper','level','residuals','fitted')
+DERIVED_OUTPUTS = ('x','full_fit','full_actuals')
+
+class ForecastCache(object):
+
+    """
+    content addressed on disk cache of forecasts, so series that haven't changed since the last run aren't refitted
+    -entries are keyed by a hash of the series values and dates (leading and trailing nulls trimmed), the model
+     (R model string or prophet parameters), horizon, frequency and confidence level, so any change to the data or
+     settings is a miss and stale entries are never returned
+    -every entry is its own pickle file, reads refresh the file modification time and the least recently used
+     entries are deleted once the cache grows past max_size
+
+    Attributes:
+        path: directory entries are stored in (created if it doesn't exist)
+        max_size: maximum total size of entries in bytes, None for unbounded
+        hits: number of lookups answered from the cache
+        misses: number of lookups not found in the cache
+
+    Methods:
+        key: returns cache key of a series and forecast settings
+        get: returns cached outputs for key or None
+        put: stores outputs under key
+        invalidate: removes entry of key
+        clear: removes every entry
+
+    Examples:
+
+    from magi.cache import ForecastCache
+    cache = ForecastCache('forecast_cache',max_size=2**30)
+    fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12,cache=cache)
+    forecast_df = fc_obj.R(model='auto.arima(rdata)',pred=True)
+    """
+
+    def __init__(self, path, max_size=2**30):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+    @staticmethod
+    def key(time_series, spec):
+        """returns hex digest identifying series and forecast settings
+
+        Args:
+            time_series: pandas series, leading and trailing nulls are ignored
+            spec: tuple of everything else the forecast depends on (method, model, horizon, frequency, level)
+
+        Returns:
+            key: sha256 hex digest
+        """
+        values = np.asarray(time_series.values,dtype=float)
+        notnull = ~np.isnan(values)
+        if notnull.any():
+            start, end = notnull.argmax(), len(values) - notnull[::-1].argmax()
+        else:
+            start, end = 0, 0
+        index = time_series.index[start:end]
+
+        digest = hashlib.sha256(repr((CACHE_VERSION,) + tuple(spec)).encode('utf-8'))
+        digest.update(np.ascontiguousarray(values[start:end]).tobytes())
+        if index.dtype.kind in 'iufMm':
+            digest.update(np.ascontiguousarray(index.values).tobytes())
+        else:
+            digest.update('\x00'.join(map(str,index)).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.path,key[:2],key + '.pkl')
+
+    def get(self, key, required=CACHED_OUTPUTS):
+        """returns cached outputs of key, or None if key isn't cached or the entry lacks a required output
+
+        Args:
+            key: cache key from ForecastCache.key
+            required: output keys entry must have to count as a hit
+
+        Returns:
+            outputs: dict of cached outputs or None
+        """
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'rb') as f:
+                outputs = pickle.load(f)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+        if any(i not in outputs for i in required):
+            self.misses += 1
+            return None
+        #mark entry as recently used for eviction
+        try:
+            os.utime(entry_path, None)
+        except OSError:
+            pass
+        self.hits += 1
+        return outputs
+
+    def put(self, key, outputs):
+        """stores outputs under key, skipping outputs that can't be pickled
+
+        Args:
+            key: cache key from ForecastCache.key
+            outputs: dict of forecast outputs
+        """
+        outputs = {i:outputs[i] for i in outputs if i not in DERIVED_OUTPUTS}
+        try:
+            data = pickle.dumps(outputs, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+        entry_path = self._entry_path(key)
+        if self.max_size is not None:
+            self._total_size()
+            #an overwritten entry no longer counts towards the size
+            try:
+                self._size -= os.path.getsize(entry_path)
+            except OSError:
+                pass
+        if not os.path.exists(os.path.dirname(entry_path)):
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        #write to temporary file first so an interrupted write can't leave a truncated entry behind
+        tmp_path = entry_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, entry_path)
+
+        if self.max_size is not None:
+            self._size += len(data)
+            if self._size > self.max_size:
+                self._evict()
+
+    def invalidate(self, key):
+        """removes entry of key if it is cached"""
+        try:
+            os.remove(self._entry_path(key))
+            self._size = None
+        except OSError:
+            pass
+
+    def clear(self):
+        """removes every cached entry"""
+        for entry_path, size, mtime in self._entries():
+            os.remove(entry_path)
+        self._size = 0
+
+    def _entries(self):
+        """returns list of (path, size, modification time) of every entry"""
+        entries = []
+        for directory, _, files in os.walk(self.path):
+            for name in files:
+                if name.endswith('.pkl'):
+                    stat = os.stat(os.path.join(directory, name))
+                    entries.append((os.path.join(directory, name), stat.st_size, stat.st_mtime))
+        return entries
+
+    def _total_size(self):
+        """total size of entries, scanned from disk once and then kept up to date by put"""
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        return self._size
+
+    def _evict(self):
+        """deletes least recently used entries until cache is below 90% of max_size,
+        the slack means the directory is only rescanned every so often rather than on every put
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = 0.9*self.max_size
+        for entry_path, size, mtime in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(entry_path)
+                total -= size
+            except OSError:
+                pass
+        self._size = total
+
+def cached_outputs(entry, time_series, outputs):
+    """selects outputs from a cached entry, rebuilding x, full_fit and full_actuals from the input series
+
+    Args:
+        entry: dict returned by ForecastCache.get
+        time_series: pandas series the entry was cached for
+        outputs: tuple of output keys to return
+
+    Returns:
+        selected: dict of requested outputs
+    """
+    selected = {}
+    for i in outputs:
+        if i not in DERIVED_OUTPUTS:
+            selected[i] = entry[i]
+            continue
+        x = time_series.loc[time_series.first_valid_index():time_series.last_valid_index()]
+        if i == 'x':
+            selected[i] = x
+        elif i == 'full_fit':
+            selected[i] = pd.concat([entry['fitted'],entry['predicted']])
+        else:
+            selected[i] = pd.concat([x,entry['predicted']])
+    return selected
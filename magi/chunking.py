@@ -0,0 +1,216 @@
+import os
+import time
+import uuid
+import pickle
+import tempfile
+import itertools
+from collections import deque, OrderedDict
+import dask
+from magi.pool import get_pool, check_worker
+
+class ChunkSizer(object):
+
+    """
+    picks how many series go into each chunk task from the measured cost per series, so every chunk takes about
+    target_seconds of worker time whether series take milliseconds (naive) or seconds (auto.arima, prophet)
+    -the first chunks are small probes, afterwards the size follows an exponential moving average of the
+     seconds per series reported by finished chunks
+
+    Attributes:
+        chunk_size: fixed chunk size, if set no adaptation is done
+        target_seconds: worker time each chunk should take
+        min_size: smallest chunk size
+        max_size: largest chunk size
+        seconds_per_item: current estimate of worker seconds per series (None until a chunk has finished)
+    """
+
+    def __init__(self, chunk_size=None, target_seconds=2.0, min_size=1, max_size=2000, initial_size=4, smoothing=0.3):
+        self.chunk_size = chunk_size
+        self.target_seconds = target_seconds
+        self.min_size = min_size
+        self.max_size = max_size
+        self.initial_size = initial_size
+        self.smoothing = smoothing
+        self.seconds_per_item = None
+
+    def size(self, remaining=None, n_workers=1):
+        """returns size of next chunk, never more than an even share of the remaining series per worker
+        so the last chunks don't leave workers idle
+        """
+        if self.chunk_size is not None:
+            return self.chunk_size
+        if self.seconds_per_item is None:
+            size = self.initial_size
+        else:
+            size = int(self.target_seconds/max(self.seconds_per_item,1e-9))
+        if remaining is not None:
+            size = min(size,-(-remaining//max(n_workers,1)))
+        return max(self.min_size,min(self.max_size,size))
+
+    def update(self, nitems, seconds):
+        """records that a chunk of nitems series took seconds of worker time"""
+        if nitems == 0:
+            return
+        observed = seconds/nitems
+        if self.seconds_per_item is None:
+            self.seconds_per_item = observed
+        else:
+            self.seconds_per_item = self.smoothing*observed + (1 - self.smoothing)*self.seconds_per_item
+
+def _run_chunk(func, args_list, shared=None):
+    """runs func(*args,**shared) for every args tuple of a chunk on a worker and returns results with the time they took"""
+    if shared is None:
+        shared = {}
+    start = time.perf_counter()
+    results = [func(*args,**shared) for args in args_list]
+    return results, time.perf_counter() - start
+
+#shared inputs of recent map_chunked calls on this pool worker, keyed by the token of the call
+_worker_shared = OrderedDict()
+_WORKER_SHARED_SIZE = 4
+
+def _load_shared(token, path):
+    """returns shared inputs of a map_chunked call, read from the file the parent pickled them to on the first chunk
+    this worker runs and from the worker's store afterwards"""
+    if token not in _worker_shared:
+        with open(path,'rb') as f:
+            _worker_shared[token] = pickle.load(f)
+        while len(_worker_shared) > _WORKER_SHARED_SIZE:
+            _worker_shared.popitem(last=False)
+    else:
+        _worker_shared.move_to_end(token)
+    return _worker_shared[token]
+
+def _run_pool_chunk(func, args_list, token=None, path=None):
+    """_run_chunk on an R pool worker with the shared inputs stored under token, raises the worker's R startup error
+    instead of running the chunk"""
+    check_worker()
+    shared = None if token is None else _load_shared(token,path)
+    return _run_chunk(func,args_list,shared)
+
+def _dump_shared(shared):
+    """pickles shared inputs once to a temporary file and returns (token, path), (None, None) if there are none"""
+    if not shared:
+        return None, None
+    fd, path = tempfile.mkstemp(prefix='magi_shared_',suffix='.pkl')
+    with os.fdopen(fd,'wb') as f:
+        pickle.dump(shared,f,protocol=pickle.HIGHEST_PROTOCOL)
+    return uuid.uuid4().hex, path
+
+def map_chunked(func,
+                args_iter,
+                nitems,
+                scheduler='pool',
+                n_workers=None,
+                chunk_size=None,
+                max_in_flight=None,
+                target_seconds=2.0,
+                shared=None):
+
+    """runs func(*args,**shared) for every args tuple in args_iter grouped into chunk tasks, with at most max_in_flight
+    chunks submitted at a time, and returns results in order
+    -args_iter is consumed lazily, so per series inputs are only built when their chunk is submitted
+    -shared inputs are sent to each worker once instead of being copied into every per series argument tuple or
+     chunk: pickled once to a temporary file that each pool worker loads on its first chunk, scattered on a
+     distributed cluster and one graph node per dask.compute call otherwise
+    -chunk sizes adapt to the measured worker time per series (see ChunkSizer) unless chunk_size is fixed
+    -the number of tasks and the memory held by submitted inputs stay flat as the number of series grows
+
+    Args:
+        func: function to run for each series, must be a picklable module level function for the R worker pool
+        args_iter: iterable of argument tuples, one per series
+        nitems: number of argument tuples in args_iter
+        scheduler: 'pool' runs chunks on the R worker pool, 'dask' on a dask distributed client if one is
+            running and in waves of dask.compute calls otherwise
+        n_workers: number of worker processes (defaults to number of cpus for the pool)
+        chunk_size: fixed number of series per chunk, adaptive if None
+        max_in_flight: most chunks submitted at once (defaults to twice the number of workers)
+        target_seconds: worker time each adaptive chunk should take
+        shared: dict of keyword arguments passed to every call of func
+
+    Returns:
+        results: list of func return values in same order as args_iter
+    """
+    if nitems == 0:
+        return []
+    sizer = ChunkSizer(chunk_size=chunk_size,target_seconds=target_seconds)
+    args_iter = iter(args_iter)
+
+    if scheduler == 'pool':
+        pool = get_pool(n_workers)
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+        #chunks only carry the token and path of the shared inputs, the file is removed once every chunk is done
+        token, path = _dump_shared(shared)
+        try:
+            return _map_in_flight(lambda chunk: pool.apply_async(_run_pool_chunk,(func,chunk,token,path)),
+                                  lambda async_result: async_result.get(),
+                                  args_iter,nitems,sizer,n_workers,max_in_flight)
+        finally:
+            if path is not None:
+                os.remove(path)
+
+    from magi.core import _distributed_client
+    client = _distributed_client()
+    if client is None:
+        return _compute_waves(func,args_iter,nitems,sizer,n_workers,max_in_flight,shared)
+    if n_workers is None:
+        n_workers = max(len(client.scheduler_info()['workers']),1)
+    if shared:
+        #values are scattered under unique keys (scattering the dict itself makes its names fixed cluster keys,
+        #so back to back calls would share and release each other's values), futures nested in the shared dict
+        #are resolved to the worker's copy when each chunk runs
+        futures = client.scatter(list(shared.values()),broadcast=True,hash=False)
+        shared = dict(zip(shared,futures))
+    return _map_in_flight(lambda chunk: client.submit(_run_chunk,func,chunk,shared,pure=False),
+                          lambda future: future.result(),
+                          args_iter,nitems,sizer,n_workers,max_in_flight)
+
+def _map_in_flight(submit, collect, args_iter, nitems, sizer, n_workers, max_in_flight):
+    """map_chunked for the pool and distributed schedulers, keeps up to max_in_flight chunks submitted with submit
+    and gathers their results in order with collect"""
+    if max_in_flight is None:
+        max_in_flight = 2*n_workers
+    results = [None]*nitems
+    in_flight = deque()
+    position = 0
+    while True:
+        #top up submitted chunks, then wait for the oldest one before submitting more
+        while len(in_flight) < max_in_flight and position < nitems:
+            chunk = list(itertools.islice(args_iter,sizer.size(nitems - position,n_workers)))
+            if not chunk:
+                break
+            in_flight.append((position,len(chunk),submit(chunk)))
+            position += len(chunk)
+        if not in_flight:
+            break
+        start, size, task = in_flight.popleft()
+        chunk_results, seconds = collect(task)
+        results[start:start + size] = chunk_results
+        sizer.update(size,seconds)
+    return results
+
+def _compute_waves(func, args_iter, nitems, sizer, n_workers, max_in_flight, shared=None):
+    """map_chunked for the local dask schedulers, computes up to max_in_flight chunks per dask.compute call"""
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if max_in_flight is None:
+        max_in_flight = 2*n_workers
+    if shared:
+        shared = dask.delayed(shared)
+    results = []
+    while len(results) < nitems:
+        chunks = []
+        submitted = len(results)
+        for _ in range(max_in_flight):
+            chunk = list(itertools.islice(args_iter,sizer.size(nitems - submitted,n_workers)))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            submitted += len(chunk)
+        if not chunks:
+            break
+        for chunk, (chunk_results, seconds) in zip(chunks,dask.compute(*[dask.delayed(_run_chunk)(func,chunk,shared) for chunk in chunks])):
+            results.extend(chunk_results)
+            sizer.update(len(chunk),seconds)
+    return results
@@ -0,0 +1,137 @@
+import warnings
+import numpy as np
+from magi.baseline import centered_moving_average
+
+def tsclean(values, frequency, replace_missing=True, window=7, iqr_multiplier=3.0, chunk_size=10000):
+
+    """identifies and replaces outliers (and optionally missing values) in every column of a 2d array at once,
+    numpy version of R tsclean that follows the same steps
+        1. series long enough to be seasonal are decomposed (classical additive decomposition) and seasonally
+           adjusted if the seasonal component is strong (strength >= 0.6, same cutoff as R tsoutliers)
+        2. residuals from a running median smoother (window shrinking symmetrically at the ends) are flagged as
+           outliers when they fall more than iqr_multiplier interquartile ranges outside the residual quartiles
+        3. outliers (and missing values if replace_missing) are replaced by linear interpolation, done on the
+           seasonally adjusted series and reseasonalized for seasonal series
+    -R smooths with supsmu and decomposes with stl, so results are close to but not identical to R
+    -columns may start and end on different rows, values outside each column's first and last non null value
+     are left null
+
+    Args:
+        values: 2d float array of rows x series
+        frequency: frequency of time series (seasonal period)
+        replace_missing: if True, not only removes outliers but also interpolates missing values
+        window: width of running median used to smooth the (seasonally adjusted) series
+        iqr_multiplier: number of interquartile ranges outside the quartiles a residual must be to be an outlier
+        chunk_size: number of columns processed at a time, bounds memory of the running median
+
+    Returns:
+        cleaned: 2d float array of rows x series
+    """
+    values = np.asarray(values,dtype=float)
+    if values.ndim == 1:
+        return tsclean(values.reshape(-1,1),frequency,replace_missing,window,iqr_multiplier,chunk_size)[:,0]
+    cleaned = np.empty(values.shape)
+    for i in range(0,values.shape[1],chunk_size):
+        cleaned[:,i:i + chunk_size] = _tsclean_block(values[:,i:i + chunk_size],frequency,replace_missing,window,iqr_multiplier)
+    return cleaned
+
+def _tsclean_block(values, frequency, replace_missing, window, iqr_multiplier):
+    """tsclean for one block of columns"""
+    n, k = values.shape
+    rows = np.arange(n).reshape(-1,1)
+    notnull = ~np.isnan(values)
+    starts = notnull.argmax(axis=0)
+    ends = n - 1 - notnull[::-1].argmax(axis=0)
+    inside = (rows >= starts) & (rows <= ends) & notnull.any(axis=0)
+    missing = inside & ~notnull
+
+    with np.errstate(divide='ignore',invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore',category=RuntimeWarning)
+        filled = interpolate_linear(values,inside)
+        seasonal = _seasonal_component(filled,starts,ends - starts + 1,frequency)
+        adjusted = filled - seasonal
+
+        residuals = adjusted - _running_median(adjusted,window)
+        residuals[~notnull] = np.nan
+        lower_quartile, upper_quartile = np.nanpercentile(residuals,[25,75],axis=0)
+        iqr = upper_quartile - lower_quartile
+        outliers = (residuals < lower_quartile - iqr_multiplier*iqr) | (residuals > upper_quartile + iqr_multiplier*iqr)
+
+        #interpolate seasonally adjusted values over outliers and missing points, then add seasonality back
+        replace = outliers | missing if replace_missing else outliers
+        replaced = interpolate_linear(np.where(outliers | missing,np.nan,adjusted),inside) + seasonal
+    return np.where(replace,replaced,values)
+
+def interpolate_linear(values, inside=None):
+    """linearly interpolates nulls down every column at once
+    -gaps at the start or end of the inside range are filled with the nearest value (like R approx with rule=2)
+
+    Args:
+        values: 2d float array of rows x series
+        inside: boolean array marking rows to fill for each column (defaults to every row)
+
+    Returns:
+        interpolated: 2d float array, null outside inside and where a column has no values
+    """
+    n, k = values.shape
+    if inside is None:
+        inside = np.ones((n,k),dtype=bool)
+    rows = np.arange(n).reshape(-1,1)
+    columns = np.arange(k)
+    valid = ~np.isnan(values)
+    previous = np.maximum.accumulate(np.where(valid,rows,-1),axis=0)
+    following = np.minimum.accumulate(np.where(valid,rows,n)[::-1],axis=0)[::-1]
+    has_previous = previous >= 0
+    has_following = following < n
+    previous_value = values[np.clip(previous,0,n - 1),columns]
+    following_value = values[np.clip(following,0,n - 1),columns]
+    with np.errstate(divide='ignore',invalid='ignore'):
+        weight = (rows - previous)/(following - previous)
+        between = previous_value + weight*(following_value - previous_value)
+    interpolated = np.where(has_previous & has_following,between,
+                            np.where(has_previous,previous_value,following_value))
+    interpolated = np.where(valid,values,interpolated)
+    return np.where(inside,interpolated,np.nan)
+
+def _seasonal_component(filled, starts, lengths, frequency):
+    """additive seasonal component of every column that is long enough and strongly seasonal, zero otherwise"""
+    n, k = filled.shape
+    seasonal = np.zeros((n,k))
+    candidates = (frequency > 1) & (lengths > 2*frequency)
+    if not candidates.any():
+        return seasonal
+
+    trend = centered_moving_average(filled,frequency)
+    detrended = filled - trend
+    phase = (np.arange(n).reshape(-1,1) - starts) % frequency
+    figure = np.empty((frequency,k))
+    for p in range(frequency):
+        selected = (phase == p) & ~np.isnan(detrended)
+        figure[p] = np.where(selected,detrended,0.0).sum(axis=0)/selected.sum(axis=0)
+    figure = figure - figure.mean(axis=0)
+    component = figure[phase,np.arange(k)]
+
+    #seasonal strength 1 - var(remainder)/var(detrended)
+    remainder = detrended - component
+    strength = 1 - np.nanvar(remainder,axis=0)/np.nanvar(detrended,axis=0)
+    strong = candidates & (strength >= 0.6)
+    return np.where(strong & ~np.isnan(filled),component,0.0)
+
+def _running_median(values, window):
+    """centred running median down every column, near the first and last value of each column the window shrinks
+    symmetrically (down to the value itself) so a trend doesn't leave biased residuals at the ends
+    """
+    half = window//2
+    n = values.shape[0]
+    rows = np.arange(n).reshape(-1,1)
+    valid = ~np.isnan(values)
+    starts = valid.argmax(axis=0)
+    ends = n - 1 - valid[::-1].argmax(axis=0)
+    widths = np.clip(np.minimum(rows - starts,ends - rows),0,half)
+    smoothed = np.full(values.shape,np.nan)
+    for width in range(half + 1):
+        padded = np.pad(values,((width,width),(0,0)),mode='constant',constant_values=np.nan)
+        windows = np.lib.stride_tricks.sliding_window_view(padded,2*width + 1,axis=0)
+        selected = widths == width
+        smoothed[selected] = np.nanmedian(windows,axis=-1)[selected]
+    return smoothed
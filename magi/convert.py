@@ -0,0 +1,82 @@
+import numpy as np
+from magi.backends import get_R
+
+def numpy_to_R(values):
+    """converts numpy array to R numeric vector (flattened column major, so 2d arrays can be given R dims)
+    -values are kept as float64, so decimals aren't truncated like they are with IntVector
+    -with rpy2 >= 3 the float64 buffer is copied into R memory in one block, older rpy2 falls back to FloatVector
+    -NaN becomes NaN in R, which is.na treats as missing
+
+    Args:
+        values: numpy array or array like of numbers
+
+    Returns:
+        R_vector: R numeric vector
+    """
+    values = np.asarray(values,dtype=float)
+    if values.ndim > 1:
+        values = values.ravel(order='F')
+    values = np.ascontiguousarray(values)
+    robjects = get_R()
+    from rpy2 import rinterface
+    from_memoryview = getattr(rinterface.FloatSexpVector,'from_memoryview',None)
+    if from_memoryview is not None:
+        return robjects.FloatVector(from_memoryview(memoryview(values)))
+    return robjects.FloatVector(values)
+
+def R_to_numpy(R_vector, dtype=float):
+    """returns numpy array of R numeric vector, copied out of R memory in one block rather than element by element
+    -the array owns its data, so it stays valid after R frees the vector and can be modified or pickled freely
+
+    Args:
+        R_vector: R numeric (or integer) vector, matrix or ts
+        dtype: dtype of returned array, integer vectors are converted when it differs
+
+    Returns:
+        values: 1d numpy array (R matrices come back flattened column major)
+    """
+    if hasattr(R_vector,'memoryview'):
+        try:
+            return np.array(R_vector.memoryview(),dtype=dtype).ravel()
+        except (TypeError, ValueError, NotImplementedError):
+            pass
+    return np.array(R_vector,dtype=dtype).ravel()
+
+def to_R_ts(values, frequency):
+    """converts 1d numpy array to R ts object of frequency"""
+    return get_R().r['ts'](numpy_to_R(values),frequency=frequency)
+
+def to_R_msts(values, seasonal_periods):
+    """converts 1d numpy array to R msts object with several seasonal periods (e.g. (24,168) for hourly data),
+    which mstl, stlf, tbats and auto.arima with fourier terms use for every seasonality at once
+    """
+    robjects = get_R()
+    return robjects.r['msts'](numpy_to_R(values),**{'seasonal.periods':robjects.FloatVector(seasonal_periods)})
+
+def to_R_matrix(values):
+    """converts 2d numpy array to R numeric matrix in one conversion"""
+    nrow, ncol = values.shape
+    return get_R().r.matrix(numpy_to_R(values),nrow=nrow,ncol=ncol)
+
+def from_R_matrix(R_matrix, shape):
+    """converts R numeric matrix to 2d numpy array of shape (R matrices are stored column major)"""
+    return R_to_numpy(R_matrix).reshape(shape,order='F')
+
+def bounds(values):
+    """first and last non null row of every column of a 2d array (or of a 1d array) in one pass
+
+    Args:
+        values: 1d or 2d float array
+
+    Returns:
+        starts: first non null row of each column (scalar for 1d input)
+        ends: last non null row of each column, -1 for columns that are all null (scalar for 1d input)
+    """
+    values = np.asarray(values,dtype=float)
+    notnull = ~np.isnan(values)
+    n = values.shape[0]
+    starts = notnull.argmax(axis=0)
+    ends = np.where(notnull.any(axis=0),n - 1 - notnull[::-1].argmax(axis=0),-1)
+    if values.ndim == 1:
+        return int(starts), int(ends)
+    return starts, ends
@@ -1,27 +1,413 @@
-from rpy2.robjects.packages import importr
-#get ts object as python object
-from rpy2.robjects import pandas2ri
-pandas2ri.activate()
-import rpy2.robjects as robjects
-ts=robjects.r('ts')
-
-#installs forecast package
-try:
-    forecast=importr('forecast')
-except:
-    #if forecast package doesnt load then need to install forecast package first
-    importr("utils")
-    utils = importr('utils')
-    packnames = ('ggplot2','forecast')
-    from rpy2.robjects.vectors import StrVector
-    utils.install_packages(StrVector(packnames))
-    forecast=importr('forecast')
-
 import pandas as pd
 import numpy as np
-from fbprophet import Prophet
 import logging
+import hashlib
 import dask
+from statistics import NormalDist
+from magi.pool import map_tasks
+from magi.chunking import map_chunked
+from magi.backends import get_R, get_prophet
+from magi.baseline import baseline_forecast
+from magi import clean
+from magi.result import ForecastResult
+from magi.cache import CACHED_OUTPUTS, cached_outputs
+from magi.profiling import Profiler, NULL_PROFILER
+from magi.convert import R_to_numpy, to_R_ts, to_R_msts, to_R_matrix, from_R_matrix, bounds
+
+#outputs workers send back to build a ForecastResult, the per series copies of actuals (x, full_actuals) are left out
+RESULT_KEYS = ('predicted','lower','upper','fitted','residuals','method')
+
+#compiled R closures keyed by call shape, so each distinct R function is only parsed once per process
+_rfunc_cache = {}
+_rfunc_cache_stats = {'hits':0,'misses':0}
+
+def _cached_rfunc(key, build_rstring):
+    """returns compiled R function for key, only parsing the R source from build_rstring on a cache miss
+
+    Args:
+        key: call shape as tuple of (kind, model string, horizon, confidence level, replace_missing)
+        build_rstring: function with no arguments that returns R source string for the function
+
+    Returns:
+        rfunc: compiled R function
+    """
+    try:
+        rfunc = _rfunc_cache[key]
+        _rfunc_cache_stats['hits'] += 1
+    except KeyError:
+        rfunc = get_R().r(build_rstring())
+        _rfunc_cache[key] = rfunc
+        _rfunc_cache_stats['misses'] += 1
+    return rfunc
+
+def rfunc_cache_info():
+    """returns dict of hits, misses and size of the compiled R function cache in this process
+    -every R worker process (pool or dask) keeps its own cache and counters, so after dataframe forecasts on
+     workers the calling process only reports the R calls it made itself (e.g. single series forecasts)
+    """
+    return {'hits':_rfunc_cache_stats['hits'],
+            'misses':_rfunc_cache_stats['misses'],
+            'size':len(_rfunc_cache)}
+
+def clear_rfunc_cache():
+    """empties the compiled R function cache and resets its hit/miss counters in this process
+    (caches of R worker processes are left as they are, shutdown_pool in magi.pool discards them)
+    """
+    _rfunc_cache.clear()
+    _rfunc_cache_stats['hits'] = 0
+    _rfunc_cache_stats['misses'] = 0
+
+def _R_fc_string(model, forecast_periods, confidence_level):
+    """returns R statements that fit model on rdata (if needed) and assign the forecast to fc"""
+    #if forecast model ends in f, assume its a direct forecasting object so handle it differently, no need to fit
+    if model.split('(')[0][-1] == 'f' or model == 'naive' or model == 'snaive':
+        return 'fc<-%s(rdata,h=%s,level=c(%s))' % (model,forecast_periods,confidence_level)
+    return 'fitted_model<-%s\n             fc<-forecast(fitted_model,h=%s,level=c(%s))' % (model,forecast_periods,confidence_level)
+
+def _R_forecast_rfunc(model, forecast_periods, confidence_level):
+    """returns compiled R function that fits model on rdata and forecasts forecast_periods ahead
+    -forecast package is attached once per process by get_R so library(forecast) is not rerun per series
+    """
+    def build_rstring():
+        return """
+             function(rdata){
+             %s
+             return(list(model=fc$model, method=fc$method,mean=fc$mean,lower=fc$lower,upper=fc$upper,level=fc$level,x=fc$x,residuals=fc$residuals,fitted=fc$fitted))
+             }
+            """ % (_R_fc_string(model,forecast_periods,confidence_level))
+    return _cached_rfunc(('forecast',model,forecast_periods,confidence_level,None), build_rstring)
+
+def _R_update_rfunc(model, forecast_periods, confidence_level):
+    """returns compiled R function that reapplies a previously fitted model to rdata without re-estimating it
+    -old_model is the serialized fitted model from an earlier run (or NULL), ets, Arima, bats, tbats and nnetar
+     models are reapplied with their model= argument, anything else (or a model that fails to apply, e.g. too few
+     observations) falls back to fitting model from scratch
+    -direct forecasting functions (thetaf, naive, ...) have no fitted model to reuse and are always run in full
+    -also returns the serialized fitted model for the next run and whether it was re-estimated
+    """
+    def build_rstring():
+        if model.split('(')[0][-1] == 'f' or model == 'naive' or model == 'snaive':
+            update_string = """refit <- TRUE
+             fitted_model <- NULL
+             fc<-%s(rdata,h=%s,level=c(%s))""" % (model,forecast_periods,confidence_level)
+        else:
+            update_string = """fitted_model <- NULL
+             if (!is.null(old_model)) {
+             old <- unserialize(old_model)
+             fitted_model <- tryCatch({
+                 if (inherits(old,'ets')) {ets(rdata,model=old,use.initial.values=TRUE)
+                 } else if (inherits(old,'Arima')) {Arima(rdata,model=old)
+                 } else if (inherits(old,'tbats')) {tbats(rdata,model=old)
+                 } else if (inherits(old,'bats')) {bats(rdata,model=old)
+                 } else if (inherits(old,'nnetar')) {nnetar(rdata,model=old)
+                 } else NULL
+             },error=function(e) NULL)
+             }
+             refit <- is.null(fitted_model)
+             if (refit) {fitted_model<-%s}
+             fc<-forecast(fitted_model,h=%s,level=c(%s))""" % (model,forecast_periods,confidence_level)
+        return """
+             function(rdata,old_model){
+             %s
+             state <- if (is.null(fitted_model)) raw(0) else serialize(fitted_model,NULL)
+             return(list(model=fc$model, method=fc$method,mean=fc$mean,lower=fc$lower,upper=fc$upper,level=fc$level,x=fc$x,residuals=fc$residuals,fitted=fc$fitted,
+                         state=state,refit=refit))
+             }
+            """ % update_string
+    return _cached_rfunc(('update',model,forecast_periods,confidence_level,None), build_rstring)
+
+def _R_xreg_rfunc(model, forecast_periods, confidence_level):
+    """returns compiled R function that fits model with external regressors and forecasts with their future values
+    -xreg_full is the shared regressor matrix of every date, converted to R once per process, each series only
+     passes the 1-based rows of its first and last observation so no regressor values are copied per series
+    -model refers to the regressors of the series history as xreg (e.g. auto.arima(rdata,xreg=xreg)), the
+     forecast_periods rows after the series end are passed to forecast as xreg
+    """
+    def build_rstring():
+        return """
+             function(rdata,xreg_full,start,end){
+             xreg <- xreg_full[start:end,,drop=FALSE]
+             newxreg <- xreg_full[(end + 1):(end + %s),,drop=FALSE]
+             fitted_model<-%s
+             fc<-forecast(fitted_model,h=%s,level=c(%s),xreg=newxreg)
+             return(list(model=fc$model, method=fc$method,mean=fc$mean,lower=fc$lower,upper=fc$upper,level=fc$level,x=fc$x,residuals=fc$residuals,fitted=fc$fitted))
+             }
+            """ % (forecast_periods,model,forecast_periods,confidence_level)
+    return _cached_rfunc(('xreg',model,forecast_periods,confidence_level,None), build_rstring)
+
+#R matrices of shared regressors keyed by their digest, so each process converts a regressor matrix once
+_regressor_cache = {}
+_REGRESSOR_CACHE_SIZE = 4
+
+def _R_regressors(regressors, key):
+    """returns R numeric matrix of regressors dataframe, converting it only the first time key is seen in this process"""
+    R_matrix = _regressor_cache.get(key)
+    if R_matrix is None:
+        if len(_regressor_cache) >= _REGRESSOR_CACHE_SIZE:
+            _regressor_cache.clear()
+        R_matrix = to_R_matrix(regressors.values.astype(float))
+        R_matrix.colnames = get_R().StrVector([str(i) for i in regressors.columns])
+        _regressor_cache[key] = R_matrix
+    return R_matrix
+
+def _regressor_key(regressors):
+    """returns sha256 hex digest of regressor values, dates and names"""
+    digest = hashlib.sha256(repr(list(map(str,regressors.columns))).encode('utf-8'))
+    digest.update(np.ascontiguousarray(regressors.values.astype(float)).tobytes())
+    digest.update('\x00'.join(map(str,regressors.index)).encode('utf-8'))
+    return digest.hexdigest()
+
+def _regressor_rows(regressors, index, forecast_periods):
+    """returns positions in regressors of the first and last date of a trimmed series, checking the regressors
+    cover its history and the forecast_periods rows after it"""
+    start, end = regressors.index.get_indexer([index[0],index[-1]])
+    if start < 0 or end < 0 or end - start != len(index) - 1:
+        raise ValueError('regressors must have a row for every date of the series history')
+    if end + forecast_periods >= len(regressors.index):
+        raise ValueError('regressors must have %d rows after the last date of every series' % forecast_periods)
+    return int(start), int(end)
+
+def _with_regressors(frame, regressors):
+    """adds regressor columns to prophet frame by matching its ds column to the regressors index"""
+    values = regressors.reindex(pd.DatetimeIndex(frame['ds']))
+    if values.isnull().values.any():
+        raise ValueError('regressors must have a row for every date of the series history and forecast periods')
+    values.index = frame.index
+    return pd.concat([frame,values],axis=1)
+
+def _raw_to_bytes(raw):
+    """converts R raw vector to python bytes"""
+    items = list(raw)
+    if items and isinstance(items[0], bytes):
+        return b''.join(items)
+    return bytes(items)
+
+def _R_batch_forecast_rfunc(model, forecast_periods, confidence_level):
+    """returns compiled R function that forecasts every column of a matrix with lapply inside R
+    -each column is trimmed of leading and trailing NA before fitting
+    -means and bounds come back as horizon x series matrices, fitted values and residuals as rows x series
+     matrices aligned to the input rows, so a whole block of series needs only one conversion per output
+    -a series that fails to fit (e.g. all null or too short for the model) gets NA outputs and method NA
+     instead of failing the whole block
+    """
+    def build_rstring():
+        return """
+             function(mat,freq){
+             failed <- list(mean=rep(NA_real_,%s),lower=rep(NA_real_,%s),upper=rep(NA_real_,%s),
+                            fitted=rep(NA_real_,nrow(mat)),residuals=rep(NA_real_,nrow(mat)),method=NA_character_)
+             fit_one <- function(j){
+             tryCatch({
+             idx <- which(!is.na(mat[,j]))
+             rows <- min(idx):max(idx)
+             rdata <- ts(mat[rows,j],frequency=freq)
+             %s
+             fitted_values <- rep(NA_real_,nrow(mat))
+             residual_values <- rep(NA_real_,nrow(mat))
+             fitted_values[rows] <- as.numeric(fc$fitted)
+             residual_values[rows] <- as.numeric(fc$residuals)
+             list(mean=as.numeric(fc$mean),lower=as.numeric(fc$lower),upper=as.numeric(fc$upper),
+                  fitted=fitted_values,residuals=residual_values,method=as.character(fc$method)[1])
+             },error=function(err) failed)
+             }
+             fcs <- lapply(seq_len(ncol(mat)),fit_one)
+             stack <- function(name){do.call(cbind,lapply(fcs,function(out) out[[name]]))}
+             return(list(mean=stack('mean'),lower=stack('lower'),upper=stack('upper'),fitted=stack('fitted'),
+                         residuals=stack('residuals'),method=sapply(fcs,function(out) out$method)))
+             }
+            """ % (forecast_periods,forecast_periods,forecast_periods,_R_fc_string(model,forecast_periods,confidence_level))
+    return _cached_rfunc(('forecast_batch',model,forecast_periods,confidence_level,None), build_rstring)
+
+def _R_cv_rfunc(model, horizon):
+    """returns compiled R function that refits model at every origin of a rolling origin cross validation
+    -full series is converted to R once and each training window (1 based starts to origins) is cut from it inside R
+    -an origin whose fit fails (e.g. too few observations for the model) gets NA forecasts instead of failing the series
+    -returns origins x horizon matrix of point forecasts
+    """
+    def build_rstring():
+        return """
+             function(full_data,starts,origins){
+             forecasts <- matrix(NA_real_,length(origins),%s)
+             for(j in seq_along(origins)){
+             forecasts[j,] <- tryCatch({
+             rdata <- ts(full_data[starts[j]:origins[j]],frequency=frequency(full_data))
+             %s
+             as.numeric(fc$mean)
+             },error=function(err) rep(NA_real_,%s))
+             }
+             return(forecasts)
+             }
+            """ % (horizon,_R_fc_string(model,horizon,80),horizon)
+    return _cached_rfunc(('cross_validate',model,horizon,None,None), build_rstring)
+
+#holdout error measures computed for every candidate model by R_select, in the order R returns them
+SELECT_METRICS = ('MASE','RMSE','MAE','MAPE','SMAPE')
+
+def _R_select_rfunc(models, holdout, metric, forecast_periods, confidence_level):
+    """returns compiled R function that fits every candidate model on rdata minus the last holdout periods,
+    scores their holdout forecasts, then refits the best one on the full series and forecasts forecast_periods ahead
+    -candidates that fail to fit score Inf, if every candidate fails the first one is refitted
+    -MASE is scaled by the in sample seasonal naive error of the training part (naive if it is a season or shorter)
+    -returns models x metrics score matrix (metrics in SELECT_METRICS order), 1 based index of the winner and the
+     forecast outputs of the refitted winner
+    """
+    def build_rstring():
+        fits = ',\n             '.join('function(rdata,h){\n             %s\n             return(fc)}' % _R_fc_string(model,'h',confidence_level)
+                                         for model in models)
+        return """
+             function(rdata){
+             fits <- list(
+             %s)
+             n <- length(rdata)
+             freq <- frequency(rdata)
+             train <- ts(as.numeric(rdata)[seq_len(n - %s)],frequency=freq)
+             test <- as.numeric(rdata)[(n - %s + 1):n]
+             m <- if (length(train) > freq) freq else 1
+             scale <- mean(abs(diff(as.numeric(train),lag=m)),na.rm=TRUE)
+             scores <- matrix(Inf,length(fits),5)
+             for (i in seq_along(fits)) {
+             scores[i,] <- tryCatch({
+                 predicted <- as.numeric(fits[[i]](train,%s)$mean)
+                 e <- test - predicted
+                 c(mean(abs(e))/scale,sqrt(mean(e^2)),mean(abs(e)),100*mean(abs(e/test)),200*mean(abs(e)/(abs(test) + abs(predicted))))
+             },error=function(err) rep(Inf,5))
+             }
+             scores[is.na(scores)] <- Inf
+             best <- which.min(scores[,%s])
+             fc <- fits[[best]](rdata,%s)
+             return(list(scores=scores,best=best,method=fc$method,mean=fc$mean,lower=fc$lower,upper=fc$upper,level=fc$level,residuals=fc$residuals,fitted=fc$fitted))
+             }
+            """ % (fits,holdout,holdout,holdout,SELECT_METRICS.index(metric) + 1,forecast_periods)
+    return _cached_rfunc(('select',tuple(models),holdout,confidence_level,(metric,forecast_periods)), build_rstring)
+
+def _R_tsclean_rfunc(replace_missing):
+    """returns compiled R function that cleans rdata using tsclean"""
+    if replace_missing:
+        R_val = 'TRUE'
+    else:
+        R_val = 'FALSE'
+    def build_rstring():
+        return """
+             function(rdata){
+             x <- tsclean(rdata,replace.missing=%s)
+             return(x)
+             }
+            """ % (R_val)
+    return _cached_rfunc(('tsclean',None,None,None,bool(replace_missing)), build_rstring)
+
+def _R_batch_tsclean_rfunc(replace_missing):
+    """returns compiled R function that runs tsclean over every column of a matrix with lapply inside R
+    -cleaned values are returned as one rows x series matrix with NA outside each series' trimmed range
+    """
+    if replace_missing:
+        R_val = 'TRUE'
+    else:
+        R_val = 'FALSE'
+    def build_rstring():
+        return """
+             function(mat,freq){
+             clean_one <- function(j){
+             idx <- which(!is.na(mat[,j]))
+             rows <- min(idx):max(idx)
+             cleaned <- rep(NA_real_,nrow(mat))
+             cleaned[rows] <- as.numeric(tsclean(ts(mat[rows,j],frequency=freq),replace.missing=%s))
+             return(cleaned)
+             }
+             return(do.call(cbind,lapply(seq_len(ncol(mat)),clean_one)))
+             }
+            """ % (R_val)
+    return _cached_rfunc(('tsclean_batch',None,None,None,bool(replace_missing)), build_rstring)
+
+def _trimmed_columns(time_series):
+    """yields every column of dataframe cut to its first and last non null value,
+    bounds of all columns are found in one pass so workers are sent only the rows they fit on
+    -columns are sliced lazily, so only the series of chunks that have been submitted are held at once
+    """
+    starts, ends = bounds(time_series.values)
+    for j in range(len(time_series.columns)):
+        yield time_series.iloc[starts[j]:ends[j] + 1,j]
+
+def _aggregate_blocks(values, periods):
+    """sums consecutive blocks of periods values (length must be a multiple of periods) for temporal aggregation
+
+    Args:
+        values: 1d float array
+        periods: number of periods summed into each block
+
+    Returns:
+        sums: array of block sums
+        profile: average share of each position in a block (e.g. hour of day), summing to 1
+    """
+    blocks = values.reshape(-1,periods)
+    sums = blocks.sum(axis=1)
+    nonzero = sums != 0
+    profile = np.full(periods,1.0/periods)
+    if nonzero.any():
+        shares = (blocks[nonzero]/sums[nonzero].reshape(-1,1)).mean(axis=0)
+        if np.isfinite(shares).all() and shares.sum() > 0:
+            profile = shares/shares.sum()
+    return sums, profile
+
+def _disaggregate(values, profile):
+    """spreads every block value over its periods by profile, see _aggregate_blocks"""
+    return (np.asarray(values,dtype=float).reshape(-1,1)*profile.reshape(1,-1)).ravel()
+
+def _column_blocks(columns, batch_size):
+    """splits columns into consecutive lists of at most batch_size columns"""
+    columns = list(columns)
+    return [columns[i:i + batch_size] for i in range(0, len(columns), batch_size)]
+
+#prediction options of prophet_series and their defaults
+PROPHET_DEFAULTS = (('predict_history',True),('uncertainty_samples',1000),('interval_width',0.8),('interval_method','sampled'))
+PROPHET_INTERVAL_METHODS = ('sampled','analytic',None)
+#Prophet keyword of each built in seasonality and its period in days
+PROPHET_BUILTIN_SEASONALITIES = (('daily_seasonality',1.0),('weekly_seasonality',7.0),('yearly_seasonality',365.25))
+
+def _output_key(fit_pred, actual_pred, pred, fit, residuals):
+    """returns the forecast dict key selected by the dataframe output flags"""
+    if fit_pred:
+        return 'full_fit'
+    if actual_pred:
+        return 'full_actuals'
+    if pred:
+        return 'predicted'
+    if fit:
+        return 'fitted'
+    if residuals:
+        return 'residuals'
+
+def _prophet_init_params(model):
+    """returns MAP parameters of a fitted Prophet model in the format stan accepts as initial values"""
+    return {'k':model.params['k'][0][0],
+            'm':model.params['m'][0][0],
+            'sigma_obs':model.params['sigma_obs'][0][0],
+            'delta':model.params['delta'][0],
+            'beta':model.params['beta'][0]}
+
+def _prophet_spec(changepoint_prior_scale, options):
+    """returns cache spec of a prophet fit, prediction options that are left at their defaults aren't included
+    so entries cached before they existed still match"""
+    spec = ('prophet',changepoint_prior_scale)
+    for name, default in PROPHET_DEFAULTS:
+        if options.get(name,default) != default:
+            spec += ((name,options[name]),)
+    return spec
+
+def _R_update_spec(model, refit):
+    """returns cache spec of an update mode R fit, refits re-estimate every model so they don't share entries
+    with fits that reapplied stored models"""
+    spec = ('R',model,'update')
+    if refit:
+        spec += ('refit',)
+    return spec
+
+def _distributed_client():
+    """returns the default dask distributed client if one is running, else None"""
+    try:
+        from distributed import default_client
+        return default_client()
+    except (ImportError, ValueError):
+        return None
+
 
 class forecast(object):
     
@@ -33,7 +419,31 @@ class forecast(object):
         forecast_periods: num periods to forecast
         frequency: frequency of time series
         confidence_level: confidence level for upper and lower bounds of forecast (optional)
-        regressors: boolean check if x regressor will be passed into one of the models
+        regressors: dataframe of external regressors shared by every series, indexed by date and covering the history
+            of every series and forecast_periods dates after it, used by R (refer to them as xreg in the model string,
+            e.g. auto.arima(rdata,xreg=xreg)) and prophet (every column is added with add_regressor)
+            -the matrix goes to each worker once per call (see magi.chunking.map_chunked) and is converted to R
+             once per process, series tasks only carry their own rows
+        n_workers: number of R worker processes used for dataframe R and tsclean calls (defaults to number of cpus)
+        scheduler: 'pool' runs R work on persistent worker processes, 'dask' runs it through dask delayed,
+            default picks dask if a dask distributed client is running and the R worker pool otherwise
+        max_history: most recent periods of every series used for fitting (R, R_select, prophet and the training
+            windows of cross_validate), None uses the full history,
+            bounds fit time of long high frequency series
+        aggregate_periods: if set, R models are fitted on sums of aggregate_periods consecutive periods (e.g. 24 to fit
+            hourly series as daily totals) and forecasts and fitted values are spread back over the periods by
+            each series' average profile within a block (intervals are spread the same way, so they are approximate)
+        seasonal_periods: seasonal periods of multi seasonal series (e.g. (24,168) for hourly data), R series are
+            passed to the model as msts (use models like mstl based stlf(rdata), tbats(rdata)) and prophet gets one
+            seasonality per period (daily and faster fixed frequencies only), replacing its built in daily, weekly
+            or yearly seasonality when a period is one day, week or year long
+        chunk_size: number of series per task for dataframe calls, by default sized from the measured time per series
+            so each task takes a couple of seconds (see magi.chunking)
+        max_in_flight: most chunk tasks submitted at once for dataframe calls (defaults to twice the number of workers)
+        cache: ForecastCache, series whose values, dates and forecast settings match a cached entry are returned
+            from the cache without refitting (see magi.cache)
+        profiler: Profiler recording wall time of every phase of R forecasts, per series, and the number and size
+            of worker tasks (see magi.profiling), disabled by default
         
     Methods:
         prophet: wrapper for prophet_series and prophet_dataframe
@@ -41,10 +451,16 @@ class forecast(object):
         prophet_dataframe: function to forecast multiple time series using Prophet
         R: wrapper for R_series and R_dataframe
         R_series: function to forecast single time series in R
-        R_dataframe: function to forecast multiple time series in R
+        R_dataframe: function to forecast multiple time series in R (optionally in column batches per R call)
+        R_select: picks the best of several R models per series on a holdout and forecasts with the winner
+        R_select_series: model selection for a single series in one R call
+        baseline_series: naive, snaive, meanf, rwf and thetaf for single time series in numpy
+        baseline_dataframe: naive, snaive, meanf, rwf and thetaf for all series of a dataframe at once in numpy
+        cross_validate: rolling origin cross validation for R models or Prophet, returns errors by horizon
         tsclean: wrapper around tsclean_series and tsclean_dataframe
         tsclean_series: cleans single time series using tsclean
-        tsclean_dataframe: cleans dataframe of time series
+        tsclean_dataframe: cleans dataframe of time series (optionally in column batches per R call)
+        tsclean_numpy: cleans series or whole dataframe at once with numpy version of tsclean
    
     Examples:
     
@@ -66,16 +482,36 @@ class forecast(object):
     fc_obj = forecast(time_series=df['ts2'],forecast_periods=18,frequency=12)
     forecast_dic = fc_obj.R(model='snaive')
     
+    Forecasting baseline models for every series at once in numpy without R
+    
+    fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12)
+    forecast_df = fc_obj.R(model='rwf(rdata,drift=TRUE)',pred=True,backend='numpy')
+    
     Forecasting Using R and cleaning series before forecasting
     
     fc_obj = forecast(time_series=df['ts2'],forecast_periods=18,frequency=12)
     forecast_dic = fc_obj.tsclean().R(model='auto.arima(rdata,D=1,stationary=TRUE)')
     
+    fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12)
+    forecast_df = fc_obj.tsclean(backend='numpy').R(model='auto.arima(rdata,D=1,stationary=TRUE)',pred=True)
+    
     Forecasting Using R Multiple Series, return fitted values in df
     
     fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12)
     forecast_df = fc_obj.R(model='auto.arima(rdata,D=1,stationary=TRUE)',fit=True)
     
+    Forecasting Using R Multiple Series, keep every output of one fit (predictions, bounds, fitted values, residuals)
+    
+    fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12)
+    result = fc_obj.R(model='auto.arima(rdata,D=1,stationary=TRUE)')
+    predicted_df, residual_df = result.predicted, result.residuals
+    
+    Forecasting Using R Multiple Series on 8 R worker processes (embedded R is not thread safe, so without a
+    dask distributed client running R work goes to a pool of persistent worker processes)
+
+    fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12,n_workers=8)
+    forecast_df = fc_obj.R(model='auto.arima(rdata,D=1,stationary=TRUE)',pred=True)
+    
     Forecasting Using R Multiple Series, clean ts before forecast, all done in parallel, return fitted + predicted values in df
     
     from dask.distributed import Client, LocalCluster
@@ -84,6 +520,11 @@ class forecast(object):
     fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12)
     forecast_dic = fc_obj.tsclean().R(model='auto.arima(rdata,D=1,stationary=TRUE)',fit_pred=True)
 
+    Forecasting Using R Multiple Series, sending 500 series to R per call (much less bridge overhead for short series)
+
+    fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12)
+    forecast_df = fc_obj.tsclean(batch_size=500).R(model='ets(rdata)',pred=True,batch_size=500)
+
     ---------------------------------------------------------------------------------------------------------------------------
     Forecasting using Prophet
     
@@ -112,6 +553,63 @@ class forecast(object):
     client = Client(cluster)
     fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12)
     forecast_dic = fc_obj.tsclean().prophet(changepoint_prior_scale=.25,actual_pred=True)
+
+    Forecasting using Prophet warm started from parameters fitted on the previous run (saved to prophet_params.pkl)
+
+    from magi.store import ParamStore
+    fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12)
+    forecast_df = fc_obj.prophet(pred=True,param_store=ParamStore('prophet_params.pkl'))
+
+    Forecasting only series that changed since the last run, unchanged series are read back from an on disk cache
+
+    from magi.cache import ForecastCache
+    fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12,cache=ForecastCache('forecast_cache'))
+    forecast_df = fc_obj.R(model='auto.arima(rdata,D=1,stationary=TRUE)',pred=True)
+
+    Forecasting Using R reapplying models fitted on the previous run to the new observations (no re-estimation),
+    every series is fully re-estimated when refit=True, e.g. on the first run of each quarter
+
+    from magi.store import ParamStore
+    model_store = ParamStore('R_models.pkl')
+    fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12)
+    forecast_df = fc_obj.R(model='auto.arima(rdata)',pred=True,model_store=model_store)
+    forecast_df = fc_obj.R(model='auto.arima(rdata)',pred=True,model_store=model_store,refit=True)
+
+    ---------------------------------------------------------------------------------------------------------------------------
+    Picking the best model per series on the last 6 periods, each series is converted once and every candidate
+    is fitted in the same R call
+
+    fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12)
+    result, model_table = fc_obj.R_select(models=['auto.arima(rdata)','ets(rdata)','thetaf','snaive'],holdout=6)
+    model_table['model'].value_counts()
+
+    ---------------------------------------------------------------------------------------------------------------------------
+    Rolling origin cross validation
+    
+    Errors for 6 step ahead forecasts from origins after 24, 27, 30... observations of every series
+    
+    fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12)
+    errors_df = fc_obj.cross_validate(model='ets(rdata)',initial=24,horizon=6,step=3)
+    errors_df.abs().groupby(level=0).mean()
+    
+    errors_df = fc_obj.cross_validate(model='prophet',initial=24,horizon=6,step=3)
+
+    ---------------------------------------------------------------------------------------------------------------------------
+    Profiling where time goes in a run (trimming, conversion to and from R, R parse and fit, dates, concat)
+
+    from magi.profiling import Profiler
+    profiler = Profiler()
+    fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12,profiler=profiler)
+    forecast_df = fc_obj.R(model='auto.arima(rdata)',pred=True)
+    profiler.summary()
+    profiler.to_chrome_trace('forecast_trace.json')
+
+    ---------------------------------------------------------------------------------------------------------------------------
+    Checking the compiled R function cache (R source is parsed once per distinct model, horizon and level in each process,
+    counters only cover the process they are read in, not the R worker processes)
+
+    from magi.core import rfunc_cache_info
+    rfunc_cache_info()
     """
 
     
@@ -120,7 +618,16 @@ class forecast(object):
                  forecast_periods,
                  frequency,
                  confidence_level=None,
-                 regressors=False):
+                 regressors=None,
+                 n_workers=None,
+                 scheduler=None,
+                 cache=None,
+                 profiler=None,
+                 chunk_size=None,
+                 max_in_flight=None,
+                 max_history=None,
+                 aggregate_periods=None,
+                 seasonal_periods=None):
         
         """
         initializes default variables, okay to do like this b/c strings aren't mutable, 
@@ -128,16 +635,29 @@ class forecast(object):
         self.time_series = time_series
         self.forecast_periods = forecast_periods
         self.frequency = frequency
+        self.confidence_level = confidence_level
         if confidence_level is None:
             self.confidence_level = 80.0
+        self.n_workers = n_workers
+        self.scheduler = scheduler
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight
+        self.max_history = max_history
+        self.aggregate_periods = aggregate_periods
+        self.seasonal_periods = None if seasonal_periods is None else tuple(seasonal_periods)
+        self.cache = cache
+        self.profiler = NULL_PROFILER if profiler is None else profiler
+        if regressors is not None and not isinstance(regressors, pd.core.frame.DataFrame):
+            raise ValueError('regressors must be a dataframe of regressors indexed by date')
+        self.regressors = regressors
+        #digest of regressors identifying them in caches, computed on first use
+        self._regressors_key = None
             
-        self.freq_dict = {12:'MS',1:'Y',365:'D',4:'QS',8760:'HS'}
+        self.freq_dict = {12:'MS',1:'Y',365:'D',4:'QS',8760:'H',7:'D',24:'H'}
         
         try:
-            if regressors:
-                self.forecast_type = 0
-            #set forecast type to 0 for x regressor series,1 for single series and 2 for dataframe of series
-            elif isinstance(self.time_series, pd.core.series.Series):
+            #set forecast type to 1 for single series and 2 for dataframe of series
+            if isinstance(self.time_series, pd.core.series.Series):
                 self.forecast_type = 1  
             elif isinstance(self.time_series, pd.core.frame.DataFrame):
                 self.forecast_type = 2
@@ -149,13 +669,148 @@ class forecast(object):
         #turn off prophet warnings
         logging.getLogger('fbprophet').setLevel(logging.WARNING)
         
+    def _config(self, regressors=False):
+        """returns the small dict of settings needed to rebuild this forecast object on a worker (see _task_forecast)
+
+        Args:
+            regressors: if True, includes the regressors dataframe and its key (only for tasks that fit with them,
+                so tsclean and other tasks don't ship the matrix)
+
+        Returns:
+            config: dict of forecast keyword arguments and the profile flag
+        """
+        config = {'forecast_periods':self.forecast_periods,
+                  'frequency':self.frequency,
+                  'confidence_level':self.confidence_level,
+                  'max_history':self.max_history,
+                  'aggregate_periods':self.aggregate_periods,
+                  'seasonal_periods':self.seasonal_periods,
+                  'profile':self.profiler.enabled}
+        if regressors and self.regressors is not None:
+            config['regressors'] = self.regressors
+            config['regressors_key'] = self.regressors_key()
+        return config
+
+    def regressors_key(self):
+        """returns digest of regressors (None without regressors), hashed once per object"""
+        if self.regressors is not None and self._regressors_key is None:
+            self._regressors_key = _regressor_key(self.regressors)
+        return self._regressors_key
+
+    def _use_pool(self):
+        """checks whether R work should run on the R worker pool rather than through dask"""
+        if self.scheduler == 'pool':
+            return True
+        if self.scheduler == 'dask':
+            return False
+        return _distributed_client() is None
+
+    def _map_series(self, kind, func, args_iter, nitems, shared=None, scheduler=None):
+        """runs module level task func for every args tuple in chunks on the R worker pool or dask
+        (see magi.chunking.map_chunked) and returns results in order
+        -tasks only carry their own series and the small shared settings, never this object or its dataframe
+
+        Args:
+            kind: task name recorded by the profiler
+            func: module level task function
+            args_iter: iterable of argument tuples, one per series
+            nitems: number of series
+            shared: dict of keyword arguments of func that are the same for every series, sent to workers once
+            scheduler: 'pool' or 'dask', defaults to the R scheduler picked by _use_pool
+
+        Returns:
+            results: list of task results
+        """
+        if scheduler is None:
+            scheduler = 'pool' if self._use_pool() else 'dask'
+        if self.profiler.enabled:
+            args_iter = self._recorded_args(kind,args_iter)
+            if shared:
+                self.profiler.task(kind + '_shared',shared)
+        with self.profiler.phase('dispatch'):
+            return map_chunked(func,
+                               args_iter,
+                               nitems,
+                               scheduler=scheduler,
+                               n_workers=self.n_workers,
+                               chunk_size=self.chunk_size,
+                               max_in_flight=self.max_in_flight,
+                               shared=shared)
+
+    def _recorded_args(self, kind, args_iter):
+        """yields args while recording each as a task of kind in the profiler"""
+        for args in args_iter:
+            self.profiler.task(kind,args)
+            yield args
+
+    def _cache_key(self, time_series, spec):
+        """returns cache key of series for forecast spec, horizon, frequency and confidence level"""
+        spec = tuple(spec) + (self.forecast_periods,self.frequency,float(self.confidence_level))
+        if self.regressors is not None:
+            spec += (('regressors',self.regressors_key()),)
+        for name in ('max_history','aggregate_periods','seasonal_periods'):
+            if getattr(self,name) is not None:
+                spec += ((name,getattr(self,name)),)
+        return self.cache.key(time_series,spec)
+
+    def _cached_series(self, spec, fit_series):
+        """returns forecast dict of the single series from the cache, or fits it with fit_series and caches it"""
+        if self.cache is None:
+            return fit_series()
+        key = self._cache_key(self.time_series,spec)
+        entry = self.cache.get(key,required=CACHED_OUTPUTS + ('model',))
+        if entry is not None:
+            return dict(entry,**cached_outputs(entry,self.time_series,('x','full_fit','full_actuals')))
+        forecast_dict = fit_series()
+        self.cache.put(key,forecast_dict)
+        return forecast_dict
+
+    def _cached_outputs(self, spec, outputs, time_series, fit_outputs):
+        """returns outputs of every column, reading unchanged series from the cache and fitting only the rest
+        -lookups and writes happen in the calling process, workers never touch the cache
+
+        Args:
+            spec: tuple identifying method and model settings, part of the cache key
+            outputs: tuple of output keys to return for every series
+            time_series: input dataframe
+            fit_outputs: function of (outputs, dataframe) fitting the columns of dataframe and returning
+                dict of column name to dict of outputs
+
+        Returns:
+            forecasted: dict of column name to dict of the requested outputs
+        """
+        if self.cache is None:
+            return fit_outputs(outputs,time_series)
+
+        with self.profiler.phase('cache_lookup'):
+            keys = {i:self._cache_key(time_series[i],spec) for i in time_series}
+            forecasted = {}
+            for i in time_series:
+                entry = self.cache.get(keys[i])
+                if entry is not None:
+                    forecasted[i] = cached_outputs(entry,time_series[i],outputs)
+
+        misses = [i for i in time_series if i not in forecasted]
+        if misses:
+            fit_keys = tuple(dict.fromkeys(CACHED_OUTPUTS + tuple(outputs)))
+            fitted = fit_outputs(fit_keys,time_series[misses])
+            for i in misses:
+                self.cache.put(keys[i],{key:fitted[i][key] for key in CACHED_OUTPUTS})
+                forecasted[i] = {key:fitted[i][key] for key in outputs}
+        return {i:forecasted[i] for i in time_series}
+
     def prophet(self,
                 changepoint_prior_scale=.35,
                 fit_pred=False,
                 actual_pred=False,
                 pred=False,
                 fit=False,
-                residuals=False):
+                residuals=False,
+                param_store=None,
+                predict_history=True,
+                uncertainty_samples=1000,
+                interval_width=0.8,
+                interval_method='sampled'):
         
         """wraps prophet-series and prophet_dataframe methods to forecast
         forecasting for single series returns a dictionary
@@ -169,32 +824,62 @@ class forecast(object):
             pred: returns dataframe of predicted values only
             fit: returns dataframe of fitted values only
             residuals: returns dataframe of residual values only
+            param_store: ParamStore of fitted parameters keyed by series name, stored parameters are used as initial
+                values for the fit and refitted parameters are written back (and saved if the store has a path)
+            predict_history, uncertainty_samples, interval_width, interval_method: see prophet_series
 
         Returns:
              series: if series passed in, returns dict of parameters of forecast object
-             dataframe: if dataframe passed in, dataframe of predictions and optionally fitted values is returned
+             dataframe: if dataframe passed in, dataframe of predictions and optionally fitted values is returned,
+                 or ForecastResult holding every output of the fit if none of the output flags is set
 
         """
+        options = {'predict_history':predict_history,
+                   'uncertainty_samples':uncertainty_samples,
+                   'interval_width':interval_width,
+                   'interval_method':interval_method}
         #this does single series forecast and returns dictionary
         if self.forecast_type == 1:
-            return self.prophet_series()
+            init_params = None
+            if param_store is not None:
+                init_params = param_store.get(self.time_series.name)
+            forecast_dict = self._cached_series(_prophet_spec(changepoint_prior_scale,options),
+                                                lambda: self.prophet_series(changepoint_prior_scale=changepoint_prior_scale,
+                                                                            init_params=init_params,
+                                                                            **options))
+            if param_store is not None:
+                param_store.update({self.time_series.name:forecast_dict['params']})
+                if param_store.path is not None:
+                    param_store.save()
+            return forecast_dict
 
         if self.forecast_type == 2:
-            return self.prophet_dataframe(fit_pred=fit_pred,
+            return self.prophet_dataframe(changepoint_prior_scale=changepoint_prior_scale,
+                                    fit_pred=fit_pred,
                                     actual_pred=actual_pred,
                                     pred=pred,
                                     fit=fit,
-                                    residuals=residuals
+                                    residuals=residuals,
+                                    param_store=param_store,
+                                    **options
                                    )
         
     def prophet_series(self,
                        time_series=None,
                        forecast_periods=None,
                        changepoint_prior_scale=.35,
-                       freq=None):
+                       freq=None,
+                       init_params=None,
+                       predict_history=True,
+                       uncertainty_samples=1000,
+                       interval_width=0.8,
+                       interval_method='sampled'):
     
         """forecasts a time series object using Prophet package (https://facebook.github.io/prophet/)
         Note: This function assumes you have already cleaned time series of nulls and have the time series indexed correctly
+        -predict in Prophet draws uncertainty_samples trend and noise simulations for every predicted row, which can
+         cost as much as the fit, so production runs that only need the forecast can skip in sample prediction
+         (predict_history=False) and sampling (uncertainty_samples=0 or interval_method='analytic')
 
 
             Args:
@@ -202,6 +887,15 @@ class forecast(object):
                 forecast_periods: periods to forecast for
                 changepoint_prior_scale: flexibility in model to change trendpoint, lower values make it more flexible
                 freq: frequency of time series (MS is month start)
+                init_params: fitted parameters from a previous run of this series used as initial values for the fit
+                    (falls back to a cold fit if they don't match the new model, e.g. different number of changepoints)
+                predict_history: if False only the forecast periods are predicted, fitted and residuals are then empty
+                    and full_fit holds the predicted values only
+                uncertainty_samples: number of simulations Prophet draws for its intervals, 0 skips them
+                interval_width: width of the prediction intervals (0.8 is an 80% interval)
+                interval_method: 'sampled' uses Prophet's simulated intervals, 'analytic' computes them in one
+                    vectorized step as yhat +/- z*sigma_obs from the fitted observation noise (no simulation, ignores
+                    trend uncertainty), None returns null lower and upper
             Returns:
                  model: prophet model object
                  method: prophet
@@ -215,6 +909,7 @@ class forecast(object):
                  full_fit: fitted + predicted values as one time series
                  full_actual: actual + predicted values as one time series
                  forecast_df: dataframe returned for prophet forecast
+                 params: fitted parameters that can be passed back in as init_params on the next run
 
         """
         if time_series is None:
@@ -230,29 +925,99 @@ class forecast(object):
         end_ts = time_series[time_series.notna()].index[-1]
         #extract actual time series
         time_series = time_series.loc[start_ts:end_ts]
+        if self.max_history is not None:
+            time_series = time_series.iloc[-self.max_history:]
 
         model_ts = time_series.reset_index()
         model_ts.columns = ['ds', 'y']
+        regressors = self.regressors
+        if regressors is not None:
+            #regressor values of each date are looked up from the shared regressors by date
+            model_ts = _with_regressors(model_ts,regressors)
 
-        model = Prophet(changepoint_prior_scale=changepoint_prior_scale)
-        model.fit(model_ts)
+        if interval_method not in PROPHET_INTERVAL_METHODS:
+            raise ValueError('interval_method must be one of sampled, analytic or None')
+        #intervals that aren't sampled don't need any simulations
+        if interval_method != 'sampled':
+            uncertainty_samples = 0
 
-        future = model.make_future_dataframe(periods=forecast_periods, freq=freq)
+        Prophet = get_prophet()
+        prophet_kwargs = {'changepoint_prior_scale':changepoint_prior_scale,
+                          'uncertainty_samples':uncertainty_samples,
+                          'interval_width':interval_width}
+        seasonalities = []
+        if self.seasonal_periods is not None:
+            #prophet seasonality periods are in days, so periods are converted with the length of one time step
+            step = pd.tseries.frequencies.to_offset(freq)
+            if isinstance(step, pd.tseries.offsets.Day):
+                #pandas 3 makes days calendar offsets instead of fixed length ticks
+                step_days = float(step.n)
+            elif isinstance(step, pd.tseries.offsets.Tick):
+                step_days = pd.Timedelta(step)/pd.Timedelta(days=1)
+            else:
+                raise ValueError('seasonal_periods with prophet need a fixed frequency such as D or H, not %s' % freq)
+            #fourier order of each seasonality is capped at 10 terms (prophet's yearly default)
+            seasonalities = [('seasonal_%s' % p,p*step_days,min(10,max(1,int(p)//2))) for p in self.seasonal_periods]
+            #a period matching one of prophet's built in seasonalities replaces it instead of being fitted twice
+            for builtin, days in PROPHET_BUILTIN_SEASONALITIES:
+                if any(np.isclose(period,days,rtol=0.01) for _, period, _ in seasonalities):
+                    prophet_kwargs[builtin] = False
+
+        def new_model():
+            model = Prophet(**prophet_kwargs)
+            if regressors is not None:
+                for i in regressors.columns:
+                    model.add_regressor(i)
+            for seasonality_name, period, fourier_order in seasonalities:
+                model.add_seasonality(name=seasonality_name,period=period,fourier_order=fourier_order)
+            return model
+
+        model = new_model()
+        if init_params is None:
+            model.fit(model_ts)
+        else:
+            try:
+                #warm start stan optimization from previous MAP parameters
+                model.fit(model_ts,init=init_params)
+            except Exception:
+                model = new_model()
+                model.fit(model_ts)
+
+        future = model.make_future_dataframe(periods=forecast_periods, freq=freq, include_history=predict_history)
+        if regressors is not None:
+            future = _with_regressors(future,regressors)
         forecast_df_og = model.predict(future)
         forecast_df = forecast_df_og.set_index('ds')
+        yhat = forecast_df['yhat']
+        predicted = yhat[-forecast_periods:]
+        fitted = yhat[:-forecast_periods]
+
+        if interval_method == 'analytic':
+            #observation noise is estimated on the scaled series, sigma_obs*y_scale is its sd in original units
+            z = NormalDist().inv_cdf(0.5 + interval_width/2.0)
+            half_width = z*float(np.ravel(model.params['sigma_obs'])[0])*model.y_scale
+            lower = predicted.values - half_width
+            upper = predicted.values + half_width
+        elif 'yhat_lower' in forecast_df and uncertainty_samples:
+            lower = forecast_df['yhat_lower'][-forecast_periods:].values
+            upper = forecast_df['yhat_upper'][-forecast_periods:].values
+        else:
+            lower = np.full(forecast_periods,np.nan)
+            upper = np.full(forecast_periods,np.nan)
 
         return {'model':model,
                 'method':'prophet',
-                'predicted':forecast_df['yhat'][-forecast_periods:],
-                'lower':forecast_df['yhat_lower'][-forecast_periods:].values,
-                'upper':forecast_df['yhat_upper'][-forecast_periods:].values,
-                'level':80.0,
+                'predicted':predicted,
+                'lower':lower,
+                'upper':upper,
+                'level':interval_width*100,
                 'x':time_series,
-                'residuals':time_series-forecast_df['yhat'][:-forecast_periods],
-                'fitted':forecast_df['yhat'][:-forecast_periods],
-                'full_fit':forecast_df['yhat'],
-                'full_actuals':time_series.append(forecast_df['yhat'][-forecast_periods:]),
-                'forecast_df':forecast_df_og
+                'residuals':time_series-fitted if predict_history else fitted,
+                'fitted':fitted,
+                'full_fit':yhat,
+                'full_actuals':pd.concat([time_series,predicted]),
+                'forecast_df':forecast_df_og,
+                'params':_prophet_init_params(model)
                }
     
     def prophet_dataframe(self,
@@ -261,7 +1026,13 @@ class forecast(object):
                     actual_pred=False,
                     pred=False,
                     fit=False,
-                    residuals=False):
+                    residuals=False,
+                    changepoint_prior_scale=.35,
+                    param_store=None,
+                    predict_history=True,
+                    uncertainty_samples=1000,
+                    interval_width=0.8,
+                    interval_method='sampled'):
     
         
         """forecasts a dataframe of time series using Prophet
@@ -269,38 +1040,83 @@ class forecast(object):
 
         Args:
             time_series: input dataframe
-            ----- only one of below boolean values can be set to true -----
+            ----- only one of below boolean values can be set to true, if none is a ForecastResult is returned -----
             fit_pred: returns dataframe of fitted and predicted values
             actual_pred: returns dataframe of actual and predicted values
             pred: returns dataframe of predicted values only
             fit: returns dataframe of fitted values only
             residuals: returns dataframe of residual values only
+            changepoint_prior_scale: flexibility in model to change trendpoint, lower values make it more flexible
+            param_store: ParamStore of fitted parameters keyed by column name used to warm start each fit,
+                refitted parameters are written back to it (and saved if the store has a path)
+            predict_history, uncertainty_samples, interval_width, interval_method: see prophet_series
 
         """
         if time_series is None:
             time_series = self.time_series
-            
-        output_series = []
-        for i in time_series:
-            forecasted_dict = dask.delayed(self.prophet_series)(time_series[i])
-            #returns correct series object from R_series method based on input param
-            if fit_pred:
-                forecasted_series = forecasted_dict['full_fit']
-            if actual_pred:
-                forecasted_series = forecasted_dict['full_actuals']
-            if pred:
-                forecasted_series = forecasted_dict['predicted']
-            if fit:
-                forecasted_series = forecasted_dict['fitted']
-            if residuals:
-                forecasted_series = forecasted_dict['residuals']
-                
-            output_series.append(forecasted_series)
-            
-        total = dask.delayed(output_series).compute()
+        options = {'predict_history':predict_history,
+                   'uncertainty_samples':uncertainty_samples,
+                   'interval_width':interval_width,
+                   'interval_method':interval_method}
+
+        #returns correct series object from prophet_series method based on input param, or every output if none set
+        output = _output_key(fit_pred,actual_pred,pred,fit,residuals)
+        if output is None:
+            forecasted = self._prophet_outputs(RESULT_KEYS,time_series,changepoint_prior_scale,param_store,options)
+            return ForecastResult.from_dicts(time_series,forecasted,interval_width*100,self.freq_dict[self.frequency])
+        forecasted = self._prophet_outputs((output,),time_series,changepoint_prior_scale,param_store,options)
+        total = [forecasted[i][output] for i in time_series]
         forecast_df = pd.concat(total,ignore_index=False,keys=time_series.columns,axis=1)
         
         return forecast_df
+
+    def _prophet_outputs(self,
+                         outputs,
+                         time_series=None,
+                         changepoint_prior_scale=.35,
+                         param_store=None,
+                         options=None):
+
+        """forecasts every column with Prophet in parallel and returns several outputs of each fit
+
+        Args:
+            outputs: tuple of prophet_series dict keys to return for every series
+            time_series: input dataframe
+            changepoint_prior_scale: flexibility in model to change trendpoint, lower values make it more flexible
+            param_store: ParamStore used to warm start each fit, refitted parameters are written back to it
+            options: dict of prophet_series prediction options (predict_history, uncertainty_samples,
+                interval_width, interval_method), prophet_series defaults if None
+
+        Returns:
+            forecasted: dict of column name to dict of the requested outputs
+        """
+        if time_series is None:
+            time_series = self.time_series
+        if options is None:
+            options = {}
+
+        return self._cached_outputs(_prophet_spec(changepoint_prior_scale,options),outputs,time_series,
+                                    lambda keys, ts: self._prophet_fit_outputs(keys,ts,changepoint_prior_scale,param_store,options))
+
+    def _prophet_fit_outputs(self, outputs, time_series, changepoint_prior_scale, param_store, options=None):
+        """fits every column with Prophet in parallel, see _prophet_outputs"""
+        get_params = (lambda i: None) if param_store is None else param_store.get
+        args_iter = ((column,get_params(column.name)) for column in _trimmed_columns(time_series))
+        shared = {'config':self._config(regressors=True),'changepoint_prior_scale':changepoint_prior_scale,'outputs':outputs,
+                  'options':options}
+        #prophet always runs through dask, the R worker pool starts embedded R in every worker
+        results = self._map_series('prophet_series',_prophet_series_task,args_iter,len(time_series.columns),
+                                   shared=shared,scheduler='dask')
+        forecasted = dict(zip(time_series.columns,results))
+        fitted_params = {i:forecasted[i].pop('params') for i in forecasted}
+
+        #write refitted parameters back in the calling process so store is updated on any scheduler
+        if param_store is not None:
+            param_store.update(fitted_params)
+            if param_store.path is not None:
+                param_store.save()
+
+        return forecasted
     
     def R(self,
           model,
@@ -308,7 +1124,11 @@ class forecast(object):
           actual_pred=False,
           pred=False,
           fit=False,
-          residuals=False):
+          residuals=False,
+          batch_size=None,
+          backend='R',
+          model_store=None,
+          refit=False):
         """wraps R_series and R_dataframe methods to forecast
         forecasting for single series returns a dictionary
         forecasting for dataframe returns back dataframe of predictions
@@ -322,15 +1142,43 @@ class forecast(object):
             pred: returns dataframe of predicted values only
             fit: returns dataframe of fitted values only
             residuals: returns dataframe of residual values only
+            batch_size: if set, ships blocks of batch_size columns to R as one matrix and forecasts them with lapply in R
+            backend: 'R' to run model in R, 'numpy' to compute naive, snaive, meanf, rwf (with or without drift)
+                and thetaf for all series at once in numpy without R (see magi.baseline)
+            model_store: ParamStore of serialized fitted R models keyed by series name, turns on update mode where
+                stored ets, Arima, bats, tbats and nnetar models are reapplied to the series without re-estimating
+                them (series without a stored model are fitted in full), fitted models are written back to the store
+            refit: if True, re-estimates every model from scratch even when model_store has one (update mode only)
 
         Returns:
              series: if series passed in, returns dict of parameters of forecast object
-             dataframe: if dataframe passed in, dataframe of predictions and optionally fitted values is returned
+             dataframe: if dataframe passed in, dataframe of predictions and optionally fitted values is returned,
+                 or ForecastResult holding every output of the fit if none of the output flags is set
         
         """
+        if backend == 'numpy':
+            if self.forecast_type == 1:
+                return self.baseline_series(model=model)
+            if self.forecast_type == 2:
+                return self.baseline_dataframe(model=model,
+                                               fit_pred=fit_pred,
+                                               actual_pred=actual_pred,
+                                               pred=pred,
+                                               fit=fit,
+                                               residuals=residuals)
+
         #this does single series forecast and returns dictionary
         if self.forecast_type == 1:
-            return self.R_series(model=model)
+            if model_store is None:
+                return self._cached_series(('R',model),lambda: self.R_series(model=model))
+            old_model = None if refit else model_store.get(self.time_series.name)
+            forecast_dict = self._cached_series(_R_update_spec(model,refit),
+                                                lambda: self.R_series(model=model,update=True,old_model=old_model))
+            if 'state' in forecast_dict:
+                model_store.update({self.time_series.name:forecast_dict['state']})
+                if model_store.path is not None:
+                    model_store.save()
+            return forecast_dict
         
         if self.forecast_type == 2:
             return self.R_dataframe(model=model,
@@ -338,7 +1186,10 @@ class forecast(object):
                                     actual_pred=actual_pred,
                                     pred=pred,
                                     fit=fit,
-                                    residuals=residuals
+                                    residuals=residuals,
+                                    batch_size=batch_size,
+                                    model_store=model_store,
+                                    refit=refit
                                    )
 
     def R_series(self,
@@ -346,7 +1197,9 @@ class forecast(object):
                  time_series=None,
                  forecast_periods=None,
                  freq=None,
-                 confidence_level=None):
+                 confidence_level=None,
+                 update=False,
+                 old_model=None):
     
         
         """forecasts a time series object using R models in forecast package 
@@ -361,6 +1214,8 @@ class forecast(object):
             forecast_periods: periods to forecast for
             confidence_level: confidence level for prediction intervals
             freq: frequency of time series (12 is monthly)
+            update: if True, reapplies old_model to the series instead of re-estimating it (see R)
+            old_model: serialized fitted R model from a previous run (update mode only, None fits model in full)
 
         Returns following parameters as a dict:
              model: A dictionary containing information about the fitted model
@@ -374,6 +1229,8 @@ class forecast(object):
              fitted: Fitted values (one-step forecasts)
              full_fit: fitted + predicted values as one time series
              full_actual: actual + predicted values as one time series
+             state: serialized fitted R model to pass back in as old_model (update mode only)
+             refit: whether the model was re-estimated rather than reapplied (update mode only)
 
         """
         if time_series is None:
@@ -388,81 +1245,106 @@ class forecast(object):
         #set frequency string to monthly start if frequency is 12
         freq_string = self.freq_dict[freq]
 
-        #find the start of the time series
-        start_ts = time_series[time_series.notna()].index[0]
-        #find the end of the time series
-        end_ts = time_series[time_series.notna()].index[-1]
-        #extract actual time series
-        time_series = time_series.loc[start_ts:end_ts]
-        #converts to ts object in R
-        time_series_R = robjects.IntVector(time_series)
-        rdata=ts(time_series_R,frequency=freq)
-
-
-        #if forecast model ends in f, assume its a direct forecasting object so handle it differently, no need to fit
-        if model.split('(')[0][-1] == 'f':
-            rstring="""
-             function(rdata){
-             library(forecast)
-             fc<-%s(rdata,h=%s,level=c(%s))
-             return(list(model=fc$model, method=fc$method,mean=fc$mean,lower=fc$lower,upper=fc$upper,level=fc$level,x=fc$x,residuals=fc$residuals,fitted=fc$fitted))
-             }
-            """ % (model,forecast_periods,confidence_level)
-
-        elif model == 'naive' or model == 'snaive':
-            rstring="""
-             function(rdata){
-             library(forecast)
-             fc<-%s(rdata,h=%s,level=c(%s))
-             return(list(model=fc$model, method=fc$method,mean=fc$mean,lower=fc$lower,upper=fc$upper,level=fc$level,x=fc$x,residuals=fc$residuals,fitted=fc$fitted))
-             }
-            """ % (model,forecast_periods,confidence_level)
+        profiler = self.profiler
+        name = time_series.name
+        with profiler.phase('trim',name):
+            #extract actual time series between first and last non null value, or its last max_history values
+            start, end = bounds(time_series.values)
+            if self.max_history is not None:
+                start = max(start,end - self.max_history + 1)
+            time_series = time_series.iloc[start:end + 1]
 
+        #model is fitted on block sums with temporal aggregation, forecasting enough blocks to cover the horizon
+        periods = self.aggregate_periods
+        aggregated = periods is not None and periods > 1
+        seasonal_periods = self.seasonal_periods
+        fit_values = time_series.values
+        fit_forecast_periods = forecast_periods
+        fit_freq = freq
+        if aggregated:
+            if self.regressors is not None:
+                raise ValueError('aggregate_periods does not support regressors')
+            #oldest periods are dropped so history splits into whole blocks ending on the last observation
+            time_series = time_series.iloc[len(time_series) % periods:]
+            fit_values, profile = _aggregate_blocks(time_series.values.astype(float),periods)
+            fit_forecast_periods = -(-forecast_periods//periods)
+            fit_freq = freq/float(periods)
+            if seasonal_periods is not None:
+                seasonal_periods = tuple(p/float(periods) for p in seasonal_periods if p > periods)
+        with profiler.phase('to_R',name):
+            #converts to float ts (or msts for several seasonal periods) object in R
+            if seasonal_periods:
+                rdata = to_R_msts(fit_values,seasonal_periods)
+            else:
+                rdata = to_R_ts(fit_values,fit_freq)
 
+        if self.regressors is not None:
+            if update:
+                raise ValueError('model_store (update mode) does not support regressors')
+            if model.split('(')[0][-1] == 'f' or model == 'naive' or model == 'snaive':
+                raise ValueError('%s is a direct forecasting function that does not take regressors' % model)
+            xreg_start, xreg_end = _regressor_rows(self.regressors,time_series.index,forecast_periods)
+            with profiler.phase('R_parse',name):
+                rfunc = _R_xreg_rfunc(model,fit_forecast_periods,confidence_level)
+                R_xreg = _R_regressors(self.regressors,self.regressors_key())
+            with profiler.phase('R_fit',name):
+                model,method,mean,lower,upper,level,x,residuals,fitted=rfunc(rdata,R_xreg,xreg_start + 1,xreg_end + 1)
+        elif update:
+            with profiler.phase('R_parse',name):
+                rfunc = _R_update_rfunc(model,fit_forecast_periods,confidence_level)
+            with profiler.phase('R_fit',name):
+                robjects = get_R()
+                R_old_model = robjects.NULL if old_model is None else robjects.vectors.ByteVector(old_model)
+                model,method,mean,lower,upper,level,x,residuals,fitted,state,refit=rfunc(rdata,R_old_model)
+            #empty raw vector when there is no fitted model to keep (direct forecasting functions)
+            state = _raw_to_bytes(state) or None
+            refit = bool(refit[0])
         else:
-            rstring="""
-             function(rdata){
-             library(forecast)
-             fitted_model<-%s
-             fc<-forecast(fitted_model,h=%s,level=c(%s))
-             return(list(model=fc$model, method=fc$method,mean=fc$mean,lower=fc$lower,upper=fc$upper,level=fc$level,x=fc$x,residuals=fc$residuals,fitted=fc$fitted))
-             }
-            """ % (model,forecast_periods,confidence_level)
-
-        rfunc=robjects.r(rstring)
-        #gets fitted and predicted series, and lower and upper prediction intervals from R model
-        model,method,mean,lower,upper,level,x,residuals,fitted=rfunc(rdata)
-        model = dict(zip(model.names, map(list,list(model))))
-        method=pandas2ri.ri2py(method)
-        mean=pandas2ri.ri2py(mean)
-        lower=pandas2ri.ri2py(lower).ravel()
-        upper=pandas2ri.ri2py(upper).ravel()
-        level=pandas2ri.ri2py(level)
-        x=pandas2ri.ri2py(x)
-        residuals=pandas2ri.ri2py(residuals)
-        fitted=pandas2ri.ri2py(fitted)
-
-        #converting predicted numpy array to series, get index for series
-        index=pd.date_range(start=time_series.index.max(),periods=len(mean)+1,freq=freq_string)[1:]
+            with profiler.phase('R_parse',name):
+                rfunc = _R_forecast_rfunc(model,fit_forecast_periods,confidence_level)
+            with profiler.phase('R_fit',name):
+                #gets fitted and predicted series, and lower and upper prediction intervals from R model
+                model,method,mean,lower,upper,level,x,residuals,fitted=rfunc(rdata)
+        with profiler.phase('from_R',name):
+            model = dict(zip(model.names, map(list,list(model))))
+            method = str(method[0])
+            #numpy copies of the R vectors (ravel also flattens splinef means that come back as a 1 column matrix)
+            mean = R_to_numpy(mean)
+            lower = R_to_numpy(lower)
+            upper = R_to_numpy(upper)
+            level = R_to_numpy(level)
+            residuals = R_to_numpy(residuals)
+            fitted = R_to_numpy(fitted)
+            if aggregated:
+                #spread block forecasts and fits back over the original periods and cut the horizon back down
+                mean = _disaggregate(mean,profile)[:forecast_periods]
+                lower = _disaggregate(lower,profile)[:forecast_periods]
+                upper = _disaggregate(upper,profile)[:forecast_periods]
+                fitted = _disaggregate(fitted,profile)
+                residuals = time_series.values - fitted
 
-        try:
+        with profiler.phase('date_range',name):
+            #converting predicted numpy array to series, get index for series
+            index=pd.date_range(start=time_series.index[-1],periods=len(mean)+1,freq=freq_string)[1:]
             predicted_series = pd.Series(mean,index=index)
-        except:
-            #need for splinef because returns array with 2 brackets
-            predicted_series = pd.Series(mean.ravel(),index=index)
 
-        #Convert fitted array to series
-        fitted_series = pd.Series(fitted,index=pd.date_range(start=time_series[time_series.notnull()].index.min(),periods=len(time_series[time_series.notnull()]),freq=freq_string))
-        residual_series = pd.Series(residuals,index=pd.date_range(start=time_series[time_series.notnull()].index.min(),periods=len(time_series[time_series.notnull()]),freq=freq_string))
-        #Create full series
-        full_fit = fitted_series.append(predicted_series)
-        full_actuals = time_series.append(predicted_series)
+            #fitted values and residuals line up with the trimmed input rows
+            fitted_series = pd.Series(fitted,index=time_series.index)
+            residual_series = pd.Series(residuals,index=time_series.index)
+        with profiler.phase('append',name):
+            #Create full series
+            full_fit = pd.concat([fitted_series,predicted_series])
+            full_actuals = pd.concat([time_series,predicted_series])
 
         #make sure level returned as single int instead of array
         level = int(level[0])
 
-        return {'model':model, 'method':method ,'predicted':predicted_series,'lower':lower,'upper':upper,'level':level,
+        forecast_dict = {'model':model, 'method':method ,'predicted':predicted_series,'lower':lower,'upper':upper,'level':level,
                 'x':time_series,'residuals':residual_series,'fitted':fitted_series,'full_fit':full_fit,'full_actuals':full_actuals}
+        if update:
+            forecast_dict['state'] = state
+            forecast_dict['refit'] = refit
+        return forecast_dict
     
     def R_dataframe(self,
                     model,
@@ -471,7 +1353,10 @@ class forecast(object):
                     pred=False,
                     fit=False,
                     residuals=False,
-                    time_series=None):
+                    time_series=None,
+                    batch_size=None,
+                    model_store=None,
+                    refit=False):
     
         
         """forecasts a dataframe of time series using model specified
@@ -481,45 +1366,493 @@ class forecast(object):
         Args:
             model: pass in R forecast model as string that you want to evaluate, make sure you leave rdata as rdata in all calls
             time_series: input dataframe
-            ----- only one of below boolean values can be set to true -----
+            ----- only one of below boolean values can be set to true, if none is a ForecastResult is returned -----
             fit_pred: returns dataframe of fitted and predicted values
             actual_pred: returns dataframe of actual and predicted values
             pred: returns dataframe of predicted values only
             fit: returns dataframe of fitted values only
             residuals: returns dataframe of residual values only
+            batch_size: if set, forecasts blocks of batch_size columns in one R call each instead of one call per column,
+                which avoids the per series rpy2 conversion overhead on short series
+            model_store: ParamStore of serialized fitted R models keyed by column name, turns on update mode (see R)
+            refit: if True, re-estimates every model from scratch even when model_store has one
 
         """
         if time_series is None:
             time_series = self.time_series
-            
-        output_series = []
-        for i in time_series:
-            forecasted_dict = dask.delayed(self.R_series)(model,time_series[i])
-            #returns correct series object from R_series method based on input param
-            if fit_pred:
-                forecasted_series = forecasted_dict['full_fit']
-            if actual_pred:
-                forecasted_series = forecasted_dict['full_actuals']
-            if pred:
-                forecasted_series = forecasted_dict['predicted']
-            if fit:
-                forecasted_series = forecasted_dict['fitted']
-            if residuals:
-                forecasted_series = forecasted_dict['residuals']
-                
-            output_series.append(forecasted_series)
-            
-        total = dask.delayed(output_series).compute()
-        forecast_df = pd.concat(total,ignore_index=False,keys=time_series.columns,axis=1)
+
+        #returns correct series object from R_series method based on input param, or every output if none set
+        output = _output_key(fit_pred,actual_pred,pred,fit,residuals)
+        if self.regressors is not None and batch_size is not None:
+            raise ValueError('regressors forecast one series per R call, batch_size must be None')
+        if batch_size is not None and (self.aggregate_periods is not None or self.seasonal_periods is not None):
+            raise ValueError('aggregate_periods and seasonal_periods forecast one series per R call, batch_size must be None')
+        if model_store is not None:
+            if batch_size is not None:
+                raise ValueError('model_store (update mode) forecasts one series per R call, batch_size must be None')
+            keys = RESULT_KEYS if output is None else (output,)
+            forecasted = self._R_outputs(model,keys,time_series,model_store=model_store,refit=refit)
+            if output is None:
+                return ForecastResult.from_dicts(time_series,forecasted,int(self.confidence_level),self.freq_dict[self.frequency])
+            return pd.concat([forecasted[i][output] for i in time_series],ignore_index=False,keys=time_series.columns,axis=1)
+
+        if batch_size is not None:
+            result = self._R_batch_result(model,time_series,batch_size)
+            if output is None:
+                return result
+            return result.frame(output)
+
+        if output is None:
+            forecasted = self._R_outputs(model,RESULT_KEYS,time_series)
+            with self.profiler.phase('result'):
+                return ForecastResult.from_dicts(time_series,forecasted,int(self.confidence_level),self.freq_dict[self.frequency])
+        forecasted = self._R_outputs(model,(output,),time_series)
+        with self.profiler.phase('concat'):
+            total = [forecasted[i][output] for i in time_series]
+            forecast_df = pd.concat(total,ignore_index=False,keys=time_series.columns,axis=1)
         
         return forecast_df
+
+    def _R_outputs(self,
+                   model,
+                   outputs,
+                   time_series=None,
+                   model_store=None,
+                   refit=False):
+
+        """forecasts every column in R on the R worker pool (or dask) and returns several outputs of each fit,
+        only the requested outputs are sent back from the workers
+
+        Args:
+            model: pass in R forecast model as string that you want to evaluate, make sure you leave rdata as rdata in all calls
+            outputs: tuple of R_series dict keys to return for every series
+            time_series: input dataframe
+            model_store: ParamStore of serialized fitted R models, turns on update mode (see R)
+            refit: if True, re-estimates every model from scratch in update mode
+
+        Returns:
+            forecasted: dict of column name to dict of the requested outputs
+        """
+        if time_series is None:
+            time_series = self.time_series
+
+        if model_store is None:
+            return self._cached_outputs(('R',model),outputs,time_series,lambda keys, ts: self._R_fit_outputs(model,keys,ts))
+        return self._cached_outputs(_R_update_spec(model,refit),outputs,time_series,
+                                    lambda keys, ts: self._R_update_outputs(model,keys,ts,model_store,refit))
+
+    def _R_fit_outputs(self, model, outputs, time_series, old_models=None):
+        """fits every column in R in chunk tasks on the R worker pool (or dask), see _R_outputs
+        -if old_models (dict of column name to serialized model or None) is passed, runs R_series in update mode
+        """
+        update = old_models is not None
+        if not update:
+            old_models = {}
+        args_iter = ((column,old_models.get(column.name)) for column in _trimmed_columns(time_series))
+        shared = {'model':model,'config':self._config(regressors=True),'outputs':outputs,'update':update}
+        results = self._map_series('R_series',_R_series_task,args_iter,len(time_series.columns),shared=shared)
+        forecasted = dict(zip(time_series.columns,results))
+        for i in forecasted:
+            self.profiler.merge(forecasted[i].pop('_events',None))
+        return forecasted
+
+    def _R_update_outputs(self, model, outputs, time_series, model_store, refit):
+        """reapplies stored models to every column and writes the fitted models back to model_store"""
+        old_models = {i:None if refit else model_store.get(i) for i in time_series}
+        forecasted = self._R_fit_outputs(model,tuple(outputs) + ('state',),time_series,old_models)
+
+        #write fitted models back in the calling process so store is updated on any scheduler
+        model_store.update({i:forecasted[i].pop('state') for i in time_series})
+        if model_store.path is not None:
+            model_store.save()
+        return forecasted
+
+    def _R_block(self,
+                 model,
+                 time_series,
+                 forecast_periods=None,
+                 freq=None,
+                 confidence_level=None):
+
+        """forecasts every column of a dataframe in a single R call (used by R_dataframe when batch_size is set)
+        -columns are sent to R as one matrix and fitted with lapply in R, outputs come back as stacked matrices
+
+        Args:
+            model: pass in R forecast model as string that you want to evaluate, make sure you leave rdata as rdata in all calls
+            time_series: dataframe of series to forecast
+            forecast_periods: periods to forecast for
+            freq: frequency of time series (12 is monthly)
+            confidence_level: confidence level for prediction intervals
+
+        Returns:
+            forecast_arrays: dict of mean, lower, upper (series x horizon), fitted_values, residual_values
+                (series x rows) arrays and list of method names, same layout as ForecastResult
+        """
+        if forecast_periods is None:
+            forecast_periods = self.forecast_periods
+        if freq is None:
+            freq = self.frequency
+        if confidence_level is None:
+            confidence_level = self.confidence_level
+
+        profiler = self.profiler
+        values = time_series.values.astype(float)
+        nrow, ncol = values.shape
+        if self.max_history is not None:
+            #values before the last max_history of each column become null, R trims them like leading nulls
+            starts, ends = bounds(values)
+            values[np.arange(nrow).reshape(-1,1) <= (ends - self.max_history).reshape(1,-1)] = np.nan
+
+        with profiler.phase('to_R'):
+            R_matrix = to_R_matrix(values)
+        with profiler.phase('R_parse'):
+            rfunc = _R_batch_forecast_rfunc(model,forecast_periods,confidence_level)
+        with profiler.phase('R_fit'):
+            output = rfunc(R_matrix,freq)
+        with profiler.phase('from_R'):
+            return {'mean':from_R_matrix(output.rx2('mean'),(forecast_periods,ncol)).T,
+                    'lower':from_R_matrix(output.rx2('lower'),(forecast_periods,ncol)).T,
+                    'upper':from_R_matrix(output.rx2('upper'),(forecast_periods,ncol)).T,
+                    'fitted_values':from_R_matrix(output.rx2('fitted'),(nrow,ncol)).T,
+                    'residual_values':from_R_matrix(output.rx2('residuals'),(nrow,ncol)).T,
+                    'method':list(output.rx2('method'))}
+
+    def _R_batch_result(self,
+                        model,
+                        time_series,
+                        batch_size):
+
+        """forecasts blocks of batch_size columns in one R call each and collects them in one ForecastResult"""
+        if self.cache is not None:
+            #only uncached columns are forecast in blocks, results are split per series for the cache
+            def fit_outputs(outputs, misses_df):
+                result = self._R_batch_fit(model,misses_df,batch_size)
+                return {i:result.series(i) for i in misses_df}
+            forecasted = self._cached_outputs(('R',model),RESULT_KEYS,time_series,fit_outputs)
+            return ForecastResult.from_dicts(time_series,forecasted,int(self.confidence_level),self.freq_dict[self.frequency])
+        return self._R_batch_fit(model,time_series,batch_size)
+
+    def _R_batch_fit(self, model, time_series, batch_size):
+        """forecasts blocks of columns in R without the cache, see _R_batch_result"""
+        profiler = self.profiler
+        blocks = _column_blocks(time_series.columns, batch_size)
+        config = self._config()
+        args_list = [(time_series[block],model,config) for block in blocks]
+        for args in args_list:
+            profiler.task('R_block',args)
+        if self._use_pool():
+            with profiler.phase('dispatch'):
+                block_arrays = map_tasks(_R_block_task,args_list,self.n_workers)
+        else:
+            #config goes into the graph once and is shared by every block task
+            config = dask.delayed(config)
+            with profiler.phase('dispatch'):
+                block_arrays = dask.compute([dask.delayed(_R_block_task)(block_df,model,config) for block_df, _, _ in args_list])[0]
+        for arrays in block_arrays:
+            profiler.merge(arrays.pop('_events',None))
+        with profiler.phase('result'):
+            return ForecastResult.concat(time_series,block_arrays,int(self.confidence_level),self.freq_dict[self.frequency])
     
-    def tsclean(self, time_series=None):
+    def baseline_series(self,
+                        model,
+                        time_series=None,
+                        forecast_periods=None,
+                        freq=None,
+                        confidence_level=None):
+
+        """forecasts a single series with a baseline model computed in numpy instead of R (see magi.baseline)
+
+        Args:
+            model: one of naive, snaive, meanf, rwf, rwf(rdata,drift=TRUE), thetaf
+            time_series: time series object
+            forecast_periods: periods to forecast for
+            freq: frequency of time series (12 is monthly)
+            confidence_level: confidence level for prediction intervals
+
+        Returns following parameters as a dict (same keys as R_series):
+             model: dict with method name
+             method: method name
+             predicted: Point forecasts as a time series
+             lower: Lower limits for prediction intervals
+             upper: Upper limits for prediction intervals
+             level: The confidence values associated with the prediction intervals
+             x: The original time series
+             residuals: Residuals from the fitted model. That is x minus fitted values.
+             fitted: Fitted values (one-step forecasts)
+             full_fit: fitted + predicted values as one time series
+             full_actual: actual + predicted values as one time series
+        """
+        if time_series is None:
+            time_series = self.time_series
+        if forecast_periods is None:
+            forecast_periods = self.forecast_periods
+        if freq is None:
+            freq = self.frequency
+        if confidence_level is None:
+            confidence_level = self.confidence_level
+
+        freq_string = self.freq_dict[freq]
+        time_series = time_series.loc[time_series.first_valid_index():time_series.last_valid_index()]
+        forecast_arrays = baseline_forecast(time_series.values,model,forecast_periods,freq,confidence_level)
+
+        index = pd.date_range(start=time_series.index.max(),periods=forecast_periods+1,freq=freq_string)[1:]
+        predicted_series = pd.Series(forecast_arrays['mean'][:,0],index=index)
+        fitted_series = pd.Series(forecast_arrays['fitted'][:,0],index=time_series.index)
+        residual_series = pd.Series(forecast_arrays['residuals'][:,0],index=time_series.index)
+
+        return {'model':{'method':forecast_arrays['method']},'method':forecast_arrays['method'],'predicted':predicted_series,
+                'lower':forecast_arrays['lower'][:,0],'upper':forecast_arrays['upper'][:,0],'level':int(confidence_level),
+                'x':time_series,'residuals':residual_series,'fitted':fitted_series,
+                'full_fit':pd.concat([fitted_series,predicted_series]),'full_actuals':pd.concat([time_series,predicted_series])}
+
+    def baseline_dataframe(self,
+                           model,
+                           fit_pred=False,
+                           actual_pred=False,
+                           pred=False,
+                           fit=False,
+                           residuals=False,
+                           time_series=None):
+
+        """forecasts every series of a dataframe at once with a baseline model computed in numpy instead of R
+        -no per series conversion or tasks, so this runs in seconds even for a very large number of series
+
+        Args:
+            model: one of naive, snaive, meanf, rwf, rwf(rdata,drift=TRUE), thetaf
+            time_series: input dataframe
+            ----- only one of below boolean values can be set to true, if none is a ForecastResult is returned -----
+            fit_pred: returns dataframe of fitted and predicted values
+            actual_pred: returns dataframe of actual and predicted values
+            pred: returns dataframe of predicted values only
+            fit: returns dataframe of fitted values only
+            residuals: returns dataframe of residual values only
+
+        """
+        if time_series is None:
+            time_series = self.time_series
+
+        forecast_arrays = baseline_forecast(time_series.values,model,self.forecast_periods,self.frequency,self.confidence_level)
+        result = ForecastResult(time_series,
+                                forecast_arrays['mean'].T,
+                                forecast_arrays['lower'].T,
+                                forecast_arrays['upper'].T,
+                                forecast_arrays['fitted'].T,
+                                forecast_arrays['residuals'].T,
+                                [forecast_arrays['method']]*len(time_series.columns),
+                                int(self.confidence_level),
+                                self.freq_dict[self.frequency])
+        output = _output_key(fit_pred,actual_pred,pred,fit,residuals)
+        if output is None:
+            return result
+        return result.frame(output)
+
+    def R_select(self,
+                 models,
+                 holdout,
+                 metric='MASE',
+                 time_series=None):
+
+        """picks the best of several R models for every series by their forecast error on a holdout,
+        then refits only the winner on the full history and forecasts with it
+        -each series is converted to R once and every candidate is fitted in the same R call, so a tournament costs
+         one task per series rather than one run of R per model
+        -with max_history only the last max_history values of each series are used, the holdout is the end of them
+
+        Args:
+            models: list of R model strings (make sure you leave rdata as rdata), e.g. ['auto.arima(rdata)','ets(rdata)','thetaf','snaive']
+            holdout: number of periods at the end of each series held out to score the candidates
+            metric: holdout error used to pick the winner, one of MASE, RMSE, MAE, MAPE, SMAPE
+            time_series: input series or dataframe
+
+        Returns:
+            series: if series passed in, dict of R_select_series
+            dataframe: if dataframe passed in, tuple of
+                result: ForecastResult of the winning models
+                model_table: dataframe indexed by series with the winning model and the holdout metric of every candidate
+        """
+        if time_series is None:
+            time_series = self.time_series
+        if metric not in SELECT_METRICS:
+            raise ValueError('metric must be one of %s' % ', '.join(SELECT_METRICS))
+        if self.regressors is not None:
+            raise ValueError('R_select does not support regressors')
+        if self.aggregate_periods is not None or self.seasonal_periods is not None:
+            raise ValueError('R_select does not support aggregate_periods or seasonal_periods')
+        models = list(models)
+
+        if isinstance(time_series, pd.core.series.Series):
+            return self.R_select_series(models,holdout,metric,time_series)
+
+        outputs = RESULT_KEYS + ('selected','scores')
+        args_iter = ((column,) for column in _trimmed_columns(time_series))
+        shared = {'models':models,'holdout':holdout,'metric':metric,'config':self._config(),'outputs':outputs}
+        results = self._map_series('R_select',_R_select_task,args_iter,len(time_series.columns),shared=shared)
+        forecasted = dict(zip(time_series.columns,results))
+
+        with self.profiler.phase('result'):
+            result = ForecastResult.from_dicts(time_series,forecasted,int(self.confidence_level),self.freq_dict[self.frequency])
+            model_table = pd.DataFrame([forecasted[i]['scores'][metric] for i in time_series],index=time_series.columns,columns=models)
+            model_table.insert(0,'model',[forecasted[i]['selected'] for i in time_series])
+        return result, model_table
+
+    def R_select_series(self,
+                        models,
+                        holdout,
+                        metric='MASE',
+                        time_series=None,
+                        forecast_periods=None,
+                        freq=None,
+                        confidence_level=None):
+
+        """model selection for a single series in one R call, see R_select
+
+        Args:
+            models: list of R model strings
+            holdout: number of periods at the end of the series held out to score the candidates
+            metric: holdout error used to pick the winner, one of MASE, RMSE, MAE, MAPE, SMAPE
+            time_series: time series object
+            forecast_periods: periods to forecast for
+            freq: frequency of time series (12 is monthly)
+            confidence_level: confidence level for prediction intervals
+
+        Returns following parameters as a dict:
+             selected: winning model string
+             scores: dataframe of holdout metrics (columns) of every candidate model (rows)
+             method, predicted, lower, upper, level, x, residuals, fitted, full_fit, full_actuals: as in R_series,
+                 for the winning model refitted on the full series
+        """
+        if time_series is None:
+            time_series = self.time_series
+        if forecast_periods is None:
+            forecast_periods = self.forecast_periods
+        if freq is None:
+            freq = self.frequency
+        if confidence_level is None:
+            confidence_level = self.confidence_level
+        if self.aggregate_periods is not None or self.seasonal_periods is not None:
+            raise ValueError('R_select does not support aggregate_periods or seasonal_periods')
+        freq_string = self.freq_dict[freq]
+
+        profiler = self.profiler
+        name = time_series.name
+        with profiler.phase('trim',name):
+            start, end = bounds(time_series.values)
+            if self.max_history is not None:
+                start = max(start,end - self.max_history + 1)
+            time_series = time_series.iloc[start:end + 1]
+        with profiler.phase('to_R',name):
+            rdata = to_R_ts(time_series.values,freq)
+        with profiler.phase('R_parse',name):
+            rfunc = _R_select_rfunc(models,holdout,metric,forecast_periods,confidence_level)
+        with profiler.phase('R_fit',name):
+            output = rfunc(rdata)
+        with profiler.phase('from_R',name):
+            scores = R_to_numpy(output.rx2('scores')).reshape((len(models),len(SELECT_METRICS)),order='F')
+            best = int(R_to_numpy(output.rx2('best'),dtype=int)[0]) - 1
+            method = str(output.rx2('method')[0])
+            mean = R_to_numpy(output.rx2('mean'))
+            lower = R_to_numpy(output.rx2('lower'))
+            upper = R_to_numpy(output.rx2('upper'))
+            level = int(R_to_numpy(output.rx2('level'))[0])
+            residuals = R_to_numpy(output.rx2('residuals'))
+            fitted = R_to_numpy(output.rx2('fitted'))
+
+        with profiler.phase('date_range',name):
+            index = pd.date_range(start=time_series.index[-1],periods=len(mean)+1,freq=freq_string)[1:]
+            predicted_series = pd.Series(mean,index=index)
+            fitted_series = pd.Series(fitted,index=time_series.index)
+            residual_series = pd.Series(residuals,index=time_series.index)
+
+        return {'selected':models[best],
+                'scores':pd.DataFrame(scores,index=models,columns=SELECT_METRICS),
+                'method':method,'predicted':predicted_series,'lower':lower,'upper':upper,'level':level,
+                'x':time_series,'residuals':residual_series,'fitted':fitted_series,
+                'full_fit':pd.concat([fitted_series,predicted_series]),
+                'full_actuals':pd.concat([time_series,predicted_series])}
+
+    def cross_validate(self,
+                       model,
+                       initial,
+                       horizon=None,
+                       step=1,
+                       changepoint_prior_scale=.35):
+
+        """rolling origin cross validation of a model over every series
+        -model is refit at origins initial, initial+step, ... of each series (counted from its first non null value)
+        -all (series x origin) fits go out as one chunked parallel run (see magi.chunking.map_chunked): R models get
+         one task per series with the series converted to R once and every origin fit inside R, Prophet gets one
+         task per origin through dask
+        -an origin whose fit fails gets null forecasts and errors
+        -errors for all series and origins are computed in one vectorized pass at the end
+        -with max_history each training window is the last max_history observations before its origin (a sliding
+         window like the fits it validates), otherwise it grows from the first value
+        -external regressors, aggregate_periods and seasonal_periods aren't supported, a ValueError is raised if the
+         forecast object has them
+
+        Args:
+            model: R forecast model string (same as R, leave rdata as rdata) or 'prophet'
+            initial: number of observations in the first training window
+            horizon: number of periods forecast from each origin (defaults to forecast_periods)
+            step: number of observations the origin moves forward between fits
+            changepoint_prior_scale: only used for prophet, flexibility in model to change trendpoint
+
+        Returns:
+            errors_df: dataframe of actual minus forecast indexed by (series, origin) with one column per horizon step,
+                origin is the date of last observation in the training window, errors past end of series are null
+        """
+        if horizon is None:
+            horizon = self.forecast_periods
+        if self.regressors is not None:
+            raise ValueError('cross_validate does not support regressors')
+        if self.aggregate_periods is not None or self.seasonal_periods is not None:
+            raise ValueError('cross_validate does not support aggregate_periods or seasonal_periods')
+
+        time_series = self.time_series
+        if self.forecast_type == 1:
+            time_series = time_series.to_frame()
+
+        trimmed = dict(zip(time_series.columns,_trimmed_columns(time_series)))
+        origins = {i:list(range(initial,len(trimmed[i]),step)) for i in time_series}
+
+        if model == 'prophet':
+            #tuples of one series in a chunk hold the same series object, so it is pickled once per chunk
+            args_iter = ((trimmed[i],origin) for i in time_series for origin in origins[i])
+            shared = {'horizon':horizon,'freq':self.freq_dict[self.frequency],'changepoint_prior_scale':changepoint_prior_scale,
+                      'max_history':self.max_history}
+            origin_forecasts = self._map_series('prophet_cv',_prophet_origin_task,args_iter,sum(map(len,origins.values())),
+                                                shared=shared,scheduler='dask')
+            series_forecasts = []
+            position = 0
+            for i in time_series:
+                series_forecasts.append(np.array(origin_forecasts[position:position + len(origins[i])]).reshape(-1,horizon))
+                position += len(origins[i])
+        else:
+            args_iter = ((trimmed[i].values,origins[i]) for i in time_series)
+            shared = {'model':model,'horizon':horizon,'frequency':self.frequency,'max_history':self.max_history}
+            series_forecasts = self._map_series('R_cv',_R_cv_task,args_iter,len(time_series.columns),shared=shared)
+
+        #line up actual values for every (series, origin, horizon step) and compute all errors at once
+        actuals = []
+        keys = []
+        steps = np.arange(horizon)
+        for i in time_series:
+            values = trimmed[i].values.astype(float)
+            positions = np.array(origins[i],dtype=int).reshape(-1,1) + steps
+            in_range = positions < len(values)
+            actuals.append(np.where(in_range,values[np.minimum(positions,len(values) - 1)],np.nan))
+            keys.extend((i,trimmed[i].index[origin - 1]) for origin in origins[i])
+        errors = np.vstack(actuals) - np.vstack(series_forecasts)
+        errors_df = pd.DataFrame(errors,index=pd.MultiIndex.from_tuples(keys,names=['series','origin']),columns=steps + 1)
+        return errors_df
+    
+    def tsclean(self, time_series=None, batch_size=None, backend='R'):
         
         """wraps tsclean_series and tsclean_dataframe methods to clean time series
             
         Args:
             time_series: pass in time series or dataframe or series to be cleaned
+            batch_size: only used for dataframes, if set cleans blocks of batch_size columns in one R call each
+            backend: 'R' to clean with R tsclean, 'numpy' to clean every series at once in numpy (see magi.clean)
 
         Returns:
              series: if series passed in, returns cleaned series
@@ -528,12 +1861,43 @@ class forecast(object):
         """
         if time_series is None:
             time_series = self.time_series
+
+        if backend == 'numpy':
+            return self.tsclean_numpy(time_series=time_series)
             
         if self.forecast_type == 1:
             return self.tsclean_series(time_series=time_series)
         
         if self.forecast_type == 2:
-            return self.tsclean_dataframe(time_series=time_series)
+            return self.tsclean_dataframe(time_series=time_series,batch_size=batch_size)
+
+    def tsclean_numpy(self,time_series=None,freq=None,replace_missing=True):
+        """
+        cleans a series or every series of a dataframe at once with the numpy version of tsclean (magi.clean.tsclean)
+        -seasonal decomposition, residual based outlier flagging and linear or seasonal interpolation of
+         outliers and missing values are all vectorized across the frame, no R calls are made
+
+        Args:
+            time_series: input time series or dataframe
+            freq: frequency of time series
+            replace_missing: if True, not only removes outliers but also interpolates missing values
+
+        Returns
+            self: forecast object with cleaned time series
+        """
+        if time_series is None:
+            time_series = self.time_series
+        if freq is None:
+            freq = self.frequency
+
+        if isinstance(time_series, pd.core.series.Series):
+            time_series = time_series.loc[time_series.first_valid_index():time_series.last_valid_index()]
+            self.time_series = pd.Series(clean.tsclean(time_series.values,freq,replace_missing=replace_missing),
+                                         index=time_series.index,name=time_series.name)
+        else:
+            self.time_series = pd.DataFrame(clean.tsclean(time_series.values,freq,replace_missing=replace_missing),
+                                            index=time_series.index,columns=time_series.columns)
+        return self
 
     def tsclean_series(self,time_series=None,freq=None,replace_missing=True,return_ts=False):
         """
@@ -554,36 +1918,15 @@ class forecast(object):
         if freq is None:
             freq = self.frequency
 
-        freq_string = self.freq_dict[freq]
+        #extract actual time series between first and last non null value
+        start, end = bounds(time_series.values)
+        time_series = time_series.iloc[start:end + 1]
+        #converts to float ts object in R
+        rdata = to_R_ts(time_series.values,freq)
 
-        #find the start of the time series
-        start_ts = time_series[time_series.notna()].index[0]
-        #find the end of the time series
-        end_ts = time_series[time_series.notna()].index[-1]
-        #extract actual time series
-        time_series = time_series.loc[start_ts:end_ts]
-        #converts to ts object in R
-        time_series_R = robjects.IntVector(time_series)
-        rdata=ts(time_series_R,frequency=freq)
-
-        if replace_missing:
-            R_val = 'TRUE'
-        else:
-            R_val = 'FALSE'
-
-        rstring="""
-             function(rdata){
-             library(forecast)
-             x <- tsclean(rdata,replace.missing=%s)
-             return(x)
-             }
-            """ % (R_val)
-
-
-        rfunc=robjects.r(rstring)
-        cleaned_int_vec = rfunc(rdata)
-        cleaned_array = pandas2ri.ri2py(cleaned_int_vec)
-        cleaned_ts = pd.Series(cleaned_array,index=pd.date_range(start=time_series[time_series.notnull()].index.min(),periods=len(time_series[time_series.notnull()]),freq=freq_string))
+        rfunc = _R_tsclean_rfunc(replace_missing)
+        cleaned_array = R_to_numpy(rfunc(rdata))
+        cleaned_ts = pd.Series(cleaned_array,index=time_series.index)
         #if return_ts set to True then return time series (for tsclean_dataframe calls where want the series and not the object, 
         #else return mutated class object (new class object)
         if return_ts:
@@ -593,26 +1936,133 @@ class forecast(object):
             return self
     
     def tsclean_dataframe(self,
-                          time_series=None):
+                          time_series=None,
+                          batch_size=None):
     
         
         """cleans dataframe using tsclean
 
         Args:
             time_series: input dataframe
+            batch_size: if set, cleans blocks of batch_size columns in one R call each instead of one call per column
         Returns:
             cleaned_df: dataframe of cleaned time series
 
         """
         if time_series is None:
             time_series = self.time_series
-            
-        output_series = []
-        for i in time_series:
-            cleaned_series = dask.delayed(self.tsclean_series)(time_series[i],return_ts=True)
-            output_series.append(cleaned_series)
-            
-        total = dask.delayed(output_series).compute()
-        cleaned_df = pd.concat(total,ignore_index=False,keys=time_series.columns,axis=1)
-        self.time_series = cleaned_df
+
+        if batch_size is None:
+            args_iter = ((column,) for column in _trimmed_columns(time_series))
+            total = self._map_series('tsclean_series',_tsclean_series_task,args_iter,len(time_series.columns),
+                                     shared={'config':self._config()})
+            self.time_series = pd.concat(total,ignore_index=False,keys=time_series.columns,axis=1)
+            return self
+
+        if self._use_pool():
+            args_list = [(time_series[block],self._config()) for block in _column_blocks(time_series.columns, batch_size)]
+            self.time_series = pd.concat(map_tasks(_tsclean_block_task,args_list,self.n_workers),axis=1)
+            return self
+
+        #config goes into the graph once and is shared by every block task
+        config = dask.delayed(self._config())
+        cleaned_blocks = [dask.delayed(_tsclean_block_task)(time_series[block],config)
+                          for block in _column_blocks(time_series.columns, batch_size)]
+        self.time_series = pd.concat(dask.compute(cleaned_blocks)[0],axis=1)
         return self
+
+    def _tsclean_block(self,time_series,freq=None,replace_missing=True):
+        """cleans every column of a dataframe with tsclean in a single R call (used by tsclean_dataframe when batch_size is set)
+
+        Args:
+            time_series: dataframe of series to clean
+            freq: frequency of time series
+            replace_missing: if True, not only removes outliers but also interpolates missing values
+
+        Returns
+            cleaned_df: dataframe of cleaned series, null outside the range of each original series
+        """
+        if freq is None:
+            freq = self.frequency
+
+        values = time_series.values.astype(float)
+        rfunc = _R_batch_tsclean_rfunc(replace_missing)
+        cleaned = from_R_matrix(rfunc(to_R_matrix(values),freq),values.shape)
+        return pd.DataFrame(cleaned,index=time_series.index,columns=time_series.columns)
+
+
+#module level tasks for the R worker pool and dask, these rebuild a light forecast object from a small config dict on the
+#worker so the calling object (and its full dataframe) never has to be pickled, each task is sent only its own series
+def _task_forecast(time_series, config):
+    """rebuilds forecast object of series from config on a worker
+    -every task gets its own empty profiler, since config is shared between tasks, and its events are sent back
+     with the task results
+    """
+    config = dict(config)
+    profiler = Profiler() if config.pop('profile') else None
+    regressors_key = config.pop('regressors_key',None)
+    fc_obj = forecast(time_series=time_series,profiler=profiler,**config)
+    #regressors are hashed once in the calling process, not again for every task
+    fc_obj._regressors_key = regressors_key
+    return fc_obj
+
+def _R_series_task(time_series, old_model, model, config, outputs, update=False):
+    """forecasts one series on a pool worker and returns dict of only the requested outputs"""
+    fc_obj = _task_forecast(time_series,config)
+    forecasted_dict = fc_obj.R_series(model,update=update,old_model=old_model)
+    outputs = {key:forecasted_dict[key] for key in outputs}
+    if fc_obj.profiler.enabled:
+        outputs['_events'] = fc_obj.profiler.events
+    return outputs
+
+def _R_select_task(time_series, models, holdout, metric, config, outputs):
+    """runs model selection for one series on a pool worker and returns dict of only the requested outputs"""
+    fc_obj = _task_forecast(time_series,config)
+    forecasted_dict = fc_obj.R_select_series(models,holdout,metric)
+    return {key:forecasted_dict[key] for key in outputs}
+
+def _R_block_task(time_series, model, config):
+    """forecasts a block of series in one R call on a pool worker and returns the arrays of every output"""
+    fc_obj = _task_forecast(time_series,config)
+    forecast_arrays = fc_obj._R_block(model,time_series)
+    if fc_obj.profiler.enabled:
+        forecast_arrays['_events'] = fc_obj.profiler.events
+    return forecast_arrays
+
+def _R_cv_task(values, origins, model, horizon, frequency, max_history=None):
+    """runs rolling origin fits of one series in a single R call and returns origins x horizon forecast array"""
+    if len(origins) == 0:
+        return np.empty((0,horizon))
+    #1 based first observation of every training window
+    starts = [1 if max_history is None else max(1,origin - max_history + 1) for origin in origins]
+    rdata = to_R_ts(values,frequency)
+    rfunc = _R_cv_rfunc(model,horizon)
+    R = get_R()
+    return from_R_matrix(rfunc(rdata,R.IntVector(starts),R.IntVector(origins)),(len(origins),horizon))
+
+def _prophet_origin_task(time_series, origin, horizon, freq, changepoint_prior_scale, max_history=None):
+    """fits Prophet on the first origin observations of series (the last max_history of them if set)
+    and returns the next horizon point forecasts"""
+    start = 0 if max_history is None else max(0,origin - max_history)
+    model_ts = time_series.iloc[start:origin].reset_index()
+    model_ts.columns = ['ds', 'y']
+    #only point forecasts are scored, so no uncertainty simulations are drawn
+    model = get_prophet()(changepoint_prior_scale=changepoint_prior_scale,uncertainty_samples=0)
+    model.fit(model_ts)
+    future = model.make_future_dataframe(periods=horizon,freq=freq,include_history=False)
+    return model.predict(future)['yhat'].values
+
+def _prophet_series_task(time_series, init_params, config, changepoint_prior_scale, outputs, options=None):
+    """forecasts one series with Prophet on a worker and returns dict of the requested outputs and fitted params"""
+    fc_obj = _task_forecast(time_series,config)
+    forecasted_dict = fc_obj.prophet_series(changepoint_prior_scale=changepoint_prior_scale,init_params=init_params,
+                                            **(options or {}))
+    return {key:forecasted_dict[key] for key in tuple(outputs) + ('params',)}
+
+def _tsclean_series_task(time_series, config):
+    """cleans one series on a pool worker"""
+    return _task_forecast(time_series,config).tsclean_series(time_series,return_ts=True)
+
+def _tsclean_block_task(time_series, config):
+    """cleans a block of series in one R call on a pool worker"""
+    return _task_forecast(time_series,config)._tsclean_block(time_series)
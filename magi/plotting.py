@@ -1,58 +1,177 @@
 import numpy as np
 import pandas as pd
-#figure factory for tables
-import plotly.figure_factory as ff
-from plotly.offline import download_plotlyjs, init_notebook_mode, plot, iplot
-from plotly.graph_objs import Scatter, Figure, Layout
-import plotly.graph_objs as go
-import plotly
-init_notebook_mode(connected=False)
-
-import cufflinks as cf
-cf.set_config_file(offline=True, world_readable=False,offline_show_link=False,theme='pearl')
-
-def fc_plot(obj,title='',xTitle='Date',yTitle='',asFigure=False):
+from magi.accuracy import accuracy_summary
+
+#plotly and cufflinks are imported and configured on the first plot rather than when magi.plotting is imported
+_plotting = {}
+
+def _init_plotting():
+    """imports plotly, starts offline notebook mode and writes cufflinks config on the first call
+
+    Returns:
+        go: plotly.graph_objs
+        ff: plotly.figure_factory (for tables)
+        iplot: plotly.offline.iplot
+    """
+    if not _plotting:
+        import plotly.figure_factory as ff
+        import plotly.graph_objs as go
+        from plotly.offline import init_notebook_mode, iplot
+        init_notebook_mode(connected=False)
+
+        #importing cufflinks adds the iplot method to dataframes
+        import cufflinks as cf
+        cf.set_config_file(offline=True, world_readable=False,offline_show_link=False,theme='pearl')
+        _plotting.update({'go':go,'ff':ff,'iplot':iplot})
+    return _plotting['go'], _plotting['ff'], _plotting['iplot']
+
+def lttb(x, y, n_out):
+    """picks n_out points of a line with the largest triangle three buckets algorithm (Steinarsson 2013),
+    which keeps peaks, troughs and the overall shape far better than taking every k-th point
+    -first and last points are always kept, the rest is split into n_out - 2 equal buckets and from each the point
+     forming the largest triangle with the point kept from the previous bucket and the mean of the next bucket is kept
+
+    Args:
+        x: 1d float array of increasing x values
+        y: 1d float array of y values without nulls
+        n_out: number of points to keep
+
+    Returns:
+        positions: sorted integer array of positions of kept points
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        #too few points for a middle bucket, only the ends are kept
+        return np.unique([0,n - 1])
+    every = (n - 2)/float(n_out - 2)
+    edges = np.append(np.floor(np.arange(n_out - 1)*every).astype(int) + 1,n)
+    positions = np.empty(n_out,dtype=int)
+    positions[0], positions[-1] = 0, n - 1
+    a = 0
+    for k in range(n_out - 2):
+        start, end = edges[k], edges[k + 1]
+        next_x, next_y = x[end:edges[k + 2]].mean(), y[end:edges[k + 2]].mean()
+        area = np.abs((x[a] - next_x)*(y[start:end] - y[a]) - (x[a] - x[start:end])*(next_y - y[a]))
+        a = start + int(area.argmax())
+        positions[k + 1] = a
+    return positions
+
+def _numeric_index(index):
+    """returns index as float array usable for triangle areas (datetimes as nanoseconds)"""
+    values = np.asarray(index)
+    if np.issubdtype(values.dtype,np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return values.astype(float)
+
+def _downsample(series, max_points, extra=None):
+    """drops nulls from series and downsamples it to at most max_points with lttb
+    -every run of consecutive non null values is downsampled on its own with a share of max_points proportional to
+     its length, and the first null after each run (except the last) is kept so plotly breaks the line at the gap
+     instead of drawing it across
+
+    Args:
+        series: pandas series
+        max_points: most non null points to keep (each run keeps at least its two ends), None keeps every point
+        extra: list of arrays aligned with series (e.g. prediction interval limits) subset the same way
+
+    Returns:
+        x: kept index values
+        y: kept values (null at gaps)
+        extra: kept values of every extra array (null at gaps)
+    """
+    values = np.asarray(series.values,dtype=float)
+    extra = [np.asarray(i,dtype=float) for i in (extra or [])]
+    positions = np.flatnonzero(~np.isnan(values))
+    runs = np.split(positions,np.flatnonzero(np.diff(positions) > 1) + 1) if len(positions) else []
+    if max_points is not None and len(positions) > max_points:
+        x = _numeric_index(series.index)
+        kept = []
+        for run in runs:
+            n_out = min(len(run),max(2,int(max_points*len(run)//len(positions))))
+            kept.append(run[lttb(x[run],values[run],n_out)])
+        runs = kept
+    gaps = np.array([run[-1] + 1 for run in runs[:-1]],dtype=int)
+    take = np.sort(np.concatenate(runs + [gaps])) if runs else np.array([],dtype=int)
+    is_gap = np.isin(take,gaps)
+    extra = [np.where(is_gap,np.nan,i[take]) for i in extra]
+    return series.index[take], values[take], extra
+
+def _page_columns(columns, max_series, page, sample, seed):
+    """returns columns shown on page (or a random sample of them) and a label for the plot title"""
+    if max_series is None or len(columns) <= max_series:
+        return list(columns), ''
+    if sample:
+        positions = np.sort(np.random.RandomState(seed).choice(len(columns),max_series,replace=False))
+        return [columns[i] for i in positions], ' (sample of %d of %d series)' % (max_series,len(columns))
+    pages = -(-len(columns)//max_series)
+    if page < 0 or page >= pages:
+        raise ValueError('page must be between 0 and %d' % (pages - 1))
+    shown = list(columns[page*max_series:(page + 1)*max_series])
+    return shown, ' (page %d of %d, %d series)' % (page + 1,pages,len(columns))
+
+def fc_plot(obj,title='',xTitle='Date',yTitle='',asFigure=False,max_points=2000,gl_threshold=20000,
+            max_series=20,page=0,sample=False,seed=0):
     """Plots actual, fitted, and predicted values from forecast class in plotly graph
+    -every trace is downsampled to at most max_points with lttb, so long (e.g. hourly) series keep their shape
+     while the figure stays small
+    -traces switch to webgl (Scattergl) once the figure has more than gl_threshold points
+    -dataframes are shown max_series columns at a time, either one page or a random sample of columns, so figure
+     build time and size are bounded by max_series*max_points whatever the size of the input
+
     Args:
         obj: forecast object (dict for single series and dataframe for multiple series)
         title: plot title
         xTitle: xaxis title
         yTitle: y axis title
         asFigure: parameter to return as fig instead of the plot if set to True
+        max_points: most points drawn per trace, None draws every point
+        gl_threshold: number of points in the figure above which webgl traces are used
+        max_series: most dataframe columns drawn, None draws every column
+        page: page of max_series columns to draw (0 is the first)
+        sample: if True draws a random sample of max_series columns instead of a page
+        seed: random seed of the column sample
         
     Returns:
         fig: plotly figure object
         
     
     """
+    go, ff, iplot = _init_plotting()
     
     try:
         #handle dict (assumes it's forecast object)
         if isinstance(obj, dict):
-            trace_actuals = go.Scatter(
-                x = obj['x'].index,
-                y = obj['x'].values,
+            actual_x, actual_y, _ = _downsample(obj['x'],max_points)
+            fitted_x, fitted_y, _ = _downsample(obj['fitted'],max_points)
+            predicted_x, predicted_y, (lower_y, upper_y) = _downsample(obj['predicted'],max_points,[obj['lower'],obj['upper']])
+            Scatter = go.Scattergl if len(actual_y) + len(fitted_y) + 3*len(predicted_y) > gl_threshold else go.Scatter
+
+            trace_actuals = Scatter(
+                x = actual_x,
+                y = actual_y,
                 mode = 'lines',
                 name = 'actual'
             )
-            trace_fitted = go.Scatter(
-                x = obj['fitted'].index,
-                y = obj['fitted'].values,
+            trace_fitted = Scatter(
+                x = fitted_x,
+                y = fitted_y,
                 mode = 'lines+markers',
                 name = 'fitted',
                 opacity=0.8
             )
 
-            trace_predicted = go.Scatter(
-                x = obj['predicted'].index,
-                y = obj['predicted'].values,
+            trace_predicted = Scatter(
+                x = predicted_x,
+                y = predicted_y,
                 mode='lines',
                 name = 'predicted'
             )
 
-            trace_lower = go.Scatter(
-                x=obj['predicted'].index,
-                y=obj['lower'],
+            trace_lower = Scatter(
+                x=predicted_x,
+                y=lower_y,
                 fill= None,
                 mode='lines',
                 name='Lower PI ('+str(obj['level'])+'%)',
@@ -60,9 +179,9 @@ def fc_plot(obj,title='',xTitle='Date',yTitle='',asFigure=False):
                     color='lightgreen',
                 )
             )
-            trace_upper = go.Scatter(
-                x=obj['predicted'].index,
-                y=obj['upper'],
+            trace_upper = Scatter(
+                x=predicted_x,
+                y=upper_y,
                 fill='tonexty',
                 mode='lines',
                 name='Upper PI ('+str(obj['level'])+'%)',
@@ -78,40 +197,62 @@ def fc_plot(obj,title='',xTitle='Date',yTitle='',asFigure=False):
                     yaxis = dict(title = yTitle),
                     xaxis=dict(
                         title = xTitle,
-                        rangeslider=dict(),
                         type='date'
                     )
                 )
+            #rangeslider redraws every trace as svg, so it is left off webgl figures
+            if Scatter is go.Scatter:
+                layout['xaxis']['rangeslider'] = dict()
             fig = dict(data=data, layout=layout)
 
             
         elif isinstance(obj, pd.core.series.Series):
             
-            trace_series = go.Scatter(
-                x = obj.index,
-                y = obj.values,
+            series_x, series_y, _ = _downsample(obj,max_points)
+            Scatter = go.Scattergl if len(series_y) > gl_threshold else go.Scatter
+            trace_series = Scatter(
+                x = series_x,
+                y = series_y,
                 mode = 'lines',
                 name = 'series'
             )
-            data = [trace_actuals]
+            data = [trace_series]
             
             layout = dict(
                     title=title,
                     yaxis = dict(title = yTitle),
                     xaxis=dict(
                         title = xTitle,
-                        rangeslider=dict(),
                         type='date'
                     )
             )
+            if Scatter is go.Scatter:
+                layout['xaxis']['rangeslider'] = dict()
             fig = dict(data=data, layout=layout)
 
             
         #separate logic if input is dataframe
         elif isinstance(obj, pd.core.frame.DataFrame):
-            #return cufflinks figure and add rangeslider to layout
-            fig = obj.iplot(kind='scatter',title=title,yTitle=yTitle,xTitle=xTitle,asFigure=True) 
-            fig['layout']['xaxis1']['rangeslider'] = dict()
+            #only the columns shown are downsampled, so the rest of the frame is never touched
+            columns, page_label = _page_columns(obj.columns,max_series,page,sample,seed)
+            traces = []
+            for i in columns:
+                series_x, series_y, _ = _downsample(obj[i],max_points)
+                traces.append((str(i),series_x,series_y))
+            Scatter = go.Scattergl if sum(len(y) for _, _, y in traces) > gl_threshold else go.Scatter
+            data = [Scatter(x=x,y=y,mode='lines',name=name) for name, x, y in traces]
+
+            layout = dict(
+                    title=title + page_label,
+                    yaxis = dict(title = yTitle),
+                    xaxis=dict(
+                        title = xTitle,
+                        type='date'
+                    )
+            )
+            if Scatter is go.Scatter:
+                layout['xaxis']['rangeslider'] = dict()
+            fig = dict(data=data, layout=layout)
 
         else:
             raise TypeError('only accepted objects are dictionary or dataframe returned from forecast class')
@@ -122,9 +263,14 @@ def fc_plot(obj,title='',xTitle='Date',yTitle='',asFigure=False):
         return fig
     return iplot(fig, show_link=False)
     
-def acc_plot(obj,title='',xTitle='',yTitle='',mode='lines+markers',tablewidth=350,asFigure=False):
+def acc_plot(obj,title='',xTitle='',yTitle='',mode='lines+markers',tablewidth=350,asFigure=False,
+             summary=None,max_series=50,bins=50,top_k=10,rank_metric='MASE'):
     
     """ plots accuracy measures
+    -dataframes of more than max_series series are drawn as a summary (see magi.accuracy.accuracy_summary) rather than one
+     line per series: a histogram of each metric across series, a table of quantiles of every metric and a table
+     of the top_k worst series, so the figures stay the same size however many series were scored
+
     Args:
         obj: accuracy object(dict for single series, dataframe for multiple series)
         title: plot title
@@ -133,12 +279,18 @@ def acc_plot(obj,title='',xTitle='',yTitle='',mode='lines+markers',tablewidth=35
         mode: one of 'lines', 'markers', or 'lines+markers' (only applies to multiple series)
         tablewidth:sets table width for accuracy measures of single instance
         asFigure: parameter to return as fig instead of the plot if set to True
+        summary: True draws the summary, False one line per series, None picks summary above max_series series
+        max_series: most series drawn one line each when summary is None
+        bins: number of histogram bins of each metric
+        top_k: number of worst series listed in the summary
+        rank_metric: metric the worst series are ranked by (first metric if it isn't in the dataframe)
         
     Returns:
-        fig: plotly figure object
+        fig: plotly figure object, dict of histogram, quantiles and worst figures for the summary
         
     
     """
+    go, ff, iplot = _init_plotting()
     
     try:
         #handle dict (assumes it's forecast object)
@@ -152,15 +304,28 @@ def acc_plot(obj,title='',xTitle='',yTitle='',mode='lines+markers',tablewidth=35
             fig.layout.update({'width':tablewidth})
 
             
+        elif isinstance(obj, pd.core.frame.DataFrame) and (summary or (summary is None and obj.shape[1] > max_series)):
+            fig = _acc_summary_figures(obj,title,bins,top_k,rank_metric,tablewidth)
+            if asFigure == True:
+                return fig
+            for i in fig.values():
+                iplot(i, show_link=False)
+            return
+
         #separate logic if input is dataframe
         elif isinstance(obj, pd.core.frame.DataFrame):
-            #return cufflinks figure, normalize error measures, then plot them without a y axis
-            normalized_df=obj.T.apply(lambda x: x/abs(x).max(), axis=0)
-            fig = normalized_df.T.iplot(kind='scatter',title=title,xTitle=xTitle,yTitle=yTitle,mode=mode,asFigure=True)
+            #return cufflinks figure, normalize each error measure by its largest absolute value across series in one
+            #array operation, then plot them without a y axis
+            values = obj.values.astype(float)
+            with np.errstate(divide='ignore',invalid='ignore'):
+                normalized = values/np.nanmax(np.abs(values),axis=1,keepdims=True)
+            normalized_df = pd.DataFrame(normalized,index=obj.index,columns=obj.columns)
+            fig = normalized_df.iplot(kind='scatter',title=title,xTitle=xTitle,yTitle=yTitle,mode=mode,asFigure=True)
             fig['layout']['yaxis1']['visible'] = False
-            for error_measure in fig['data']:
-                #get correct text values from original dataframe and round values to 4 decimals
-                error_measure['text'] = np.around(obj[error_measure['name']].values,decimals=4)
+            #traces are in column order, hover text is the rounded original values of each series
+            text = np.around(values,decimals=4)
+            for j, error_measure in enumerate(fig['data']):
+                error_measure['text'] = text[:,j]
                 error_measure['hoverinfo'] = 'text+name'
 
         else:
@@ -171,3 +336,30 @@ def acc_plot(obj,title='',xTitle='',yTitle='',mode='lines+markers',tablewidth=35
     if asFigure == True:
         return fig
     return iplot(fig, show_link=False)
+
+def _acc_summary_figures(obj, title, bins, top_k, rank_metric, tablewidth):
+    """builds histogram figure (one metric shown at a time, picked from a dropdown) and quantile and worst series
+    tables from accuracy_summary"""
+    go, ff, iplot = _init_plotting()
+    quantiles_df, histograms, worst_df = accuracy_summary(obj,bins,top_k,rank_metric)
+
+    metrics = list(histograms)
+    data = []
+    for i, metric in enumerate(metrics):
+        bin_counts, edges = histograms[metric]
+        data.append(go.Bar(x=(edges[:-1] + edges[1:])/2.0,y=bin_counts,width=np.diff(edges),name=metric,visible=i == 0))
+    buttons = [dict(label=metric,method='update',
+                    args=[{'visible':[j == i for j in range(len(metrics))]},{'xaxis':{'title':metric}}])
+               for i, metric in enumerate(metrics)]
+    layout = dict(title=title + ' (%d series)' % obj.shape[1],
+                  xaxis=dict(title=metrics[0] if metrics else ''),
+                  yaxis=dict(title='series'),
+                  bargap=0,
+                  updatemenus=[dict(buttons=buttons,direction='down',x=1.0,y=1.15)])
+    histogram_fig = dict(data=data,layout=layout)
+
+    quantiles_fig = ff.create_table(quantiles_df.round(4),index=True,index_title='Accuracy Measure')
+    rank_name = rank_metric if rank_metric in obj.index else obj.index[0]
+    worst_fig = ff.create_table(worst_df.round(4),index=True,index_title='Worst series by %s' % rank_name)
+    worst_fig.layout.update({'width':max(tablewidth,90*(len(worst_df.columns) + 1))})
+    return {'histogram':histogram_fig,'quantiles':quantiles_fig,'worst':worst_fig}
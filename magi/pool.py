@@ -0,0 +1,84 @@
+import atexit
+import importlib
+import multiprocessing
+import os
+
+#persistent pool of worker processes with embedded R and the forecast package already initialized
+_pool = None
+_pool_workers = None
+
+#error that stopped R from starting in this worker, raised by every task the worker runs
+_worker_error = None
+
+def _init_worker():
+    """initializer for pool workers, starts embedded R and attaches the forecast package once per worker
+    so tasks only pay for the fit itself
+    -if R can't be started the error is kept and raised from the worker's tasks instead, an initializer that
+     raises makes multiprocessing respawn the worker forever and the caller would hang
+    """
+    global _worker_error
+    #imports magi.core (pandas, dask, ...) up front so the first task on each worker doesn't pay for it
+    importlib.import_module('magi.core')
+    from magi.backends import get_R
+    try:
+        get_R()
+    except Exception as err:
+        _worker_error = ImportError('R could not be started on pool worker: %s' % err)
+
+def check_worker():
+    """raises the error that stopped R from starting in this pool worker, if there was one"""
+    if _worker_error is not None:
+        raise _worker_error
+
+def _run_task(func, args):
+    """runs func(*args) on a pool worker once the worker is known to have R"""
+    check_worker()
+    return func(*args)
+
+def get_pool(n_workers=None):
+    """returns persistent pool of R worker processes, creating it on first use or if worker count changes
+    -workers are started with spawn so each gets a fresh embedded R instead of a forked copy of the parent's R
+    -scripts using the pool must guard their entry point with if __name__ == '__main__'
+
+    Args:
+        n_workers: number of worker processes (defaults to number of cpus)
+
+    Returns:
+        pool: multiprocessing pool of initialized R workers
+    """
+    global _pool, _pool_workers
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if _pool is not None and _pool_workers != n_workers:
+        shutdown_pool()
+    if _pool is None:
+        context = multiprocessing.get_context('spawn')
+        _pool = context.Pool(processes=n_workers, initializer=_init_worker)
+        _pool_workers = n_workers
+    return _pool
+
+def map_tasks(func, args_list, n_workers=None):
+    """runs func(*args) for every args tuple in args_list on the R worker pool and returns results in order
+
+    Args:
+        func: module level function to run (must be picklable)
+        args_list: list of argument tuples
+        n_workers: number of worker processes
+
+    Returns:
+        results: list of func return values in same order as args_list
+    """
+    if len(args_list) == 0:
+        return []
+    return get_pool(n_workers).starmap(_run_task, [(func,args) for args in args_list])
+
+def shutdown_pool():
+    """terminates the R worker pool if one is running"""
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.terminate()
+        _pool.join()
+    _pool = None
+    _pool_workers = None
+
+atexit.register(shutdown_pool)
@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import pickle
+import pandas as pd
+
+class _NullPhase(object):
+    """context manager that does nothing, returned by a disabled profiler so instrumented code costs one call"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+class _Phase(object):
+    """context manager timing one phase and appending it to the profiler events"""
+
+    def __init__(self, events, name, series):
+        self.events = events
+        self.name = name
+        self.series = series
+
+    def __enter__(self):
+        self.start = time.time()
+        self.counter = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.events.append({'phase':self.name,
+                            'series':self.series,
+                            'start':self.start,
+                            'duration':time.perf_counter() - self.counter,
+                            'pid':os.getpid()})
+        return False
+
+class Profiler(object):
+
+    """
+    records wall time of each phase of a forecast run, per series where the phase belongs to one series,
+    along with the number and pickled size of tasks sent to worker processes
+    -phases timed on pool workers are sent back with the task results and merged into the calling profiler
+    -a disabled profiler (the default on every forecast object) only returns a shared no-op context manager,
+     so instrumentation can stay in place on production runs
+
+    Attributes:
+        enabled: whether phases and tasks are recorded
+        events: list of dicts with phase, series, start (epoch seconds), duration (seconds) and pid
+        tasks: list of dicts with kind and size (bytes) of every task sent to a worker
+
+    Methods:
+        phase: context manager timing a phase
+        task: records a task and its pickled size
+        summary: dataframe of count, total, mean and max wall time and share of total time by phase
+        series_summary: dataframe of wall time by series and phase
+        task_summary: dataframe of number of tasks and their sizes by kind
+        to_chrome_trace: writes events as chrome trace json (open in chrome://tracing or perfetto)
+        clear: removes all recorded events and tasks
+
+    Examples:
+
+    from magi.profiling import Profiler
+    profiler = Profiler()
+    fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12,profiler=profiler)
+    forecast_df = fc_obj.R(model='ets(rdata)',pred=True)
+    profiler.summary()
+    profiler.to_chrome_trace('forecast_trace.json')
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.events = []
+        self.tasks = []
+
+    def phase(self, name, series=None):
+        """returns context manager timing phase name (optionally of one series)"""
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self.events, name, series)
+
+    def task(self, kind, args):
+        """records a task of kind sent to a worker, with the size of its pickled arguments"""
+        if self.enabled:
+            self.tasks.append({'kind':kind,'size':len(pickle.dumps(args, protocol=pickle.HIGHEST_PROTOCOL))})
+
+    def merge(self, events):
+        """adds events recorded by another profiler (e.g. on a worker process)"""
+        if self.enabled and events:
+            self.events.extend(events)
+
+    def clear(self):
+        """removes all recorded events and tasks"""
+        self.events = []
+        self.tasks = []
+
+    def _events_frame(self):
+        return pd.DataFrame(self.events,columns=['phase','series','start','duration','pid'])
+
+    def summary(self):
+        """returns dataframe indexed by phase with count, total, mean and max duration in seconds and share of total"""
+        events = self._events_frame()
+        summary_df = events.groupby('phase')['duration'].agg(['count','sum','mean','max'])
+        summary_df.columns = ['count','total','mean','max']
+        summary_df['share'] = summary_df['total']/summary_df['total'].sum()
+        return summary_df.sort_values('total',ascending=False)
+
+    def series_summary(self):
+        """returns dataframe of total duration in seconds with one row per series and one column per phase"""
+        events = self._events_frame().dropna(subset=['series'])
+        return events.pivot_table(index='series',columns='phase',values='duration',aggfunc='sum')
+
+    def task_summary(self):
+        """returns dataframe indexed by task kind with number of tasks and total, mean and max pickled size in bytes"""
+        tasks = pd.DataFrame(self.tasks,columns=['kind','size'])
+        summary_df = tasks.groupby('kind')['size'].agg(['count','sum','mean','max'])
+        summary_df.columns = ['tasks','total_bytes','mean_bytes','max_bytes']
+        return summary_df
+
+    def to_chrome_trace(self, path):
+        """writes events to path as chrome trace event format json, one row per process
+
+        Args:
+            path: json file path
+        """
+        trace_events = [{'name':event['phase'],
+                         'cat':'magi',
+                         'ph':'X',
+                         'ts':event['start']*1e6,
+                         'dur':event['duration']*1e6,
+                         'pid':event['pid'],
+                         'tid':event['pid'],
+                         'args':{} if event['series'] is None else {'series':str(event['series'])}}
+                        for event in self.events]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents':trace_events,'displayTimeUnit':'ms'}, f)
+
+#shared disabled profiler used by forecast objects that aren't given one
+NULL_PROFILER = Profiler(enabled=False)
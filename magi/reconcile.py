@@ -0,0 +1,318 @@
+import warnings
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import LinearOperator, cg
+from magi.result import ForecastResult
+
+RECONCILE_METHODS = ('bottom_up','top_down','ols','wls','mint_shrink')
+TOP_DOWN_METHODS = ('average_proportions','proportions_of_averages')
+
+class Hierarchy(object):
+
+    """
+    hierarchy (or grouping) of series with its sparse summing matrix, used to reconcile forecasts made separately
+    at every level so aggregates equal the sum of their leaves
+    -the summing matrix is stored as a scipy sparse matrix with one row per node and one column per leaf,
+     aggregates come first and leaves last, so it has one non zero per leaf for each level it is summed into
+    -reconciliation never builds a dense nodes x nodes (or leaves x leaves) matrix, so hierarchies of hundreds of
+     thousands of leaves fit in memory
+
+    Attributes:
+        structure: dict of aggregate node name to list of child node names (children may be aggregates themselves)
+        nodes: list of every node name, aggregates first then leaves (row order of S)
+        aggregates: list of aggregate node names
+        leaves: list of leaf node names (column order of S)
+        S: sparse nodes x leaves summing matrix
+        total: name of an aggregate of every leaf, None if there is none (top_down needs one)
+
+    Methods:
+        from_levels: builds hierarchy from a dataframe of the group labels of every leaf
+        aggregate: sums a dataframe of leaf series up to every node
+        reconcile: reconciles base forecasts of every node with bottom_up, top_down, ols, wls or mint_shrink
+
+    Examples:
+
+    from magi.reconcile import Hierarchy
+    #levels indexed by sku with the category and region of every sku
+    hierarchy = Hierarchy.from_levels(levels,total='total')
+    all_df = hierarchy.aggregate(sku_df)
+    fc_obj = forecast(time_series=all_df,forecast_periods=18,frequency=12)
+    result = fc_obj.R(model='ets(rdata)')
+    reconciled_df = hierarchy.reconcile(result,method='mint_shrink')
+    """
+
+    def __init__(self, structure):
+        self.structure = {parent:list(children) for parent, children in structure.items()}
+        self.aggregates = list(self.structure)
+        self.leaves = []
+        seen = set(self.aggregates)
+        for children in self.structure.values():
+            for child in children:
+                if child not in seen:
+                    seen.add(child)
+                    self.leaves.append(child)
+        self.nodes = self.aggregates + self.leaves
+        leaf_position = {name:j for j, name in enumerate(self.leaves)}
+
+        #leaf positions of every aggregate, expanded without recursion so deep hierarchies don't hit the stack limit
+        expanded = {}
+        for parent in self.aggregates:
+            stack = [(parent,False)]
+            visiting = set()
+            while stack:
+                node, children_done = stack.pop()
+                if node in expanded:
+                    continue
+                if children_done:
+                    positions = [expanded[child] if child in self.structure else np.array([leaf_position[child]])
+                                 for child in self.structure[node]]
+                    expanded[node] = np.unique(np.concatenate(positions)) if positions else np.array([],dtype=int)
+                    visiting.discard(node)
+                    continue
+                if node in visiting:
+                    raise ValueError('hierarchy has a cycle through %s' % node)
+                visiting.add(node)
+                stack.append((node,True))
+                stack.extend((child,False) for child in self.structure[node] if child in self.structure and child not in expanded)
+
+        rows = [np.full(len(expanded[parent]),i) for i, parent in enumerate(self.aggregates)]
+        columns = [expanded[parent] for parent in self.aggregates]
+        n_aggregates, n_leaves = len(self.aggregates), len(self.leaves)
+        rows.append(n_aggregates + np.arange(n_leaves))
+        columns.append(np.arange(n_leaves))
+        rows, columns = np.concatenate(rows).astype(int), np.concatenate(columns).astype(int)
+        self.S = sparse.csr_matrix((np.ones(len(rows)),(rows,columns)),shape=(n_aggregates + n_leaves,n_leaves))
+
+        self.total = None
+        for i, parent in enumerate(self.aggregates):
+            if len(expanded[parent]) == n_leaves:
+                self.total = parent
+                break
+
+    @classmethod
+    def from_levels(cls, levels, total='total'):
+        """builds hierarchy from the group labels of every leaf, each label becomes an aggregate of its leaves
+        -levels don't have to nest (e.g. category and region of every sku), every column is its own grouping
+
+        Args:
+            levels: dataframe indexed by leaf name with one column per level holding the group label of each leaf,
+                labels must be unique across levels and differ from leaf names
+            total: name of the aggregate of every leaf, None for no total
+
+        Returns:
+            hierarchy: Hierarchy
+        """
+        structure = {}
+        if total is not None:
+            structure[total] = list(levels.index)
+        for level in levels:
+            for label, leaves in levels.groupby(level,sort=False).groups.items():
+                if label in structure:
+                    raise ValueError('group label %s is used more than once, labels must be unique across levels' % label)
+                structure[label] = list(leaves)
+        clashes = set(structure).intersection(levels.index)
+        if clashes:
+            raise ValueError('group labels %s are also leaf names' % ', '.join(map(str,sorted(clashes,key=str))))
+        return cls(structure)
+
+    @property
+    def A(self):
+        """sparse aggregates x leaves aggregation matrix (the aggregate rows of S)"""
+        return self.S[:len(self.aggregates)]
+
+    def aggregate(self, time_series):
+        """sums leaf series up to every node, e.g. to forecast every level of the hierarchy from leaf history
+
+        Args:
+            time_series: dataframe with a column for every leaf
+
+        Returns:
+            all_df: dataframe with one column per node (aggregates first), null where none of a node's leaves has a value
+        """
+        values = time_series[self.leaves].values.astype(float)
+        notnull = ~np.isnan(values)
+        summed = (self.S @ np.where(notnull,values,0.0).T).T
+        counts = (self.S @ notnull.T.astype(float)).T
+        summed[counts == 0] = np.nan
+        return pd.DataFrame(summed,index=time_series.index,columns=self.nodes)
+
+    def reconcile(self,
+                  forecasts,
+                  method='mint_shrink',
+                  residuals=None,
+                  actuals=None,
+                  top_down_method='average_proportions',
+                  dense_limit=2000,
+                  maxiter=None):
+
+        """reconciles base forecasts so every aggregate equals the sum of its leaves
+
+        bottom_up: sums leaf forecasts
+        top_down: splits the total forecast over leaves by their historical proportions
+        ols: least squares projection of every base forecast onto coherent forecasts
+        wls: projection weighted by the in sample residual variance of every node
+        mint_shrink: MinT projection (Wickramasuriya et al 2019) with the residual covariance shrunk toward its
+            diagonal, shrinkage intensity picked as in Schafer and Strimmer 2005
+
+        the projections are solved as y - W C'(C W C')^-1 C y with C = [I, -A], so only an aggregates x aggregates
+        system is solved, directly if there are at most dense_limit aggregates and by preconditioned conjugate
+        gradient otherwise. W is never formed, mint_shrink keeps it as diagonal plus the low rank outer product
+        of the residual matrix (rank at most the number of history rows)
+
+        Args:
+            forecasts: ForecastResult of every node (e.g. from R_dataframe or prophet_dataframe with no output flag set),
+                or dataframe of predicted values with one column per node and one row per horizon step
+            method: one of bottom_up, top_down, ols, wls, mint_shrink
+            residuals: dataframe of in sample residuals of every node (wls and mint_shrink), taken from forecasts
+                if it is a ForecastResult, missing values are left out of each series' mean and variance
+            actuals: dataframe of leaf history (top_down), taken from forecasts if it is a ForecastResult
+            top_down_method: average_proportions (mean of each leaf's share of the total per period) or
+                proportions_of_averages (each leaf's mean over the mean total)
+            dense_limit: most aggregates for which the system is solved directly
+            maxiter: most conjugate gradient iterations per horizon step (scipy default if None)
+
+        Returns:
+            reconciled_df: dataframe of reconciled forecasts with one column per node, same index as forecasts
+        """
+        if method not in RECONCILE_METHODS:
+            raise ValueError('method must be one of %s' % ', '.join(RECONCILE_METHODS))
+        if isinstance(forecasts, ForecastResult):
+            if residuals is None:
+                residuals = forecasts.residuals
+            if actuals is None:
+                actuals = forecasts.time_series
+            forecasts = forecasts.predicted
+
+        if method == 'bottom_up':
+            leaf_forecasts = self._forecast_values(forecasts,self.leaves)
+            reconciled = self.S @ leaf_forecasts
+        elif method == 'top_down':
+            if self.total is None:
+                raise ValueError('top_down needs an aggregate of every leaf, build the hierarchy with a total')
+            if actuals is None:
+                raise ValueError('top_down needs the leaf history as actuals')
+            proportions = self._proportions(actuals,top_down_method)
+            total_forecast = self._forecast_values(forecasts,[self.total])
+            reconciled = self.S @ (proportions.reshape(-1,1)*total_forecast)
+        else:
+            base = self._forecast_values(forecasts,self.nodes)
+            if method == 'ols':
+                diagonal, low_rank = np.ones(len(self.nodes)), None
+            else:
+                if residuals is None:
+                    raise ValueError('%s needs in sample residuals of every node' % method)
+                diagonal, low_rank = _shrunk_covariance(residuals[self.nodes].values.astype(float),shrink=method == 'mint_shrink')
+            reconciled = self._project(base,diagonal,low_rank,dense_limit,maxiter)
+
+        return pd.DataFrame(np.asarray(reconciled).T,index=forecasts.index,columns=self.nodes)
+
+    def _forecast_values(self, forecasts, names):
+        """returns names x horizon array of forecasts, checking every node has a forecast for every row"""
+        missing = [name for name in names if name not in forecasts.columns]
+        if missing:
+            raise ValueError('forecasts are missing %d nodes, e.g. %s' % (len(missing),missing[0]))
+        values = forecasts[names].values.astype(float).T
+        if np.isnan(values).any():
+            raise ValueError('forecasts of every node must cover the same dates without nulls')
+        return values
+
+    def _proportions(self, actuals, top_down_method):
+        """historical share of the total of every leaf"""
+        if top_down_method not in TOP_DOWN_METHODS:
+            raise ValueError('top_down_method must be one of %s' % ', '.join(TOP_DOWN_METHODS))
+        values = actuals[self.leaves].values.astype(float)
+        values = np.where(np.isnan(values),0.0,values)
+        totals = values.sum(axis=1)
+        if top_down_method == 'proportions_of_averages':
+            return values.mean(axis=0)/totals.mean()
+        nonzero = totals != 0
+        return (values[nonzero]/totals[nonzero].reshape(-1,1)).mean(axis=0)
+
+    def _project(self, base, diagonal, low_rank, dense_limit, maxiter):
+        """returns base - W C'(C W C')^-1 C base for W = diag(diagonal) + low_rank low_rank'"""
+        n_aggregates = len(self.aggregates)
+        if n_aggregates == 0:
+            return base
+        A = self.A
+        leaf_diagonal = diagonal[n_aggregates:]
+
+        def constrain(x):
+            return x[:n_aggregates] - A @ x[n_aggregates:]
+
+        def constrain_T(z):
+            return np.concatenate([z,-(A.T @ z)])
+
+        def apply_W(x):
+            Wx = diagonal.reshape((-1,) + (1,)*(x.ndim - 1))*x
+            if low_rank is not None:
+                Wx = Wx + low_rank @ (low_rank.T @ x)
+            return Wx
+
+        #C U is aggregates x rank, small whatever the number of leaves
+        CU = None if low_rank is None else constrain(low_rank)
+        residual = constrain(base)
+
+        if n_aggregates <= dense_limit:
+            M = (A.multiply(leaf_diagonal.reshape(1,-1)) @ A.T).toarray()
+            M[np.diag_indices(n_aggregates)] += diagonal[:n_aggregates]
+            if CU is not None:
+                M += CU @ CU.T
+            z = np.linalg.solve(M,residual)
+        else:
+            #jacobi preconditioner from the exact diagonal of C W C'
+            M_diagonal = diagonal[:n_aggregates] + A.multiply(A) @ leaf_diagonal
+            if CU is not None:
+                M_diagonal = M_diagonal + (CU**2).sum(axis=1)
+            M = LinearOperator((n_aggregates,n_aggregates),matvec=lambda z: constrain(apply_W(constrain_T(z))),dtype=float)
+            preconditioner = LinearOperator((n_aggregates,n_aggregates),matvec=lambda z: z/M_diagonal,dtype=float)
+            z = np.empty_like(residual)
+            for k in range(residual.shape[1]):
+                z[:,k], info = cg(M,residual[:,k],M=preconditioner,maxiter=maxiter)
+                if info > 0:
+                    warnings.warn('conjugate gradient did not converge for horizon step %d after %d iterations' % (k + 1,info))
+        return base - apply_W(constrain_T(z))
+
+def _shrunk_covariance(residuals, shrink=True):
+    """returns diagonal and low rank factor U of residual covariance W = diag(diagonal) + U U'
+    -without shrink W is the diagonal of residual variances (wls)
+    -with shrink the correlation matrix is shrunk toward the identity, W = D^1/2 (lambda I + (1 - lambda) R) D^1/2,
+     lambda is computed from the T x T gram matrix of standardized residuals, so it costs O(nodes T^2) rather than
+     O(nodes^2 T)
+    -series are centered and scaled over their own non null residuals and missing residuals count as zero
+     in the cross products, so series with shorter histories still contribute
+
+    Args:
+        residuals: history x nodes array of in sample residuals
+
+    Returns:
+        diagonal: array of diagonal of W
+        low_rank: nodes x history array U, None without shrink
+    """
+    notnull = ~np.isnan(residuals)
+    counts = notnull.sum(axis=0)
+    if (counts < 2).any():
+        raise ValueError('every node needs at least 2 non null residuals')
+    means = np.where(notnull,residuals,0.0).sum(axis=0)/counts
+    centered = np.where(notnull,residuals - means,0.0)
+    variances = (centered**2).sum(axis=0)/(counts - 1)
+    variances = np.where(variances > 0,variances,np.finfo(float).tiny)
+    if not shrink:
+        return variances, None
+
+    T = residuals.shape[0]
+    X = centered/np.sqrt(variances)
+    squares = X**2
+    column_squares = squares.sum(axis=0)
+    gram = X @ X.T
+    off_diagonal = (gram**2).sum() - (column_squares**2).sum()
+    off_diagonal_fourth = (squares.sum(axis=1)**2).sum() - (squares**2).sum()
+    correlation_variance = T/(T - 1.0)**3*(off_diagonal_fourth - off_diagonal/T)
+    correlation_squares = off_diagonal/(T - 1.0)**2
+    shrinkage = 1.0 if correlation_squares <= 0 else min(max(correlation_variance/correlation_squares,0.0),1.0)
+
+    #correlation estimate is X'X/(T-1) with its diagonal replaced by 1
+    scale = np.sqrt((1 - shrinkage)/(T - 1.0))
+    low_rank = centered.T*scale
+    diagonal = variances*(1 - (1 - shrinkage)*column_squares/(T - 1.0))
+    return diagonal, low_rank
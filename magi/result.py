@@ -0,0 +1,226 @@
+import numpy as np
+import pandas as pd
+
+#outputs that can be materialized as dataframes from a ForecastResult
+RESULT_OUTPUTS = ('predicted','lower','upper','fitted','residuals','full_fit','full_actuals')
+
+class ForecastResult(object):
+
+    """
+    columnar container holding every output of one forecast run over a dataframe of series
+    -outputs are stored once as contiguous numpy arrays, series x horizon for forecasts and bounds and
+     series x history for fitted values and residuals
+    -pandas dataframes are only built when an output is first asked for and then cached
+    -actual values aren't copied, the input dataframe is referenced and combined with forecasts on demand
+
+    Attributes:
+        time_series: input dataframe the forecasts were made from
+        mean: series x horizon array of point forecasts
+        lower: series x horizon array of lower prediction interval limits
+        upper: series x horizon array of upper prediction interval limits
+        fitted_values: series x history array of fitted values aligned to time_series rows
+        residual_values: series x history array of residuals aligned to time_series rows
+        method: list of method name of each series
+        level: confidence level of the prediction intervals
+        freq_string: pandas frequency string of the index
+
+    Methods:
+        frame: returns dataframe of one output (predicted, lower, upper, fitted, residuals, full_fit, full_actuals)
+        series: returns forecast dict of one series (same keys as R_series except model and x)
+        to_long: returns long format dataframe of every output with one row per series and date
+
+    Examples:
+
+    fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12)
+    result = fc_obj.R(model='ets(rdata)')
+    result.predicted
+    result.residuals
+    result.frame('upper')
+    """
+
+    def __init__(self, time_series, mean, lower, upper, fitted_values, residual_values, method, level, freq_string):
+        self.time_series = time_series
+        self.mean = np.ascontiguousarray(mean,dtype=float)
+        self.lower = np.ascontiguousarray(lower,dtype=float)
+        self.upper = np.ascontiguousarray(upper,dtype=float)
+        self.fitted_values = np.ascontiguousarray(fitted_values,dtype=float)
+        self.residual_values = np.ascontiguousarray(residual_values,dtype=float)
+        self.method = list(method)
+        self.level = level
+        self.freq_string = freq_string
+        self._frames = {}
+
+        #last non null row of every series, forecasts of a series start on the following period
+        notnull = time_series.notna().values
+        self.ends = len(time_series.index) - 1 - notnull[::-1].argmax(axis=0)
+
+    @classmethod
+    def from_dicts(cls, time_series, forecasted, level, freq_string):
+        """builds result from per series forecast dicts (as returned by R_series or prophet_series)
+
+        Args:
+            time_series: input dataframe
+            forecasted: dict of column name to dict with predicted, lower, upper, fitted, residuals and method
+            level: confidence level of the prediction intervals
+            freq_string: pandas frequency string of the index
+
+        Returns:
+            result: ForecastResult
+        """
+        columns = time_series.columns
+        nseries, nrow = len(columns), len(time_series.index)
+        forecast_periods = len(forecasted[columns[0]]['predicted']) if nseries > 0 else 0
+        mean = np.full((nseries,forecast_periods),np.nan)
+        lower = np.full((nseries,forecast_periods),np.nan)
+        upper = np.full((nseries,forecast_periods),np.nan)
+        fitted_values = np.full((nseries,nrow),np.nan)
+        residual_values = np.full((nseries,nrow),np.nan)
+        method = []
+        for j, name in enumerate(columns):
+            outputs = forecasted[name]
+            mean[j] = np.asarray(outputs['predicted'],dtype=float).ravel()
+            lower[j] = np.asarray(outputs['lower'],dtype=float).ravel()
+            upper[j] = np.asarray(outputs['upper'],dtype=float).ravel()
+            positions = time_series.index.get_indexer(outputs['fitted'].index)
+            fitted_values[j,positions] = outputs['fitted'].values
+            positions = time_series.index.get_indexer(outputs['residuals'].index)
+            residual_values[j,positions] = outputs['residuals'].values
+            method.append(outputs.get('method'))
+        return cls(time_series,mean,lower,upper,fitted_values,residual_values,method,level,freq_string)
+
+    @classmethod
+    def concat(cls, time_series, block_arrays, level, freq_string):
+        """builds result from output arrays of consecutive column blocks of time_series
+
+        Args:
+            time_series: input dataframe
+            block_arrays: list of dicts of mean, lower, upper, fitted_values, residual_values arrays and method list,
+                one per block of columns in the same order as time_series columns
+            level: confidence level of the prediction intervals
+            freq_string: pandas frequency string of the index
+
+        Returns:
+            result: ForecastResult
+        """
+        stacked = {}
+        for key in ('mean','lower','upper','fitted_values','residual_values'):
+            stacked[key] = np.concatenate([arrays[key] for arrays in block_arrays],axis=0)
+        method = [name for arrays in block_arrays for name in arrays['method']]
+        return cls(time_series,stacked['mean'],stacked['lower'],stacked['upper'],stacked['fitted_values'],
+                   stacked['residual_values'],method,level,freq_string)
+
+    def __len__(self):
+        return len(self.time_series.columns)
+
+    @property
+    def predicted(self):
+        """dataframe of point forecasts"""
+        return self.frame('predicted')
+
+    @property
+    def fitted(self):
+        """dataframe of fitted values"""
+        return self.frame('fitted')
+
+    @property
+    def residuals(self):
+        """dataframe of residuals"""
+        return self.frame('residuals')
+
+    @property
+    def full_fit(self):
+        """dataframe of fitted followed by predicted values"""
+        return self.frame('full_fit')
+
+    @property
+    def full_actuals(self):
+        """dataframe of actual followed by predicted values"""
+        return self.frame('full_actuals')
+
+    def frame(self, output):
+        """returns dataframe of output with one column per series, built on first use and cached
+
+        Args:
+            output: one of predicted, lower, upper, fitted, residuals, full_fit, full_actuals
+
+        Returns:
+            output_df: dataframe of output
+        """
+        if output not in RESULT_OUTPUTS:
+            raise ValueError('output must be one of %s' % ', '.join(RESULT_OUTPUTS))
+        if output not in self._frames:
+            self._frames[output] = self._build_frame(output)
+        return self._frames[output]
+
+    def _build_frame(self, output):
+        """builds dataframe of output from the arrays"""
+        time_series = self.time_series
+        if output == 'fitted':
+            return pd.DataFrame(self.fitted_values.T,index=time_series.index,columns=time_series.columns)
+        if output == 'residuals':
+            return pd.DataFrame(self.residual_values.T,index=time_series.index,columns=time_series.columns)
+
+        nrow, nseries = len(time_series.index), len(time_series.columns)
+        forecast_periods = self.mean.shape[1]
+        #index running past the input by the horizon so the forecasts of every series fit
+        index = pd.date_range(start=time_series.index[0],periods=nrow + forecast_periods,freq=self.freq_string)
+        output_values = np.full((nrow + forecast_periods,nseries),np.nan)
+        if output == 'full_fit':
+            output_values[:nrow] = self.fitted_values.T
+        elif output == 'full_actuals':
+            output_values[:nrow] = time_series.values
+        forecast_values = {'lower':self.lower,'upper':self.upper}.get(output,self.mean)
+        rows = self.ends + 1 + np.arange(forecast_periods).reshape(-1,1)
+        output_values[rows,np.arange(nseries)] = forecast_values.T
+        output_df = pd.DataFrame(output_values,index=index,columns=time_series.columns)
+        return output_df.dropna(how='all')
+
+    def series(self, name):
+        """returns forecast dict of one series with same keys as R_series, except model and x
+
+        Args:
+            name: column name of series
+
+        Returns:
+            forecast_dict: dict of method, predicted, lower, upper, level, residuals, fitted, full_fit
+        """
+        j = self.time_series.columns.get_loc(name)
+        valid = ~np.isnan(self.time_series.values[:,j])
+        start, end = valid.argmax(), self.ends[j]
+        history_index = self.time_series.index[start:end + 1]
+        index = pd.date_range(start=history_index[-1],periods=self.mean.shape[1] + 1,freq=self.freq_string)[1:]
+        predicted_series = pd.Series(self.mean[j],index=index)
+        fitted_series = pd.Series(self.fitted_values[j,start:end + 1],index=history_index)
+        residual_series = pd.Series(self.residual_values[j,start:end + 1],index=history_index)
+        return {'method':self.method[j],'predicted':predicted_series,'lower':self.lower[j],'upper':self.upper[j],
+                'level':self.level,'residuals':residual_series,'fitted':fitted_series,
+                'full_fit':pd.concat([fitted_series,predicted_series])}
+
+    def to_long(self):
+        """returns long format dataframe with columns series, ds, fitted, predicted, lower, upper
+        (fitted is null on forecast rows and the forecast columns are null on history rows)
+        """
+        time_series = self.time_series
+        nrow = len(time_series.index)
+        forecast_periods = self.mean.shape[1]
+        valid = time_series.notna().values.T
+        starts = valid.argmax(axis=1)
+
+        #history rows of every series between its first and last observation
+        history_rows = np.arange(nrow) >= starts.reshape(-1,1)
+        history_rows &= np.arange(nrow) <= self.ends.reshape(-1,1)
+        series_position, row_position = np.nonzero(history_rows)
+        history = pd.DataFrame({'series':time_series.columns.values[series_position].astype(str),
+                                'ds':time_series.index.values[row_position],
+                                'fitted':self.fitted_values[series_position,row_position]})
+
+        index = pd.date_range(start=time_series.index[0],periods=nrow + forecast_periods,freq=self.freq_string)
+        future_rows = (self.ends.reshape(-1,1) + 1 + np.arange(forecast_periods)).ravel()
+        future = pd.DataFrame({'series':np.repeat(time_series.columns.values.astype(str),forecast_periods),
+                               'ds':index.values[future_rows],
+                               'predicted':self.mean.ravel(),
+                               'lower':self.lower.ravel(),
+                               'upper':self.upper.ravel()})
+        long_df = pd.concat([history,future],ignore_index=True,sort=False)
+        long_df = long_df.sort_values(['series','ds'],kind='mergesort').reset_index(drop=True)
+        return long_df[['series','ds','fitted','predicted','lower','upper']]
@@ -0,0 +1,74 @@
+import os
+import pickle
+
+class ParamStore(object):
+
+    """
+    dict like store of fitted model parameters keyed by series name, optionally persisted to a pickle file
+    so parameters fitted in one run can be used to warm start the next one
+
+    Attributes:
+        path: file path the store is loaded from and saved to (optional, in memory only if None)
+        params: dict of series name to fitted parameters
+
+    Methods:
+        get: returns parameters for series name or default if not stored
+        update: adds or replaces parameters from a dict of series name to parameters
+        save: writes store to path
+        clear: removes all stored parameters
+
+    Examples:
+
+    store = ParamStore('prophet_params.pkl')
+    fc_obj = forecast(time_series=df,forecast_periods=18,frequency=12)
+    forecast_df = fc_obj.prophet(pred=True,param_store=store)
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.params = {}
+        if path is not None and os.path.exists(path):
+            with open(path, 'rb') as f:
+                self.params = pickle.load(f)
+
+    def __getitem__(self, name):
+        return self.params[name]
+
+    def __setitem__(self, name, value):
+        self.params[name] = value
+
+    def __contains__(self, name):
+        return name in self.params
+
+    def __len__(self):
+        return len(self.params)
+
+    def get(self, name, default=None):
+        """returns stored parameters for series name, or default if series hasn't been stored"""
+        return self.params.get(name, default)
+
+    def update(self, params):
+        """adds or replaces parameters from dict of series name to parameters, skipping None values"""
+        for name in params:
+            if params[name] is not None:
+                self.params[name] = params[name]
+
+    def save(self, path=None):
+        """writes store to path (defaults to the path store was created with)
+
+        Args:
+            path: file path to pickle parameters to
+        """
+        if path is None:
+            path = self.path
+        if path is None:
+            raise ValueError('no path given to save parameter store to')
+        #write to temporary file first so an interrupted save can't corrupt the existing store
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self.params, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def clear(self):
+        """removes all stored parameters"""
+        self.params = {}
@@ -0,0 +1,105 @@
+import os
+import pandas as pd
+from magi.core import forecast
+
+def forecast_parquet(input_path,
+                     output_path,
+                     forecast_periods,
+                     frequency,
+                     method='R',
+                     model=None,
+                     backend='R',
+                     batch_size=1000,
+                     index_column=None,
+                     confidence_level=None,
+                     n_workers=None,
+                     scheduler=None,
+                     R_batch_size=None,
+                     changepoint_prior_scale=.35,
+                     param_store=None,
+                     cache=None,
+                     resume=False):
+
+    """forecasts a wide parquet dataset of series (one column per series, one row per period) batch by batch
+    so memory is bounded by batch_size rather than by number of series
+    -only index column and batch_size series columns are read at a time
+    -every batch is written as its own part file to output_path as soon as it is forecasted, in long format with
+     columns series, ds, fitted, predicted, lower, upper (fitted is null on forecast rows, the others on history rows)
+
+    Args:
+        input_path: parquet file or directory of parquet files with one column per series
+        output_path: directory the output part files are written to (created if it doesn't exist)
+        forecast_periods: num periods to forecast
+        frequency: frequency of time series
+        method: 'R' or 'prophet'
+        model: R forecast model string, make sure you leave rdata as rdata (only used for R)
+        backend: 'R' to run model in R, 'numpy' to compute baseline models (naive, snaive, meanf, rwf, thetaf) for
+            every series of a batch at once without R (see magi.baseline), only used for R
+        batch_size: number of series read, forecasted and written at a time
+        index_column: name of date column (defaults to the pandas index stored in the parquet metadata)
+        confidence_level: confidence level for upper and lower bounds of forecast
+        n_workers: number of R worker processes
+        scheduler: 'pool' or 'dask', see forecast
+        R_batch_size: if set, each R call forecasts blocks of R_batch_size columns (only used for R)
+        changepoint_prior_scale: flexibility in prophet model to change trendpoint (only used for prophet)
+        param_store: ParamStore used to warm start prophet fits (only used for prophet)
+        cache: ForecastCache, series unchanged since they were cached aren't refitted (see magi.cache)
+        resume: if True, batches whose part file already exists in output_path are skipped
+
+    Returns:
+        part_paths: list of part files in output_path, one per batch
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    dataset = ds.dataset(input_path,format='parquet')
+    if index_column is None:
+        pandas_metadata = dataset.schema.pandas_metadata or {}
+        index_columns = [i for i in pandas_metadata.get('index_columns',[]) if isinstance(i, str)]
+        if len(index_columns) != 1:
+            raise ValueError('could not find date column in parquet metadata, pass index_column')
+        index_column = index_columns[0]
+    series_columns = [i for i in dataset.schema.names if i != index_column]
+
+    if not os.path.exists(output_path):
+        os.makedirs(output_path)
+
+    part_paths = []
+    for batch_number, start in enumerate(range(0,len(series_columns),batch_size)):
+        part_path = os.path.join(output_path,'part-%05d.parquet' % batch_number)
+        part_paths.append(part_path)
+        if resume and os.path.exists(part_path):
+            continue
+
+        columns = series_columns[start:start + batch_size]
+        batch_df = dataset.to_table(columns=[index_column] + columns).to_pandas()
+        if index_column in batch_df.columns:
+            batch_df = batch_df.set_index(index_column)
+        batch_df.index = pd.DatetimeIndex(batch_df.index)
+        batch_df = batch_df.sort_index()
+
+        fc_obj = forecast(time_series=batch_df,
+                          forecast_periods=forecast_periods,
+                          frequency=frequency,
+                          confidence_level=confidence_level,
+                          n_workers=n_workers,
+                          scheduler=scheduler,
+                          cache=cache)
+        #no output flag set, so every output of the fit comes back in one ForecastResult
+        if method == 'R' and backend == 'numpy':
+            result = fc_obj.baseline_dataframe(model)
+        elif method == 'R':
+            result = fc_obj.R_dataframe(model,batch_size=R_batch_size)
+        elif method == 'prophet':
+            result = fc_obj.prophet_dataframe(changepoint_prior_scale=changepoint_prior_scale,param_store=param_store)
+        else:
+            raise ValueError("method must be 'R' or 'prophet'")
+
+        batch_output = result.to_long()
+        #write to temporary file first so an interrupted run never leaves a partial part file behind for resume
+        pq.write_table(pa.Table.from_pandas(batch_output,preserve_index=False),part_path + '.tmp')
+        os.replace(part_path + '.tmp',part_path)
+        del batch_df, fc_obj, result, batch_output
+
+    return part_paths
@@ -9,3 +9,62 @@ def gen_ts(freq='MS',ncols=5,nrows=24,num_range=[0,10000],end_date='2018-04-01')
     df_date_index = pd.date_range(end=end_date, periods=nrows, freq=freq)
     df.index = df_date_index
     return df
+
+def gen_synthetic_ts(nseries=1000,
+                     nrows=60,
+                     freq='MS',
+                     seasonal_period=12,
+                     end_date='2018-04-01',
+                     min_length=24,
+                     intermittent_share=0.1,
+                     ragged_end_share=0.1,
+                     seed=None):
+
+    """generates a dataframe of realistic synthetic series for benchmarking, built column wise in numpy
+    so it scales to hundreds of thousands of series
+    -every series is a positive level plus a random linear trend, a seasonal pattern of random amplitude and phase
+     and gaussian noise
+    -intermittent_share of the series are intermittent demand (mostly zeros with occasional positive sizes)
+    -series have random lengths between min_length and nrows, so start dates are ragged, and ragged_end_share
+     of them also stop up to a season before the last row
+
+    Args:
+        nseries: number of series (columns)
+        nrows: number of periods of the longest series
+        freq: pandas frequency string of the date index
+        seasonal_period: length of seasonal cycle in periods (1 for no seasonality)
+        end_date: last date of index
+        min_length: minimum number of non null values of a series
+        intermittent_share: share of series that are intermittent
+        ragged_end_share: share of series that end before the last row
+        seed: seed of random number generator
+
+    Returns:
+        df: dataframe of nrows x nseries with nulls before the start (and after the end) of each series
+    """
+    rng = np.random.RandomState(seed)
+    t = np.arange(nrows).reshape(-1,1)
+    level = rng.lognormal(mean=4.0,sigma=1.0,size=nseries)
+    trend = rng.normal(0.0,0.005,size=nseries)*level
+    amplitude = rng.uniform(0.0,0.3,size=nseries)*level
+    phase = rng.uniform(0.0,2*np.pi,size=nseries)
+    seasonal = amplitude*np.sin(2*np.pi*t/max(seasonal_period,1) + phase) if seasonal_period > 1 else 0.0
+    noise = rng.normal(0.0,1.0,size=(nrows,nseries))*0.05*level
+    values = np.maximum(level + trend*t + seasonal + noise,0.0)
+
+    #intermittent series: demand occurs with low probability and has a random size when it does
+    intermittent = rng.rand(nseries) < intermittent_share
+    occurs = rng.rand(nrows,nseries) < rng.uniform(0.1,0.4,size=nseries)
+    sizes = rng.poisson(rng.uniform(1,10,size=nseries),size=(nrows,nseries)) + 1
+    values[:,intermittent] = np.where(occurs,sizes,0)[:,intermittent]
+
+    #ragged starts and ends
+    lengths = rng.randint(min(min_length,nrows),nrows + 1,size=nseries)
+    ends = np.where(rng.rand(nseries) < ragged_end_share,nrows - 1 - rng.randint(0,max(seasonal_period,1),size=nseries),nrows - 1)
+    starts = np.maximum(ends - lengths + 1,0)
+    values[(t < starts) | (t > ends)] = np.nan
+
+    colnames = ['ts'+str(i) for i in range(nseries)]
+    df = pd.DataFrame(np.round(values,2),columns=colnames)
+    df.index = pd.date_range(end=end_date,periods=nrows,freq=freq)
+    return df
@@ -29,7 +29,7 @@ setup(
       license='MIT',
       packages=[sphinx_doc.__name__],
       python_requires='~=3.5',
-      install_requires=['numpy','pandas','dask','distributed','pystan','rpy2','fbprophet','plotly','cufflinks'],
+      install_requires=['numpy','pandas','scipy','dask','distributed','pystan','rpy2','fbprophet','plotly','cufflinks'],
       setup_requires=['pytest-runner'],
       tests_require=['pytest']
      )
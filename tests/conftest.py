@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from magi import core
+
+class FakeRSeries(object):
+    """stands in for forecast.R_series with the outputs of a naive forecast and records every call
+    -the fitted model state of update mode is the series name and length it was fitted on
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, fc_obj, model, time_series=None, forecast_periods=None, freq=None, confidence_level=None,
+                 update=False, old_model=None):
+        if time_series is None:
+            time_series = fc_obj.time_series
+        x = time_series.dropna()
+        self.calls.append({'name':x.name,'model':model,'update':update,'old_model':old_model,'nobs':len(x),
+                           'regressors':fc_obj.regressors,'regressors_key':fc_obj.regressors_key()})
+        future = pd.date_range(x.index[-1],periods=fc_obj.forecast_periods + 1,freq='MS')[1:]
+        predicted = pd.Series(x.iloc[-1],index=future)
+        forecast_dict = {'model':{},'method':model,'predicted':predicted,'lower':predicted.values - 1,
+                         'upper':predicted.values + 1,'level':80,'x':x,'residuals':x*0,'fitted':x,
+                         'full_fit':pd.concat([x,predicted]),'full_actuals':pd.concat([x,predicted])}
+        if update:
+            forecast_dict['state'] = ('%s:%d' % (x.name,len(x))).encode()
+            forecast_dict['refit'] = old_model is None
+        return forecast_dict
+
+@pytest.fixture
+def fake_R_series(monkeypatch):
+    fake = FakeRSeries()
+    #a plain function so it binds to the forecast object like the method it replaces
+    monkeypatch.setattr(core.forecast,'R_series',lambda self, *args, **kwargs: fake(self,*args,**kwargs))
+    yield fake
+
+class FakeProphet(object):
+    """stands in for fbprophet.Prophet, records the initial values of every fit and forecasts the last value
+    -the fitted k parameter is the series length, so stored parameters identify the run that produced them
+    -like Prophet, the series is scaled by its largest absolute value and predict only returns intervals
+     when uncertainty samples are drawn
+    """
+    fits = []
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.seasonalities = []
+        FakeProphet.instances.append(self)
+
+    def add_regressor(self, name):
+        pass
+
+    def add_seasonality(self, **kwargs):
+        self.seasonalities.append(kwargs)
+
+    def fit(self, df, init=None):
+        if init is not None and init['k'] < 0:
+            raise RuntimeError('initial values do not match model')
+        FakeProphet.fits.append((df['y'].iloc[-1],init))
+        self.history = df
+        self.y_scale = float(df['y'].abs().max())
+        self.params = {'k':np.array([[float(len(df))]]),'m':np.array([[0.0]]),'sigma_obs':np.array([[0.05]]),
+                       'delta':np.zeros((1,3)),'beta':np.zeros((1,2))}
+        return self
+
+    def make_future_dataframe(self, periods, freq, include_history=True):
+        dates = pd.date_range(self.history['ds'].iloc[-1],periods=periods + 1,freq=freq)[1:]
+        if include_history:
+            dates = pd.Index(self.history['ds']).append(dates)
+        return pd.DataFrame({'ds':dates})
+
+    def predict(self, future):
+        yhat = np.full(len(future),float(self.history['y'].iloc[-1]))
+        if self.kwargs.get('uncertainty_samples',1000) == 0:
+            return pd.DataFrame({'ds':future['ds'],'yhat':yhat})
+        return pd.DataFrame({'ds':future['ds'],'yhat':yhat,'yhat_lower':yhat - 1,'yhat_upper':yhat + 1})
+
+@pytest.fixture
+def fake_prophet(monkeypatch):
+    FakeProphet.fits = []
+    FakeProphet.instances = []
+    monkeypatch.setattr(core,'get_prophet',lambda: FakeProphet)
+    yield FakeProphet
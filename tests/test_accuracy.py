@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from magi import accuracy
+from magi.accuracy import accuracy_frame, accuracy_summary
+
+def frames(nrow=30, seed=0):
+    """actuals and predictions of 5 series
+    -a is complete, b starts late, c's predictions stop early, d has a gap in its actuals, e has zero actuals
+    """
+    rng = np.random.RandomState(seed)
+    index = pd.date_range('2018-01-01',periods=nrow,freq='MS')
+    columns = ['a','b','c','d','e']
+    actual = pd.DataFrame(rng.uniform(5,50,(nrow,5)),index=index,columns=columns)
+    predicted = actual + rng.normal(0,3,(nrow,5))
+    actual.iloc[:6,1] = np.nan
+    predicted.iloc[-4:,2] = np.nan
+    actual.iloc[10:13,3] = np.nan
+    actual.iloc[::5,4] = 0.0
+    return actual, predicted
+
+def scalar_metrics(a, p, insample, freq):
+    """accuracy measures of one series from the per series functions"""
+    return {'MAPE':accuracy.mean_absolute_percentage_error(a,p),
+            'SMAPE':accuracy.smape(a,p),
+            'ME':accuracy.mean_error(a,p),
+            'MAE':accuracy.mean_absolute_error(a,p),
+            'MSE':accuracy.mean_squared_error(a,p),
+            'RMSE':accuracy.root_mean_squared_error(a,p),
+            'SSE':accuracy.sum_of_squared_error(a,p),
+            'ThielsU':accuracy.theil_u_statistic(a,p),
+            'ACF1':accuracy.acf1(a,p),
+            'MASE':accuracy.mase(insample,a,p,freq)}
+
+@pytest.mark.parametrize('freq',[1,12])
+@pytest.mark.parametrize('chunk_size',[2,10000])
+def test_matches_per_series_functions(freq, chunk_size):
+    actual, predicted = frames()
+    accuracy_df = accuracy_frame(actual,predicted,freq=freq,chunk_size=chunk_size)
+    assert list(accuracy_df.columns) == list(actual.columns)
+    assert list(accuracy_df.index) == ['MAPE','SMAPE','ME','MAE','MSE','RMSE','SSE','ThielsU','ACF1','MASE']
+    for name in ['a','b','c','e']:
+        #null values are masked per series, the scalar functions see only the rows both have
+        valid = actual[name].notnull() & predicted[name].notnull()
+        a, p = actual[name][valid].values, predicted[name][valid].values
+        expected = scalar_metrics(a,p,actual[name].dropna().values,freq)
+        for metric, value in expected.items():
+            assert accuracy_df.loc[metric,name] == pytest.approx(value,rel=1e-10), (name,metric)
+
+def test_gap_masked_out():
+    actual, predicted = frames()
+    accuracy_df = accuracy_frame(actual,predicted)
+    valid = actual['d'].notnull()
+    a, p = actual['d'][valid].values, predicted['d'][valid].values
+    #rows of the gap count for nothing (ACF1 and MASE pair rows across the gap differently, so aren't compared)
+    expected = scalar_metrics(a,p,a,1)
+    for metric in ('MAPE','SMAPE','ME','MAE','MSE','RMSE','SSE','ThielsU'):
+        assert accuracy_df.loc[metric,'d'] == pytest.approx(expected[metric],rel=1e-10), metric
+    assert accuracy_df['d'].notnull().all()
+
+def test_rows_aligned_on_index():
+    actual, predicted = frames()
+    #predictions only cover the last 12 rows, in reverse order
+    accuracy_df = accuracy_frame(actual,predicted.iloc[-12:].iloc[::-1])
+    a, p = actual['a'].values[-12:], predicted['a'].values[-12:]
+    assert accuracy_df.loc['MAE','a'] == pytest.approx(accuracy.mean_absolute_error(a,p))
+    assert accuracy_df.loc['RMSE','a'] == pytest.approx(accuracy.root_mean_squared_error(a,p))
+
+def test_insample_scales_mase():
+    actual, predicted = frames()
+    insample = pd.DataFrame(np.arange(60.0).reshape(-1,1)*np.ones((1,5)),columns=actual.columns)
+    accuracy_df = accuracy_frame(actual,predicted,insample=insample,freq=4,chunk_size=3)
+    #in sample seasonal naive error of a straight line is the step times freq
+    np.testing.assert_allclose(accuracy_df.loc['MASE'].values,accuracy_df.loc['MAE'].values/4.0)
+
+def test_separate_series_dispatch():
+    actual, predicted = frames()
+    pd.testing.assert_frame_equal(accuracy.accuracy(actual,predicted,separate_series=True,freq=12),
+                                  accuracy_frame(actual,predicted,freq=12))
+
+def metrics_frame(nseries=200, seed=0):
+    rng = np.random.RandomState(seed)
+    values = np.vstack([rng.uniform(0,10,nseries),rng.normal(0,3,nseries)])
+    obj = pd.DataFrame(values,index=['MAE','MASE'],columns=['s%d' % i for i in range(nseries)])
+    obj.iloc[0,1] = np.nan
+    obj.iloc[0,2] = np.inf
+    return obj
+
+def test_summary_quantiles():
+    obj = metrics_frame()
+    quantiles_df, histograms, worst_df = accuracy_summary(obj)
+    assert list(quantiles_df.columns) == ['count','mean','min','p5','p25','p50','p75','p95','max']
+    assert list(quantiles_df.index) == ['MAE','MASE']
+    for metric in obj.index:
+        #infinite values count as missing
+        values = obj.loc[metric].replace(np.inf,np.nan).dropna().values
+        row = quantiles_df.loc[metric]
+        assert row['count'] == len(values)
+        assert row['mean'] == pytest.approx(values.mean())
+        assert row['min'] == values.min() and row['max'] == values.max()
+        np.testing.assert_allclose(row[['p5','p25','p50','p75','p95']].values.astype(float),
+                                   np.quantile(values,[0.05,0.25,0.5,0.75,0.95]))
+    assert quantiles_df.loc['MAE','count'] == 198
+
+def test_summary_histograms():
+    obj = metrics_frame()
+    obj.iloc[1,0] = 1e6
+    histograms = accuracy_summary(obj,bins=20)[1]
+    counts, edges = histograms['MASE']
+    assert len(counts) == 20 and len(edges) == 21
+    #every valid series is counted, the outlier lands in the last bin without stretching the range
+    assert counts.sum() == 200
+    assert edges[-1] < 100
+    assert histograms['MAE'][0].sum() == 198
+
+def test_summary_worst_series():
+    obj = metrics_frame()
+    worst_df = accuracy_summary(obj,top_k=5)[2]
+    expected = obj.loc['MASE'].abs().sort_values(ascending=False).index[:5]
+    assert list(worst_df.index) == list(expected)
+    assert list(worst_df.columns) == ['MAE','MASE']
+    pd.testing.assert_frame_equal(worst_df,obj[expected].T)
+    #ranked by the first metric when rank_metric isn't in the frame
+    worst_df = accuracy_summary(obj,top_k=3,rank_metric='RMSE')[2]
+    assert list(worst_df.index) == list(obj.loc['MAE'].replace(np.inf,np.nan).sort_values(ascending=False).index[:3])
+
+def test_summary_top_k_larger_than_series():
+    obj = metrics_frame(nseries=4)
+    obj.iloc[1,2] = np.nan
+    quantiles_df, histograms, worst_df = accuracy_summary(obj,top_k=10)
+    #every series is returned, the one missing its rank metric last
+    assert len(worst_df) == 4
+    assert worst_df.index[-1] == 's2'
+    assert accuracy_summary(obj,top_k=0)[2].empty
+
+def test_summary_all_null_metric():
+    obj = metrics_frame(nseries=10)
+    obj.loc['MAPE'] = np.inf
+    quantiles_df, histograms = accuracy_summary(obj)[:2]
+    assert quantiles_df.loc['MAPE','count'] == 0
+    assert quantiles_df.loc['MAPE'].drop('count').isnull().all()
+    assert 'MAPE' not in histograms
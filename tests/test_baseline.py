@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+from statistics import NormalDist
+
+from magi.baseline import baseline_forecast, is_baseline_model
+from magi.core import forecast
+
+H = 6
+Z80 = NormalDist().inv_cdf(0.9)
+
+def series(n=30, seed=0):
+    """positive seasonal series with trend and noise, period 4"""
+    rng = np.random.RandomState(seed)
+    t = np.arange(n)
+    return 50 + 0.5*t + 5*np.tile([1.0,-2.0,3.0,-2.0],n//4 + 1)[:n] + rng.normal(0,1,n)
+
+def closed_form(y, model, m=4):
+    """point forecasts and standard errors of the R forecast package baseline models written out per series"""
+    n = len(y)
+    h = np.arange(1,H + 1)
+    if model == 'naive':
+        sigma = np.sqrt(np.mean(np.diff(y)**2))
+        return np.repeat(y[-1],H), sigma*np.sqrt(h)
+    if model == 'snaive':
+        sigma = np.sqrt(np.mean((y[m:] - y[:-m])**2))
+        return y[n - m + (h - 1) % m], sigma*np.sqrt((h - 1)//m + 1)
+    if model == 'meanf':
+        return np.repeat(y.mean(),H), np.repeat(y.std(ddof=1)*np.sqrt(1 + 1.0/n),H)
+    #rwf(rdata,drift=TRUE)
+    drift = np.mean(np.diff(y))
+    sigma = np.sqrt(np.sum((np.diff(y) - drift)**2)/(n - 2))
+    return y[-1] + h*drift, sigma*np.sqrt(h*(1 + h/(n - 1.0)))
+
+@pytest.mark.parametrize('model',['naive','snaive','meanf','rwf(rdata,drift=TRUE)'])
+def test_closed_form_forecasts_and_intervals(model):
+    y = series()
+    arrays = baseline_forecast(y,model,H,4,80.0)
+    mean, se = closed_form(y,model)
+    np.testing.assert_allclose(arrays['mean'][:,0],mean,rtol=1e-12)
+    #normal intervals, width is twice z times the standard error of each step
+    np.testing.assert_allclose(arrays['upper'][:,0] - arrays['lower'][:,0],2*Z80*se,rtol=1e-12)
+    np.testing.assert_allclose(arrays['upper'][:,0] - arrays['mean'][:,0],Z80*se,rtol=1e-12)
+    #residuals are actual minus fitted wherever there is a fitted value
+    fitted = arrays['fitted'][:,0]
+    valid = ~np.isnan(fitted)
+    np.testing.assert_allclose(fitted[valid] + arrays['residuals'][valid,0],y[valid])
+
+def test_rwf_without_drift_is_naive():
+    y = series()
+    naive, rwf = baseline_forecast(y,'naive',H,4), baseline_forecast(y,'rwf',H,4)
+    np.testing.assert_array_equal(naive['mean'],rwf['mean'])
+    np.testing.assert_array_equal(naive['upper'],rwf['upper'])
+    assert rwf['method'] == 'Random walk'
+
+def test_fitted_values():
+    y = series()
+    assert np.isnan(baseline_forecast(y,'naive',H,4)['fitted'][0,0])
+    np.testing.assert_allclose(baseline_forecast(y,'naive',H,4)['fitted'][1:,0],y[:-1])
+    np.testing.assert_allclose(baseline_forecast(y,'snaive',H,4)['fitted'][4:,0],y[:-4])
+    np.testing.assert_allclose(baseline_forecast(y,'meanf',H,4)['fitted'][:,0],np.repeat(y.mean(),len(y)))
+
+def test_thetaf_on_linear_series():
+    #smoothing settles on alpha near 1 for a straight line, the forecast then continues it at half the slope
+    y = 10 + 2.0*np.arange(24)
+    arrays = baseline_forecast(y,'thetaf',H,1)
+    np.testing.assert_allclose(arrays['mean'][:,0],y[-1] + np.arange(1,H + 1),rtol=1e-3)
+    assert arrays['method'] == 'Theta'
+
+def test_thetaf_intervals():
+    #a random walk, so smoothing keeps a large alpha and the intervals visibly widen
+    y = 100 + np.cumsum(np.random.RandomState(3).normal(0,1,40))
+    arrays = baseline_forecast(y,'thetaf',H,1)
+    se = (arrays['upper'][:,0] - arrays['mean'][:,0])/Z80
+    #standard errors grow as sqrt(1 + (h - 1) alpha^2), so the squared growth is linear in h
+    growth = se**2/se[0]**2 - 1
+    assert growth[1] > 0.1
+    np.testing.assert_allclose(growth,growth[1]*np.arange(H),rtol=1e-8)
+    #the first step's standard error is the in sample residual standard deviation with two parameters
+    residuals = arrays['residuals'][:,0]
+    residuals = residuals[~np.isnan(residuals)]
+    assert se[0] == pytest.approx(np.sqrt(np.sum(residuals**2)/(len(y) - 2.0)))
+
+@pytest.mark.parametrize('model',['naive','snaive','meanf','rwf(rdata,drift=TRUE)','thetaf'])
+def test_columns_independent_and_ragged(model):
+    #each column of a frame gets the forecast it would get on its own, wherever it starts and ends
+    a, b = series(30,seed=1), series(22,seed=2)
+    values = np.full((34,2),np.nan)
+    values[:30,0] = a
+    values[8:30,1] = b
+    frame_arrays = baseline_forecast(values,model,H,4)
+    for j, y in enumerate((a,b)):
+        single = baseline_forecast(y,model,H,4)
+        np.testing.assert_allclose(frame_arrays['mean'][:,j],single['mean'][:,0],rtol=1e-10)
+        np.testing.assert_allclose(frame_arrays['lower'][:,j],single['lower'][:,0],rtol=1e-10)
+    np.testing.assert_allclose(frame_arrays['fitted'][8:30,1],baseline_forecast(b,model,H,4)['fitted'][:,0],rtol=1e-10)
+    assert np.isnan(frame_arrays['fitted'][30:]).all()
+
+def test_unsupported_model():
+    assert is_baseline_model('rwf(rdata,drift=TRUE)')
+    assert not is_baseline_model('ets(rdata)')
+    with pytest.raises(ValueError):
+        baseline_forecast(series(),'ets(rdata)',H,4)
+
+def test_baseline_series_outputs():
+    index = pd.date_range('2018-01-01',periods=30,freq='MS')
+    time_series = pd.Series(series(),index=index,name='a')
+    forecast_dict = forecast(time_series=time_series,forecast_periods=H,frequency=12).baseline_series('naive')
+    assert forecast_dict['method'] == 'Naive method'
+    assert list(forecast_dict['predicted'].index) == list(pd.date_range('2020-07-01',periods=H,freq='MS'))
+    assert (forecast_dict['predicted'] == time_series.iloc[-1]).all()
+    assert len(forecast_dict['full_fit']) == len(forecast_dict['full_actuals']) == 30 + H
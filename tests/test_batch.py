@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from magi import core
+
+class FakeBatchRfunc(object):
+    """stands in for the compiled batch R function, forecasts every column of the matrix with a naive model
+    -a column with fewer than 3 observations fails to fit and gets NA outputs, like the tryCatch in R
+    -outputs are flattened column major, the way R matrices come back through rpy2
+    """
+
+    def __init__(self, horizon):
+        self.horizon = horizon
+        self.calls = []
+
+    def __call__(self, mat, freq):
+        self.calls.append(mat.shape)
+        nrow, ncol = mat.shape
+        mean = np.full((self.horizon,ncol),np.nan)
+        fitted = np.full((nrow,ncol),np.nan)
+        method = []
+        for j in range(ncol):
+            idx = np.flatnonzero(~np.isnan(mat[:,j]))
+            if len(idx) < 3:
+                method.append(None)
+                continue
+            rows = np.arange(idx[0],idx[-1] + 1)
+            mean[:,j] = mat[rows[-1],j]
+            fitted[rows[1:],j] = mat[rows[:-1],j]
+            method.append('Naive method')
+        outputs = {'mean':mean,'lower':mean - 1,'upper':mean + 1,'fitted':fitted,'residuals':mat - fitted}
+        outputs = {key:value.ravel(order='F') for key, value in outputs.items()}
+        outputs['method'] = method
+        return FakeRList(outputs)
+
+class FakeRList(object):
+
+    def __init__(self, items):
+        self.items = items
+
+    def rx2(self, name):
+        return self.items[name]
+
+class FakeR(object):
+    """stands in for rpy2.robjects, parsing any R source gives the fake batch function"""
+
+    def __init__(self, horizon):
+        self.parsed = []
+        self.rfunc = FakeBatchRfunc(horizon)
+
+    def r(self, source):
+        self.parsed.append(source)
+        return self.rfunc
+
+@pytest.fixture
+def fake_R(monkeypatch):
+    fake = FakeR(horizon=3)
+    monkeypatch.setattr(core,'get_R',lambda: fake)
+    #the matrix is handed over as is, the fake function reads it directly
+    monkeypatch.setattr(core,'to_R_matrix',lambda values: values)
+    core.clear_rfunc_cache()
+    yield fake
+    core.clear_rfunc_cache()
+
+def frame():
+    index = pd.date_range('2018-01-01',periods=12,freq='MS')
+    df = pd.DataFrame({'a':np.arange(12.0),'b':np.arange(12.0) + 100,'c':np.nan,'d':np.arange(12.0)*2},index=index)
+    #b starts late, c has too few observations to fit
+    df.iloc[:4,1] = np.nan
+    df.iloc[10:,2] = [1.0,2.0]
+    return df
+
+def test_batch_forecasts_every_block(fake_R):
+    df = frame()
+    fc_obj = core.forecast(time_series=df,forecast_periods=3,frequency=12,scheduler='dask')
+    result = fc_obj.R(model='naive(rdata,h=3)',batch_size=2)
+    #two blocks of two columns, one R function parsed for both
+    assert sorted(fake_R.rfunc.calls) == [(12,2),(12,2)]
+    assert len(fake_R.parsed) == 1
+    assert 'tryCatch' in fake_R.parsed[0]
+
+    predicted = result.predicted
+    assert list(predicted.columns) == ['a','b','c','d']
+    np.testing.assert_array_equal(predicted['a'].values,[11.0,11.0,11.0])
+    np.testing.assert_array_equal(predicted['d'].values,[22.0,22.0,22.0])
+    assert predicted.index[0] == pd.Timestamp('2019-01-01')
+    np.testing.assert_array_equal(result.frame('upper')['b'].values - result.frame('lower')['b'].values,[2.0,2.0,2.0])
+    #fitted values keep their rows, b's leading nulls stay null
+    assert result.fitted['b'].iloc[:5].isnull().all()
+    assert result.fitted['b'].iloc[5] == 104.0
+
+def test_failed_series_gives_null_column(fake_R):
+    df = frame()
+    fc_obj = core.forecast(time_series=df,forecast_periods=3,frequency=12,scheduler='dask')
+    result = fc_obj.R(model='naive(rdata,h=3)',batch_size=4)
+    assert result.predicted['c'].isnull().all()
+    assert result.fitted['c'].isnull().all()
+    assert result.method == ['Naive method','Naive method',None,'Naive method']
+    #the other series of the block are unaffected
+    assert result.predicted[['a','b','d']].notnull().all().all()
+
+def test_batch_with_R_failed_series_gives_null_column():
+    pytest.importorskip('rpy2')
+    df = frame()
+    #an all null column can't even be trimmed, so its fit always errors
+    df['c'] = np.nan
+    fc_obj = core.forecast(time_series=df,forecast_periods=3,frequency=12,scheduler='dask')
+    result = fc_obj.R(model='ets(rdata)',batch_size=4)
+    assert result.predicted['c'].isnull().all()
+    assert result.predicted[['a','b','d']].notnull().all().all()
@@ -0,0 +1,140 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from magi.cache import ForecastCache, CACHED_OUTPUTS
+
+SPEC = ('R','ets(rdata)',2,12,80.0)
+
+def series(values, name='ts0'):
+    return pd.Series(values,index=pd.date_range('2018-01-01',periods=len(values),freq='MS'),name=name)
+
+def outputs(time_series, payload=0):
+    """forecast dict with every cached output, payload pads the pickled size"""
+    x = time_series.dropna()
+    future = pd.date_range(x.index[-1],periods=3,freq='MS')[1:]
+    return {'method':'naive','predicted':pd.Series(x.iloc[-1],index=future),'lower':np.zeros(2),'upper':np.zeros(2),
+            'level':80,'residuals':x*0,'fitted':x,'model':{'padding':'x'*payload}}
+
+def test_miss_then_hit(tmp_path):
+    cache = ForecastCache(str(tmp_path))
+    time_series = series([1.0,2.0,3.0])
+    key = cache.key(time_series,SPEC)
+    assert cache.get(key) is None
+    cache.put(key,outputs(time_series))
+    entry = cache.get(key)
+    assert entry['method'] == 'naive'
+    assert (cache.hits, cache.misses) == (1,1)
+
+def test_key_depends_on_values_dates_and_spec():
+    time_series = series([1.0,2.0,3.0])
+    key = ForecastCache.key(time_series,SPEC)
+    #leading and trailing nulls don't change the key
+    padded = pd.Series([np.nan,1.0,2.0,3.0,np.nan],index=pd.date_range('2017-12-01',periods=5,freq='MS'))
+    assert ForecastCache.key(padded,SPEC) == key
+    assert ForecastCache.key(series([1.0,2.0,4.0]),SPEC) != key
+    assert ForecastCache.key(time_series.shift(1,freq='MS'),SPEC) != key
+    assert ForecastCache.key(time_series,SPEC[:-1] + (95.0,)) != key
+
+def test_incomplete_entry_is_a_miss(tmp_path):
+    cache = ForecastCache(str(tmp_path))
+    time_series = series([1.0,2.0,3.0])
+    key = cache.key(time_series,SPEC)
+    cache.put(key,{'method':'naive'})
+    assert cache.get(key) is None
+    assert cache.misses == 1
+
+def test_invalidate_and_clear(tmp_path):
+    cache = ForecastCache(str(tmp_path))
+    keys = [cache.key(series([1.0,2.0,float(i)]),SPEC) for i in range(3)]
+    for key in keys:
+        cache.put(key,outputs(series([1.0,2.0,3.0])))
+    cache.invalidate(keys[0])
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[1]) is not None
+    cache.clear()
+    assert all(cache.get(key) is None for key in keys)
+    assert cache._total_size() == 0
+
+def test_overwrite_does_not_grow_size(tmp_path):
+    cache = ForecastCache(str(tmp_path))
+    time_series = series([1.0,2.0,3.0])
+    key = cache.key(time_series,SPEC)
+    for _ in range(5):
+        cache.put(key,outputs(time_series))
+    entry_size = os.path.getsize(cache._entry_path(key))
+    assert cache._total_size() == entry_size
+
+def test_evicts_least_recently_used(tmp_path):
+    time_series = series([1.0,2.0,3.0])
+    probe = ForecastCache(str(tmp_path / 'probe'),max_size=None)
+    probe.put('00',outputs(time_series,payload=1000))
+    entry_size = os.path.getsize(probe._entry_path('00'))
+
+    #room for three entries, the fourth put evicts down to 90% of max_size, which leaves two
+    cache = ForecastCache(str(tmp_path / 'cache'),max_size=int(3.2*entry_size))
+    keys = ['%02d' % i + 'f'*62 for i in range(4)]
+    for i, key in enumerate(keys[:3]):
+        cache.put(key,outputs(time_series,payload=1000))
+        os.utime(cache._entry_path(key),(1000 + i,1000 + i))
+    #reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0]) is not None
+    cache.put(keys[3],outputs(time_series,payload=1000))
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[3]) is not None
+    assert cache._total_size() == 2*entry_size
+
+def test_only_changed_series_refitted(tmp_path):
+    from magi.core import forecast
+    df = pd.DataFrame({'a':[1.0,2.0,3.0,4.0],'b':[5.0,6.0,7.0,8.0],'c':[2.0,2.0,2.0,2.0]},
+                      index=pd.date_range('2018-01-01',periods=4,freq='MS'))
+    fitted_columns = []
+
+    def fit_outputs(keys, time_series):
+        fitted_columns.append(list(time_series.columns))
+        fitted = {i:outputs(time_series[i]) for i in time_series}
+        for i in fitted:
+            fitted[i]['full_actuals'] = pd.concat([time_series[i],fitted[i]['predicted']])
+        return fitted
+
+    cache = ForecastCache(str(tmp_path))
+    fc_obj = forecast(time_series=df,forecast_periods=2,frequency=12,cache=cache)
+    first = fc_obj._cached_outputs(('R','naive'),('predicted','full_actuals'),df,fit_outputs)
+    changed = df.copy()
+    changed.loc[changed.index[-1],'b'] = 9.0
+    second = fc_obj._cached_outputs(('R','naive'),('predicted','full_actuals'),changed,fit_outputs)
+    assert fitted_columns == [['a','b','c'],['b']]
+    pd.testing.assert_series_equal(second['a']['predicted'],first['a']['predicted'])
+    assert second['b']['predicted'].iloc[0] == 9.0
+    #actuals are rebuilt from the input series on a hit
+    assert list(second['c']['full_actuals'].values) == [2.0,2.0,2.0,2.0,2.0,2.0]
+    #a different model misses for every series
+    fc_obj._cached_outputs(('R','snaive'),('predicted',),changed,fit_outputs)
+    assert fitted_columns[-1] == ['a','b','c']
+    assert set(CACHED_OUTPUTS) <= set(cache.get(fc_obj._cache_key(changed['a'],('R','naive'))))
+
+@pytest.mark.parametrize('dataframe',[False,True])
+def test_update_mode_refit_not_served_from_cache(tmp_path, fake_R_series, dataframe):
+    from magi.core import forecast
+    from magi.store import ParamStore
+    df = pd.DataFrame({'a':[1.0,2.0,3.0,4.0],'b':[5.0,6.0,7.0,8.0]},index=pd.date_range('2018-01-01',periods=4,freq='MS'))
+    time_series = df if dataframe else df['a']
+    cache = ForecastCache(str(tmp_path / 'cache'))
+    store = ParamStore()
+
+    def run(refit):
+        fc_obj = forecast(time_series=time_series,forecast_periods=2,frequency=12,cache=cache,scheduler='dask')
+        fc_obj.R(model='ets(rdata)',model_store=store,refit=refit)
+        return len(fake_R_series.calls)
+
+    nseries = 2 if dataframe else 1
+    assert run(False) == nseries
+    #same data and model reapplied again is a hit
+    assert run(False) == nseries
+    #a refit re-estimates even though an update fit of the same data is cached, then is cached itself
+    assert run(True) == 2*nseries
+    assert [call['old_model'] for call in fake_R_series.calls[-nseries:]] == [None]*nseries
+    assert run(True) == 2*nseries
@@ -0,0 +1,154 @@
+import os
+import pickle
+from collections import OrderedDict
+import dask
+import pytest
+
+from magi import chunking
+from magi.chunking import ChunkSizer, map_chunked
+
+def scaled(x, factor=1, offset=0):
+    return x*factor + offset
+
+def test_fixed_chunk_size():
+    sizer = ChunkSizer(chunk_size=7)
+    sizer.update(7,100.0)
+    assert sizer.size(remaining=3,n_workers=4) == 7
+
+def test_initial_probe_size():
+    assert ChunkSizer(initial_size=4).size() == 4
+    #never more than an even share of the remaining series per worker
+    assert ChunkSizer(initial_size=4).size(remaining=6,n_workers=4) == 2
+
+def test_grows_for_cheap_series():
+    sizer = ChunkSizer(target_seconds=2.0)
+    sizer.update(4,0.04)
+    assert sizer.seconds_per_item == pytest.approx(0.01)
+    assert sizer.size() == 200
+    assert sizer.size(remaining=1000,n_workers=8) == 125
+
+def test_shrinks_for_costly_series():
+    sizer = ChunkSizer(target_seconds=2.0)
+    sizer.update(4,4.0)
+    assert sizer.size() == 2
+    sizer.update(2,20.0)
+    #moving average 0.3*10 + 0.7*1 seconds per series, so the minimum chunk of one
+    assert sizer.seconds_per_item == pytest.approx(3.7)
+    assert sizer.size() == 1
+
+def test_size_bounds():
+    sizer = ChunkSizer(target_seconds=2.0,min_size=3,max_size=50)
+    sizer.update(10,1e-6)
+    assert sizer.size() == 50
+    sizer = ChunkSizer(target_seconds=2.0,min_size=3,max_size=50)
+    sizer.update(1,100.0)
+    assert sizer.size() == 3
+
+def test_empty_chunk_ignored():
+    sizer = ChunkSizer()
+    sizer.update(0,1.0)
+    assert sizer.seconds_per_item is None
+
+def test_results_in_order_with_shared_kwargs():
+    args = [(i,) for i in range(103)]
+    results = map_chunked(scaled,iter(args),len(args),scheduler='dask',n_workers=2,chunk_size=10,
+                          shared={'factor':3,'offset':1})
+    assert results == [3*i + 1 for i in range(103)]
+
+def test_empty_input():
+    assert map_chunked(scaled,iter([]),0,scheduler='dask') == []
+
+def test_in_flight_cap_and_lazy_arguments(monkeypatch):
+    waves = []
+    compute = dask.compute
+
+    def recording_compute(*tasks, **kwargs):
+        waves.append(len(tasks))
+        return compute(*tasks,**kwargs)
+
+    consumed = []
+
+    def args_iter():
+        for i in range(50):
+            consumed.append(i)
+            yield (i,)
+
+    monkeypatch.setattr(chunking.dask,'compute',recording_compute)
+    results = map_chunked(scaled,args_iter(),50,scheduler='dask',n_workers=2,chunk_size=4,max_in_flight=3)
+    assert results == list(range(50))
+    #at most 3 chunks of 4 per dask.compute call, 50 series need 5 waves
+    assert waves == [3,3,3,3,1]
+    assert len(consumed) == 50
+
+def test_adaptive_chunks_grow(monkeypatch):
+    sizes = []
+    run_chunk = chunking._run_chunk
+
+    def recording_run_chunk(func, args_list, shared=None):
+        sizes.append(len(args_list))
+        return run_chunk(func,args_list,shared)
+
+    monkeypatch.setattr(chunking,'_run_chunk',recording_run_chunk)
+    map_chunked(scaled,((i,) for i in range(2000)),2000,scheduler='dask',n_workers=1,max_in_flight=1,target_seconds=60.0)
+    #first chunk is a probe of 4, cheap series then make chunks as large as max_size allows
+    assert sizes[0] == 4
+    assert max(sizes) > 100
+    assert sum(sizes) == 2000
+
+class FakeAsyncResult(object):
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+class FakePool(object):
+    """runs pool tasks in process and records the size of every pickled task"""
+
+    def __init__(self):
+        self.task_sizes = []
+
+    def apply_async(self, func, args):
+        self.task_sizes.append(len(pickle.dumps(args)))
+        return FakeAsyncResult(func(*args))
+
+def total(x, values=None):
+    return x + sum(values)
+
+def test_pool_chunks_carry_shared_inputs_once(monkeypatch, tmp_path):
+    pool = FakePool()
+    monkeypatch.setattr(chunking,'get_pool',lambda n_workers=None: pool)
+    monkeypatch.setattr(chunking,'_worker_shared',OrderedDict())
+    monkeypatch.setattr(chunking.tempfile,'tempdir',str(tmp_path))
+    values = list(range(100000))
+    results = map_chunked(total,((i,) for i in range(20)),20,scheduler='pool',n_workers=2,chunk_size=2,
+                          shared={'values':values})
+    assert results == [i + sum(values) for i in range(20)]
+    #10 chunks, none of them carries the shared list
+    assert len(pool.task_sizes) == 10
+    assert max(pool.task_sizes) < len(pickle.dumps(values))/100
+    #the shared file is removed once the call is done, the worker keeps its copy
+    assert os.listdir(str(tmp_path)) == []
+    assert len(chunking._worker_shared) == 1
+
+def test_worker_loads_shared_inputs_once(monkeypatch):
+    monkeypatch.setattr(chunking,'_worker_shared',OrderedDict())
+    token, path = chunking._dump_shared({'factor':3,'offset':1})
+    try:
+        assert chunking._run_pool_chunk(scaled,[(1,),(2,)],token,path)[0] == [4,7]
+    finally:
+        os.remove(path)
+    #later chunks of the same call are served from the worker's store
+    assert chunking._run_pool_chunk(scaled,[(5,)],token,path)[0] == [16]
+    assert chunking._run_pool_chunk(scaled,[(5,)])[0] == [5]
+    assert chunking._dump_shared(None) == (None,None)
+
+def test_worker_store_keeps_recent_calls(monkeypatch):
+    monkeypatch.setattr(chunking,'_worker_shared',OrderedDict())
+    tokens = []
+    for i in range(chunking._WORKER_SHARED_SIZE + 2):
+        token, path = chunking._dump_shared({'offset':i})
+        chunking._run_pool_chunk(scaled,[(0,)],token,path)
+        os.remove(path)
+        tokens.append(token)
+    assert list(chunking._worker_shared) == tokens[2:]
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from magi import clean
+
+LEVEL = 100.0
+OUTLIERS = (20,45)
+GAP = (30,31,32)
+
+def seasonal_series(seed=0, nrows=72):
+    """monthly series with level LEVEL, seasonal swing of 10% of level and noise of 1% of level,
+    returns (observed values with OUTLIERS and GAP planted, values without them)
+    """
+    rng = np.random.RandomState(seed)
+    t = np.arange(nrows)
+    truth = LEVEL + 0.1*LEVEL*np.sin(2*np.pi*t/12) + rng.normal(0.0,0.01*LEVEL,nrows)
+    observed = truth.copy()
+    observed[list(OUTLIERS)] += 0.8*LEVEL
+    observed[list(GAP)] = np.nan
+    return observed, truth
+
+def trend_series(seed=0, nrows=40):
+    """non seasonal series with a linear trend and a gap, returns observed values"""
+    rng = np.random.RandomState(seed)
+    t = np.arange(nrows)
+    observed = 50.0 + 0.5*t + rng.normal(0.0,0.1,nrows)
+    observed[10:14] = np.nan
+    return observed
+
+def replaced_positions(observed, cleaned):
+    """positions of observed (non null) values cleaning changed"""
+    return set(np.flatnonzero(~np.isnan(observed) & (np.abs(cleaned - observed) > 1e-9)))
+
+def R_tsclean(values, frequency):
+    """cleans values with forecast::tsclean through the forecast class"""
+    pytest.importorskip('rpy2')
+    from magi.core import forecast
+    series = pd.Series(values,index=pd.date_range('2010-01-01',periods=len(values),freq='MS'),name='ts0')
+    fc_obj = forecast(time_series=series,forecast_periods=1,frequency=frequency)
+    return fc_obj.tsclean_series(return_ts=True).values
+
+def test_outliers_replaced_and_gap_filled():
+    observed, truth = seasonal_series()
+    cleaned = clean.tsclean(observed,12)
+    assert replaced_positions(observed,cleaned) == set(OUTLIERS)
+    #replacements within 5% of level of the values before outliers and gaps were planted
+    positions = list(OUTLIERS + GAP)
+    assert np.abs(cleaned[positions] - truth[positions]).max() < 0.05*LEVEL
+
+def test_missing_kept_without_replace_missing():
+    observed, _ = seasonal_series()
+    cleaned = clean.tsclean(observed,12,replace_missing=False)
+    assert np.isnan(cleaned[list(GAP)]).all()
+    assert replaced_positions(observed,cleaned) == set(OUTLIERS)
+
+def test_non_seasonal_gap_is_linear():
+    observed = trend_series()
+    cleaned = clean.tsclean(observed,1)
+    expected = np.interp(np.arange(10,14),[9,14],observed[[9,14]])
+    np.testing.assert_allclose(cleaned[10:14],expected,rtol=0,atol=1e-9)
+    assert replaced_positions(observed,cleaned) == set()
+
+def test_columns_cleaned_independently_with_ragged_starts():
+    observed, _ = seasonal_series()
+    values = np.column_stack([observed,np.r_[np.full(12,np.nan),observed[12:]]])
+    cleaned = clean.tsclean(values,12,chunk_size=1)
+    assert np.isnan(cleaned[:12,1]).all()
+    np.testing.assert_allclose(cleaned[:,0],clean.tsclean(observed,12))
+
+def test_matches_R_on_seasonal_series():
+    observed, _ = seasonal_series()
+    R_cleaned = R_tsclean(observed,12)
+    cleaned = clean.tsclean(observed,12)
+    #R smooths with supsmu and decomposes with stl, so the same points are flagged but replacements differ slightly,
+    #tolerance is 5% of the series level
+    assert replaced_positions(observed,cleaned) == replaced_positions(observed,R_cleaned)
+    positions = list(OUTLIERS + GAP)
+    assert np.abs(cleaned[positions] - R_cleaned[positions]).max() < 0.05*LEVEL
+    np.testing.assert_allclose(np.delete(cleaned,positions),np.delete(R_cleaned,positions),rtol=0,atol=1e-9)
+
+def test_matches_R_on_non_seasonal_gap():
+    observed = trend_series()
+    #both interpolate gaps of non seasonal series linearly, so they agree to rounding
+    np.testing.assert_allclose(clean.tsclean(observed,1),R_tsclean(observed,1),rtol=0,atol=1e-8)
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from magi.convert import R_to_numpy, from_R_matrix, bounds
+
+class FakeRVector(object):
+    """stands in for an rpy2 vector exposing its R memory through memoryview()"""
+
+    def __init__(self, values, memoryview_error=None):
+        self.values = np.asarray(values)
+        self.memoryview_error = memoryview_error
+
+    def memoryview(self):
+        if self.memoryview_error is not None:
+            raise self.memoryview_error
+        return memoryview(self.values)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.values if dtype is None else self.values.astype(dtype)
+
+def test_R_to_numpy_owns_its_data():
+    vector = FakeRVector(np.array([1.5,np.nan,3.25]))
+    values = R_to_numpy(vector)
+    np.testing.assert_array_equal(values,[1.5,np.nan,3.25])
+    #the R memory can be freed or reused without touching the returned array
+    assert not np.shares_memory(values,vector.values)
+    vector.values[0] = 99.0
+    assert values[0] == 1.5
+    assert values.flags.writeable
+
+def test_R_to_numpy_integer_vectors():
+    vector = FakeRVector(np.array([1,2,3],dtype=np.int32))
+    values = R_to_numpy(vector)
+    assert values.dtype == float
+    np.testing.assert_array_equal(values,[1.0,2.0,3.0])
+    assert R_to_numpy(vector,dtype=int).dtype == int
+
+def test_R_to_numpy_without_memoryview():
+    vector = FakeRVector(np.array([1.0,2.0]),memoryview_error=NotImplementedError())
+    values = R_to_numpy(vector)
+    np.testing.assert_array_equal(values,[1.0,2.0])
+    assert not np.shares_memory(values,vector.values)
+    np.testing.assert_array_equal(R_to_numpy([4,5]),[4.0,5.0])
+
+def test_from_R_matrix_column_major():
+    #R stores a 2 x 3 matrix column by column
+    matrix = np.array([[1.0,2.0,3.0],[4.0,5.0,6.0]])
+    values = from_R_matrix(FakeRVector(matrix.ravel(order='F')),(2,3))
+    np.testing.assert_array_equal(values,matrix)
+
+def test_bounds():
+    values = np.array([[np.nan,1.0,np.nan],
+                       [2.0,np.nan,np.nan],
+                       [3.0,4.0,np.nan],
+                       [np.nan,np.nan,np.nan]])
+    starts, ends = bounds(values)
+    np.testing.assert_array_equal(starts,[1,0,0])
+    #all null column ends before it starts, so slicing it gives no rows
+    np.testing.assert_array_equal(ends,[2,2,-1])
+    assert bounds(values[:,0]) == (1,2)
+    assert bounds(np.array([1.0,2.0])) == (0,1)
+
+def test_bounds_all_null():
+    start, end = bounds(np.full(4,np.nan))
+    assert (start, end) == (0,-1)
+    assert len(np.arange(4)[start:end + 1]) == 0
+    starts, ends = bounds(np.full((3,2),np.nan))
+    np.testing.assert_array_equal(starts,[0,0])
+    np.testing.assert_array_equal(ends,[-1,-1])
+
+def test_R_round_trip():
+    pytest.importorskip('rpy2')
+    from magi.convert import numpy_to_R, to_R_matrix, to_R_ts
+    values = np.array([1.25,np.nan,-3.5,1e-9])
+    np.testing.assert_array_equal(R_to_numpy(numpy_to_R(values)),values)
+    np.testing.assert_array_equal(R_to_numpy(to_R_ts(values,12)),values)
+    matrix = np.arange(6.0).reshape(2,3)
+    np.testing.assert_array_equal(from_R_matrix(to_R_matrix(matrix),(2,3)),matrix)
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from magi import core
+
+class FakeCVRfunc(object):
+    """stands in for the compiled cross validation R function with naive forecasts from every origin
+    -training windows with fewer than 3 observations fail to fit and get NA forecasts, like the tryCatch in R
+    """
+
+    def __init__(self, horizon, windows):
+        self.horizon = horizon
+        self.windows = windows
+
+    def __call__(self, full_data, starts, origins):
+        forecasts = np.full((len(origins),self.horizon),np.nan)
+        for j, (start, origin) in enumerate(zip(starts,origins)):
+            #1 based inclusive window like full_data[starts[j]:origins[j]] in R
+            self.windows.append(len(full_data[start - 1:origin]))
+            if origin - start + 1 >= 3:
+                forecasts[j] = full_data[origin - 1]
+        #R matrices come back flattened column major
+        return forecasts.ravel(order='F')
+
+class FakeR(object):
+    """stands in for rpy2.robjects, parsing any R source gives the fake cross validation function"""
+
+    def __init__(self, horizon):
+        self.parsed = []
+        self.windows = []
+        self.horizon = horizon
+
+    def r(self, source):
+        self.parsed.append(source)
+        return FakeCVRfunc(self.horizon,self.windows)
+
+    def IntVector(self, values):
+        return list(values)
+
+@pytest.fixture
+def fake_R(monkeypatch):
+    fake = FakeR(horizon=3)
+    monkeypatch.setattr(core,'get_R',lambda: fake)
+    #series are handed over as numpy arrays, the fake function indexes them directly
+    monkeypatch.setattr(core,'to_R_ts',lambda values, frequency: np.asarray(values,dtype=float))
+    core.clear_rfunc_cache()
+    yield fake
+    core.clear_rfunc_cache()
+
+def frame():
+    index = pd.date_range('2018-01-01',periods=12,freq='MS')
+    df = pd.DataFrame({'a':np.arange(12.0)**2,'b':np.arange(12.0) + 100},index=index)
+    #b starts four months late, its origins are counted from its first value
+    df.iloc[:4,1] = np.nan
+    return df
+
+def naive_errors(series, origins, horizon):
+    """actual minus last training value for every origin and horizon step, null past the end of series"""
+    values = series.dropna().values
+    errors = np.full((len(origins),horizon),np.nan)
+    for j, origin in enumerate(origins):
+        steps = values[origin:origin + horizon]
+        errors[j,:len(steps)] = steps - values[origin - 1]
+    return errors
+
+def check_naive_errors(errors_df, df, initial, step, horizon):
+    assert list(errors_df.columns) == list(range(1,horizon + 1))
+    assert errors_df.index.names == ['series','origin']
+    for name in df:
+        series = df[name].dropna()
+        origins = list(range(initial,len(series),step))
+        #origin is the date of the last observation in each training window
+        assert list(errors_df.loc[name].index) == list(series.index[np.array(origins) - 1])
+        np.testing.assert_allclose(errors_df.loc[name].values,naive_errors(series,origins,horizon))
+
+@pytest.mark.parametrize('step',[1,3])
+def test_R_origins_and_errors(fake_R, step):
+    df = frame()
+    fc_obj = core.forecast(time_series=df,forecast_periods=3,frequency=12,scheduler='dask')
+    errors_df = fc_obj.cross_validate('ets(rdata)',initial=4,horizon=3,step=step)
+    #12 values from 4 with step 1 give origins 4..11 for a, b has 8 values so origins 4..7
+    assert len(errors_df) == len(range(4,12,step)) + len(range(4,8,step))
+    check_naive_errors(errors_df,df,4,step,3)
+    assert len(fake_R.parsed) == 1
+    assert 'tryCatch' in fake_R.parsed[0]
+
+def test_R_failed_origins_give_null_errors(fake_R):
+    df = frame()
+    fc_obj = core.forecast(time_series=df['a'],forecast_periods=2,frequency=12,scheduler='dask')
+    errors_df = fc_obj.cross_validate('ets(rdata)',initial=1,horizon=3)
+    #origins 1 and 2 fail to fit, the rest are scored
+    assert errors_df.loc['a'].iloc[:2].isnull().all().all()
+    assert errors_df.loc['a'].iloc[2:,0].notnull().all()
+    assert len(errors_df) == 11
+
+def test_R_max_history_slides_training_window(fake_R):
+    df = frame()
+    fc_obj = core.forecast(time_series=df,forecast_periods=3,frequency=12,scheduler='dask',max_history=5)
+    errors_df = fc_obj.cross_validate('ets(rdata)',initial=3,horizon=3)
+    #windows grow to max_history observations, then slide with the origin
+    assert fake_R.windows == [3,4,5,5,5,5,5,5,5] + [3,4,5,5,5]
+    #origins and scored actuals are unchanged, naive forecasts only depend on the last training value
+    check_naive_errors(errors_df,df,3,1,3)
+
+def test_prophet_origins_and_errors(fake_prophet):
+    df = frame()
+    fc_obj = core.forecast(time_series=df,forecast_periods=3,frequency=12)
+    errors_df = fc_obj.cross_validate('prophet',initial=5,horizon=2,step=2)
+    check_naive_errors(errors_df,df,5,2,2)
+    #one fit per origin, each on its own training window with no uncertainty draws
+    assert len(fake_prophet.fits) == len(errors_df)
+    assert all(prophet.kwargs['uncertainty_samples'] == 0 for prophet in fake_prophet.instances)
+
+def test_prophet_max_history_slides_training_window(fake_prophet):
+    df = frame()
+    fc_obj = core.forecast(time_series=df['a'],forecast_periods=3,frequency=12,max_history=4)
+    errors_df = fc_obj.cross_validate('prophet',initial=2,horizon=2,step=3)
+    check_naive_errors(errors_df,df[['a']],2,3,2)
+    #origins 2, 5, 8 and 11, each fitted on at most the last 4 observations before it
+    assert [len(prophet.history) for prophet in fake_prophet.instances] == [2,4,4,4]
+    assert [prophet.history['y'].iloc[0] for prophet in fake_prophet.instances] == [0.0,1.0,16.0,49.0]
+
+@pytest.mark.parametrize('options',[{'aggregate_periods':2},{'seasonal_periods':(3,6)}])
+def test_rejects_unsupported_options(options):
+    fc_obj = core.forecast(time_series=frame(),forecast_periods=3,frequency=12,**options)
+    with pytest.raises(ValueError):
+        fc_obj.cross_validate('ets(rdata)',initial=4,horizon=3)
+    with pytest.raises(ValueError):
+        fc_obj.cross_validate('prophet',initial=4,horizon=3)
+
+def test_R_cross_validate_failed_origins():
+    pytest.importorskip('rpy2')
+    df = frame()
+    fc_obj = core.forecast(time_series=df['a'],forecast_periods=2,frequency=12,scheduler='dask')
+    errors_df = fc_obj.cross_validate('{if (length(rdata) < 5) stop("short"); ets(rdata)}',initial=3,horizon=2)
+    assert errors_df.loc['a'].iloc[:2].isnull().all().all()
+    assert errors_df.loc['a'].iloc[2:,0].notnull().all()
+
+def test_R_cross_validate_max_history():
+    pytest.importorskip('rpy2')
+    series = frame()['a']
+    fc_obj = core.forecast(time_series=series,forecast_periods=2,frequency=12,scheduler='dask',max_history=4)
+    errors_df = fc_obj.cross_validate('meanf',initial=6,horizon=1)
+    #meanf forecasts the mean of the last 4 observations before each origin
+    values = series.values
+    expected = [values[origin] - values[origin - 4:origin].mean() for origin in range(6,12)]
+    np.testing.assert_allclose(errors_df.loc['a'][1].values,expected)
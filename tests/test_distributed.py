@@ -0,0 +1,51 @@
+import pickle
+import distributed
+import numpy as np
+import pandas as pd
+import pytest
+
+from magi import core
+from magi.chunking import map_chunked
+from magi.profiling import Profiler
+
+def tagged(x, model, config):
+    return (x,model,config['frequency'])
+
+@pytest.fixture(scope='module')
+def client():
+    cluster = distributed.LocalCluster(processes=False,n_workers=2,threads_per_worker=1,dashboard_address=None)
+    client = distributed.Client(cluster)
+    yield client
+    client.close()
+    cluster.close()
+
+def test_consecutive_calls_get_their_own_shared_values(client):
+    args = [(i,) for i in range(20)]
+    for model, frequency in (('ets(rdata)',12),('auto.arima(rdata)',4),('ets(rdata)',12),('thetaf',1)):
+        results = map_chunked(tagged,iter(args),len(args),scheduler='dask',chunk_size=3,
+                              shared={'model':model,'config':{'frequency':frequency}})
+        assert results == [(i,model,frequency) for i in range(20)]
+
+def test_shared_values_scattered_under_unique_keys(client):
+    args = [(i,) for i in range(4)]
+    map_chunked(tagged,iter(args),len(args),scheduler='dask',shared={'model':'a','config':{'frequency':1}})
+    #the names of the shared kwargs never become cluster keys
+    assert not {'model','config'} & set(client.who_has())
+
+@pytest.mark.parametrize('nseries',[10,400])
+def test_task_payload_bounded_by_column_size(client, fake_R_series, nseries):
+    df = pd.DataFrame(np.random.RandomState(0).rand(60,nseries),index=pd.date_range('2013-01-01',periods=60,freq='MS'),
+                      columns=['ts%d' % i for i in range(nseries)])
+    profiler = Profiler()
+    result = core.forecast(time_series=df,forecast_periods=12,frequency=12,profiler=profiler).R(model='ets(rdata)')
+    assert len(result) == nseries
+    tasks = profiler.task_summary()
+    #a series task carries its own column and nothing else, so it can't be much bigger than a full length column
+    #however many series the dataframe has
+    column_bytes = len(pickle.dumps(pd.Series(np.zeros(len(df)),index=df.index,name=df.columns[0]),
+                                    protocol=pickle.HIGHEST_PROTOCOL))
+    assert tasks.loc['R_series','tasks'] == nseries
+    assert tasks.loc['R_series','max_bytes'] <= 2*column_bytes + 1024
+    #settings shared by every task are sent once and don't hold the dataframe
+    assert tasks.loc['R_series_shared','tasks'] == 1
+    assert tasks.loc['R_series_shared','max_bytes'] < column_bytes + 4096
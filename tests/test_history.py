@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from magi import core
+from magi.core import _aggregate_blocks, _disaggregate
+
+def test_aggregate_blocks():
+    values = np.array([1.0,2.0,3.0,2.0,4.0,6.0])
+    sums, profile = _aggregate_blocks(values,3)
+    np.testing.assert_array_equal(sums,[6.0,12.0])
+    #both blocks split 1:2:3, so the profile is their common shares
+    np.testing.assert_allclose(profile,[1/6.0,2/6.0,3/6.0])
+    np.testing.assert_allclose(_disaggregate(sums,profile),values)
+
+def test_aggregate_blocks_averages_shares():
+    sums, profile = _aggregate_blocks(np.array([1.0,3.0,3.0,1.0,0.0,0.0]),2)
+    np.testing.assert_array_equal(sums,[4.0,4.0,0.0])
+    #blocks that sum to zero are left out of the average share
+    np.testing.assert_allclose(profile,[0.5,0.5])
+    sums, profile = _aggregate_blocks(np.zeros(4),2)
+    np.testing.assert_allclose(profile,[0.5,0.5])
+
+def test_disaggregate():
+    profile = np.array([0.2,0.3,0.5])
+    spread = _disaggregate([10.0,20.0],profile)
+    np.testing.assert_allclose(spread,[2.0,3.0,5.0,4.0,6.0,10.0])
+    #every block keeps its total
+    np.testing.assert_allclose(spread.reshape(-1,3).sum(axis=1),[10.0,20.0])
+
+class FakeRList(list):
+    """stands in for an R named list"""
+    names = ['order']
+
+def naive_rfunc(rdata):
+    """stands in for a compiled R forecast function with a two step naive forecast of rdata"""
+    values = np.asarray(rdata,dtype=float)
+    fitted = np.concatenate([[np.nan],values[:-1]])
+    mean = np.repeat(values[-1],2)
+    return FakeRList([[0]]),['Naive method'],mean,mean - 1,mean + 1,[80],values,values - fitted,fitted
+
+@pytest.fixture
+def fake_R_forecast(monkeypatch):
+    fitted_on = []
+
+    def to_R_ts(values, frequency):
+        fitted_on.append(np.asarray(values,dtype=float))
+        return fitted_on[-1]
+
+    monkeypatch.setattr(core,'to_R_ts',to_R_ts)
+    monkeypatch.setattr(core,'_R_forecast_rfunc',lambda model, forecast_periods, confidence_level: naive_rfunc)
+    yield fitted_on
+
+def monthly(values):
+    return pd.Series(values,index=pd.date_range('2018-01-01',periods=len(values),freq='MS'),name='a')
+
+def test_R_series_max_history_trim(fake_R_forecast):
+    series = monthly(np.r_[np.nan,np.arange(10.0),np.nan])
+    forecast_dict = core.forecast(time_series=series,forecast_periods=2,frequency=12,max_history=4).R_series('naive')
+    #only the last 4 non null values are fitted, counted back from the last observation
+    np.testing.assert_array_equal(fake_R_forecast[-1],[6.0,7.0,8.0,9.0])
+    assert list(forecast_dict['x'].index) == list(series.index[7:11])
+    assert (forecast_dict['predicted'] == 9.0).all()
+    assert forecast_dict['predicted'].index[0] == series.index[11]
+    #a longer max_history than the series keeps all of it
+    core.forecast(time_series=series,forecast_periods=2,frequency=12,max_history=50).R_series('naive')
+    np.testing.assert_array_equal(fake_R_forecast[-1],np.arange(10.0))
+
+def test_R_series_aggregate_periods(fake_R_forecast):
+    #blocks of 3 split 1:2:3, the first value is dropped so the history ends on a whole block
+    series = monthly(np.r_[5.0,np.tile([1.0,2.0,3.0],3)*np.repeat([1.0,2.0,3.0],3)])
+    forecast_dict = core.forecast(time_series=series,forecast_periods=4,frequency=12,aggregate_periods=3).R_series('naive')
+    np.testing.assert_array_equal(fake_R_forecast[-1],[6.0,12.0,18.0])
+    #two block forecasts of 18 are spread by the profile and cut back to the 4 periods asked for
+    np.testing.assert_allclose(forecast_dict['predicted'].values,[3.0,6.0,9.0,3.0])
+    assert len(forecast_dict['x']) == 9
+    np.testing.assert_allclose(forecast_dict['fitted'].values[3:],[1.0,2.0,3.0,2.0,4.0,6.0])
+
+class FakeSelectOutput(object):
+    """stands in for the R list returned by the compiled model selection function, naive wins"""
+
+    def __init__(self, values, nmodels):
+        self.outputs = {'scores':np.ones(nmodels*5),'best':[1],'method':['Naive method'],
+                        'mean':np.repeat(values[-1],2),'lower':np.repeat(values[-1] - 1,2),
+                        'upper':np.repeat(values[-1] + 1,2),'level':[80],
+                        'residuals':np.zeros(len(values)),'fitted':values}
+
+    def rx2(self, name):
+        return self.outputs[name]
+
+def test_R_select_max_history_trim(monkeypatch):
+    fitted_on = []
+    monkeypatch.setattr(core,'to_R_ts',lambda values, frequency: fitted_on.append(np.asarray(values)) or fitted_on[-1])
+    monkeypatch.setattr(core,'_R_select_rfunc',lambda models, *args: (lambda rdata: FakeSelectOutput(rdata,len(models))))
+    series = monthly(np.r_[np.arange(20.0),np.nan])
+    forecast_dict = core.forecast(time_series=series,forecast_periods=2,frequency=12,max_history=12).R_select(
+        ['naive','meanf'],holdout=3)
+    #the holdout is the end of the last max_history values
+    np.testing.assert_array_equal(fitted_on[-1],np.arange(8.0,20.0))
+    assert list(forecast_dict['fitted'].index) == list(series.index[8:20])
+    assert forecast_dict['selected'] == 'naive'
+
+@pytest.mark.parametrize('options',[{'aggregate_periods':3},{'seasonal_periods':(3,12)}])
+def test_R_select_rejects_unsupported_options(options):
+    series = monthly(np.arange(24.0))
+    fc_obj = core.forecast(time_series=series,forecast_periods=2,frequency=12,**options)
+    with pytest.raises(ValueError):
+        fc_obj.R_select(['naive','meanf'],holdout=3)
+    with pytest.raises(ValueError):
+        fc_obj.R_select(['naive','meanf'],holdout=3,time_series=series.to_frame())
+    with pytest.raises(ValueError):
+        fc_obj.R_select_series(['naive','meanf'],holdout=3)
+
+def test_prophet_seasonal_periods_replace_builtin(fake_prophet):
+    index = pd.date_range('2018-01-01',periods=24*21,freq='h')
+    series = pd.Series(np.arange(len(index),dtype=float),index=index,name='a')
+    fc_obj = core.forecast(time_series=series,forecast_periods=24,frequency=24,seasonal_periods=(24,168))
+    fc_obj.prophet_series(freq='h')
+    prophet = fake_prophet.instances[-1]
+    #hourly periods of one day and one week replace prophet's own daily and weekly seasonality
+    assert prophet.kwargs['daily_seasonality'] is False and prophet.kwargs['weekly_seasonality'] is False
+    assert 'yearly_seasonality' not in prophet.kwargs
+    assert [(s['name'],s['period'],s['fourier_order']) for s in prophet.seasonalities] == [('seasonal_24',1.0,10),
+                                                                                         ('seasonal_168',7.0,10)]
+
+def test_prophet_seasonal_periods_keep_other_builtin(fake_prophet):
+    index = pd.date_range('2018-01-01',periods=800,freq='D')
+    series = pd.Series(np.arange(800.0),index=index,name='a')
+    core.forecast(time_series=series,forecast_periods=7,frequency=365,seasonal_periods=(7,365,30)).prophet_series()
+    prophet = fake_prophet.instances[-1]
+    #a 365 day period is close enough to prophet's 365.25 day year, a 30 day period has no built in counterpart
+    assert prophet.kwargs['weekly_seasonality'] is False and prophet.kwargs['yearly_seasonality'] is False
+    assert 'daily_seasonality' not in prophet.kwargs
+    assert [s['period'] for s in prophet.seasonalities] == [7.0,365.0,30.0]
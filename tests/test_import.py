@@ -0,0 +1,25 @@
+import os
+import sys
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)),'..')
+
+def run_python(code):
+    return subprocess.run([sys.executable,'-c',code],cwd=ROOT,stdout=subprocess.PIPE,stderr=subprocess.PIPE)
+
+def test_import_magi_loads_no_backends():
+    completed = run_python("import magi, sys; assert not {'rpy2','fbprophet','plotly'} & set(sys.modules)")
+    assert completed.returncode == 0, completed.stderr.decode()
+
+def test_import_modules_loads_no_backends():
+    code = ("import sys, magi.core, magi.accuracy, magi.stream, magi.plotting; "
+            "loaded = {'rpy2','fbprophet','plotly'} & set(sys.modules); assert not loaded, loaded")
+    completed = run_python(code)
+    assert completed.returncode == 0, completed.stderr.decode()
+
+def test_import_time():
+    code = "import time; start = time.perf_counter(); import magi.core; print(time.perf_counter() - start)"
+    completed = run_python(code)
+    assert completed.returncode == 0, completed.stderr.decode()
+    #pandas and dask dominate, R, stan and plotly would add seconds
+    assert float(completed.stdout.decode().strip()) < 5.0
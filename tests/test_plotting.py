@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from magi.plotting import lttb, _downsample, _page_columns
+
+def wave(n=1000, seed=0):
+    x = np.arange(n,dtype=float)
+    return x, np.sin(x/40.0) + np.random.RandomState(seed).normal(0,0.1,n)
+
+@pytest.mark.parametrize('n_out',[3,10,100,999])
+def test_lttb_keeps_endpoints_and_length(n_out):
+    x, y = wave()
+    positions = lttb(x,y,n_out)
+    assert len(positions) == n_out
+    assert positions[0] == 0 and positions[-1] == len(x) - 1
+    #sorted and unique, one point from every bucket
+    assert (np.diff(positions) > 0).all()
+
+def test_lttb_keeps_spikes():
+    x, y = wave()
+    y[517] = 50.0
+    y[802] = -50.0
+    positions = lttb(x,y,50)
+    assert 517 in positions and 802 in positions
+
+@pytest.mark.parametrize('n_out',[1000,5000])
+def test_lttb_short_series_unchanged(n_out):
+    x, y = wave()
+    np.testing.assert_array_equal(lttb(x,y,n_out),np.arange(1000))
+
+def test_lttb_tiny_budget_keeps_ends():
+    x, y = wave()
+    np.testing.assert_array_equal(lttb(x,y,2),[0,999])
+    np.testing.assert_array_equal(lttb(x[:1],y[:1],0),[0])
+
+def test_downsample_bounded_and_aligned():
+    x, y = wave(5000)
+    series = pd.Series(y,index=pd.date_range('2018-01-01',periods=5000,freq='h'))
+    bound = y + 1
+    index, values, (kept_bound,) = _downsample(series,400,[bound])
+    assert len(values) == 400
+    assert index[0] == series.index[0] and index[-1] == series.index[-1]
+    np.testing.assert_array_equal(values,series.loc[index].values)
+    np.testing.assert_array_equal(kept_bound,values + 1)
+    #without a limit every point is kept
+    assert len(_downsample(series,None)[1]) == 5000
+
+def test_downsample_breaks_line_at_gaps():
+    values = np.arange(20.0)
+    values[:2] = np.nan
+    values[8:11] = np.nan
+    values[-1] = np.nan
+    series = pd.Series(values,index=pd.date_range('2018-01-01',periods=20,freq='D'))
+    index, kept, (bound,) = _downsample(series,None,[np.zeros(20)])
+    #leading and trailing nulls are dropped, the first null of the interior gap is kept as a break
+    assert index[0] == series.index[2] and index[-1] == series.index[18]
+    assert np.isnan(kept).sum() == 1
+    gap = int(np.flatnonzero(np.isnan(kept))[0])
+    assert index[gap] == series.index[8]
+    assert kept[gap - 1] == 7.0 and kept[gap + 1] == 11.0
+    assert np.isnan(bound[gap]) and not np.isnan(np.delete(bound,gap)).any()
+
+def test_downsample_gaps_with_limit():
+    x, y = wave(3000)
+    y[1000:1500] = np.nan
+    series = pd.Series(y,index=pd.date_range('2018-01-01',periods=3000,freq='h'))
+    index, values, _ = _downsample(series,300)
+    #each run gets a share of the points proportional to its length, plus the break between them
+    assert np.isnan(values).sum() == 1
+    gap = int(np.flatnonzero(np.isnan(values))[0])
+    assert index[gap] == series.index[1000]
+    assert index[gap - 1] == series.index[999] and index[gap + 1] == series.index[1500]
+    assert len(values) <= 301
+
+def test_downsample_all_null():
+    series = pd.Series(np.nan,index=pd.date_range('2018-01-01',periods=5,freq='D'))
+    index, values, (bound,) = _downsample(series,3,[np.ones(5)])
+    assert len(index) == len(values) == len(bound) == 0
+
+def test_page_columns():
+    columns = pd.Index(['s%d' % i for i in range(45)])
+    assert _page_columns(columns,None,0,False,0) == (list(columns),'')
+    assert _page_columns(columns,50,0,False,0) == (list(columns),'')
+    shown, label = _page_columns(columns,20,2,False,0)
+    assert shown == ['s40','s41','s42','s43','s44']
+    assert label == ' (page 3 of 3, 45 series)'
+    with pytest.raises(ValueError):
+        _page_columns(columns,20,3,False,0)
+
+def test_page_columns_sample():
+    columns = pd.Index(['s%d' % i for i in range(45)])
+    shown, label = _page_columns(columns,10,0,True,7)
+    assert len(set(shown)) == 10 and set(shown) <= set(columns)
+    #kept in column order and the same for the same seed
+    assert shown == sorted(shown,key=list(columns).index)
+    assert _page_columns(columns,10,0,True,7)[0] == shown
+    assert label == ' (sample of 10 of 45 series)'
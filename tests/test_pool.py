@@ -0,0 +1,43 @@
+import os
+import sys
+import importlib.util
+import subprocess
+import pytest
+
+from magi import pool
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)),'..')
+
+SCRIPT = """
+from magi.pool import map_tasks, shutdown_pool
+from magi.chunking import map_chunked
+
+if __name__ == '__main__':
+    for run in (lambda: map_tasks(abs,[(-1,),(-2,)],n_workers=2),
+                lambda: map_chunked(abs,iter([(-1,),(-2,)]),2,scheduler='pool',n_workers=2)):
+        try:
+            run()
+        except ImportError as err:
+            print('ImportError', err)
+    shutdown_pool()
+"""
+
+def test_worker_error_raised_from_tasks(monkeypatch):
+    monkeypatch.setattr(pool,'_worker_error',ImportError('no R'))
+    with pytest.raises(ImportError):
+        pool._run_task(abs,(-1,))
+    monkeypatch.setattr(pool,'_worker_error',None)
+    assert pool._run_task(abs,(-1,)) == 1
+
+@pytest.mark.skipif(importlib.util.find_spec('rpy2') is not None,reason='R workers start when rpy2 is installed')
+def test_pool_without_R_raises_instead_of_hanging(tmp_path):
+    path = str(tmp_path / 'run_pool.py')
+    with open(path,'w') as f:
+        f.write(SCRIPT)
+    #a worker initializer that raises would be respawned forever, the timeout turns a hang into a failure
+    completed = subprocess.run([sys.executable,path],cwd=ROOT,stdout=subprocess.PIPE,stderr=subprocess.PIPE,timeout=120,
+                               env=dict(os.environ,PYTHONPATH=ROOT))
+    assert completed.returncode == 0, completed.stderr.decode()
+    lines = completed.stdout.decode().splitlines()
+    assert len(lines) == 2
+    assert all(line.startswith('ImportError R could not be started on pool worker') for line in lines)
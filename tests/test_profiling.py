@@ -0,0 +1,76 @@
+import os
+import json
+import pytest
+
+from magi.profiling import Profiler, NULL_PROFILER
+
+def profiler_with_events():
+    """profiler with fixed events: two fits of 1s and 3s and one dispatch of 4s"""
+    profiler = Profiler()
+    profiler.merge([{'phase':'fit','series':'a','start':100.0,'duration':1.0,'pid':1},
+                    {'phase':'fit','series':'b','start':101.0,'duration':3.0,'pid':2},
+                    {'phase':'dispatch','series':None,'start':100.0,'duration':4.0,'pid':1}])
+    return profiler
+
+def test_summary():
+    summary_df = profiler_with_events().summary()
+    assert list(summary_df.index) == ['dispatch','fit']
+    assert list(summary_df.columns) == ['count','total','mean','max','share']
+    assert summary_df.loc['fit','count'] == 2
+    assert summary_df.loc['fit','total'] == 4.0
+    assert summary_df.loc['fit','mean'] == 2.0
+    assert summary_df.loc['fit','max'] == 3.0
+    assert summary_df['share'].sum() == pytest.approx(1.0)
+    assert summary_df.loc['dispatch','share'] == pytest.approx(0.5)
+
+def test_series_summary():
+    series_df = profiler_with_events().series_summary()
+    assert list(series_df.index) == ['a','b']
+    assert list(series_df.columns) == ['fit']
+    assert series_df.loc['b','fit'] == 3.0
+
+def test_phase_records_event():
+    profiler = Profiler()
+    with profiler.phase('convert',series='a'):
+        pass
+    event, = profiler.events
+    assert event['phase'] == 'convert' and event['series'] == 'a'
+    assert event['duration'] >= 0 and event['pid'] == os.getpid()
+
+def test_task_summary():
+    profiler = Profiler()
+    profiler.task('R_series',('a'*1000,))
+    profiler.task('R_series',('a'*10,))
+    profiler.task('R_series_shared',{'model':'ets(rdata)'})
+    task_df = profiler.task_summary()
+    assert list(task_df.columns) == ['tasks','total_bytes','mean_bytes','max_bytes']
+    assert task_df.loc['R_series','tasks'] == 2
+    assert 1000 < task_df.loc['R_series','max_bytes'] < 1100
+
+def test_disabled_profiler_records_nothing():
+    with NULL_PROFILER.phase('fit','a'):
+        pass
+    NULL_PROFILER.task('R_series',('a',))
+    NULL_PROFILER.merge([{'phase':'fit'}])
+    assert NULL_PROFILER.events == [] and NULL_PROFILER.tasks == []
+
+def test_chrome_trace(tmp_path):
+    path = str(tmp_path / 'trace.json')
+    profiler_with_events().to_chrome_trace(path)
+    with open(path) as f:
+        trace = json.load(f)
+    assert trace['displayTimeUnit'] == 'ms'
+    events = trace['traceEvents']
+    assert len(events) == 3
+    for event in events:
+        assert set(event) == {'name','cat','ph','ts','dur','pid','tid','args'}
+        assert event['ph'] == 'X' and event['cat'] == 'magi'
+    #timestamps and durations are in microseconds
+    assert events[1] == {'name':'fit','cat':'magi','ph':'X','ts':101e6,'dur':3e6,'pid':2,'tid':2,'args':{'series':'b'}}
+    assert events[2]['args'] == {}
+
+def test_clear():
+    profiler = profiler_with_events()
+    profiler.task('R_series',('a',))
+    profiler.clear()
+    assert profiler.events == [] and profiler.tasks == []
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from statistics import NormalDist
+
+from magi import core
+
+def frame(nrow=12):
+    index = pd.date_range('2018-01-01',periods=nrow,freq='MS')
+    return pd.DataFrame({'a':np.arange(nrow,dtype=float) + 1,'b':np.arange(nrow,dtype=float) + 100},index=index)
+
+def test_analytic_intervals_without_samples(fake_prophet):
+    series = frame()['a']
+    forecast_dict = core.forecast(time_series=series,forecast_periods=3,frequency=12).prophet(
+        uncertainty_samples=0,predict_history=False,interval_method='analytic',interval_width=0.9)
+    #no simulations are drawn, so prophet returns no interval columns
+    assert fake_prophet.instances[-1].kwargs['uncertainty_samples'] == 0
+    assert 'yhat_lower' not in forecast_dict['forecast_df']
+    #yhat +/- z*sigma_obs in original units, the fake scales by the largest value (12) with sigma_obs 0.05
+    half_width = NormalDist().inv_cdf(0.95)*0.05*12.0
+    np.testing.assert_allclose(forecast_dict['lower'],forecast_dict['predicted'].values - half_width)
+    np.testing.assert_allclose(forecast_dict['upper'],forecast_dict['predicted'].values + half_width)
+    assert forecast_dict['level'] == 90.0
+    #only the forecast periods are predicted
+    assert len(forecast_dict['predicted']) == 3 and (forecast_dict['predicted'] == 12.0).all()
+    assert forecast_dict['fitted'].empty and forecast_dict['residuals'].empty
+    assert list(forecast_dict['full_fit'].index) == list(forecast_dict['predicted'].index)
+    assert len(forecast_dict['full_actuals']) == 15
+
+def test_analytic_overrides_samples(fake_prophet):
+    forecast_dict = core.forecast(time_series=frame()['a'],forecast_periods=2,frequency=12).prophet(
+        interval_method='analytic')
+    #analytic intervals never need simulations, whatever uncertainty_samples is set to
+    assert fake_prophet.instances[-1].kwargs['uncertainty_samples'] == 0
+    assert np.isfinite(forecast_dict['lower']).all() and (forecast_dict['lower'] < forecast_dict['upper']).all()
+    assert len(forecast_dict['fitted']) == 12
+
+@pytest.mark.parametrize('options',[{'uncertainty_samples':0},{'interval_method':None}])
+def test_no_intervals(fake_prophet, options):
+    forecast_dict = core.forecast(time_series=frame()['a'],forecast_periods=2,frequency=12).prophet(**options)
+    assert np.isnan(forecast_dict['lower']).all() and np.isnan(forecast_dict['upper']).all()
+
+def test_sampled_intervals(fake_prophet):
+    forecast_dict = core.forecast(time_series=frame()['a'],forecast_periods=2,frequency=12).prophet()
+    np.testing.assert_allclose(forecast_dict['lower'],[11.0,11.0])
+    np.testing.assert_allclose(forecast_dict['upper'],[13.0,13.0])
+
+def test_dataframe_analytic_without_history(fake_prophet):
+    df = frame()
+    result = core.forecast(time_series=df,forecast_periods=3,frequency=12).prophet(
+        uncertainty_samples=0,predict_history=False,interval_method='analytic')
+    z = NormalDist().inv_cdf(0.9)
+    #each series is scaled by its own largest value
+    for j, scale in enumerate((12.0,111.0)):
+        np.testing.assert_allclose(result.upper[j] - result.mean[j],z*0.05*scale)
+        np.testing.assert_allclose(result.mean[j] - result.lower[j],z*0.05*scale)
+    assert result.mean.shape == (2,3)
+    #nothing is predicted in sample
+    assert np.isnan(result.fitted_values).all()
+    assert all(prophet.kwargs['uncertainty_samples'] == 0 for prophet in fake_prophet.instances)
+
+def test_unknown_interval_method(fake_prophet):
+    with pytest.raises(ValueError):
+        core.forecast(time_series=frame()['a'],forecast_periods=2,frequency=12).prophet(interval_method='bootstrap')
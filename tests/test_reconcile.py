@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from magi.reconcile import Hierarchy
+
+STRUCTURE = {'total':['A','B'],'A':['a1','a2'],'B':['b1','b2','b3']}
+
+def base_forecasts(hierarchy, horizon=4, history=30, seed=0):
+    """incoherent base forecasts and correlated in sample residuals of every node"""
+    rng = np.random.RandomState(seed)
+    index = pd.date_range('2018-01-01',periods=horizon,freq='MS')
+    forecasts = pd.DataFrame(rng.uniform(10,100,(horizon,len(hierarchy.nodes))),index=index,columns=hierarchy.nodes)
+    mixing = rng.normal(size=(len(hierarchy.nodes),len(hierarchy.nodes)))
+    residuals = pd.DataFrame(rng.normal(size=(history,len(hierarchy.nodes))) @ mixing,columns=hierarchy.nodes)
+    return forecasts, residuals
+
+def dense_shrunk_covariance(residuals):
+    """Schafer and Strimmer shrinkage of the residual correlation toward the identity, computed densely"""
+    T = residuals.shape[0]
+    centered = residuals - residuals.mean(axis=0)
+    sd = centered.std(axis=0,ddof=1)
+    X = centered/sd
+    correlation = X.T @ X/(T - 1)
+    products = X[:,:,None]*X[:,None,:]
+    products_variance = T/(T - 1.0)**3*((products - products.mean(axis=0))**2).sum(axis=0)
+    off = ~np.eye(residuals.shape[1],dtype=bool)
+    shrinkage = min(max(products_variance[off].sum()/(correlation[off]**2).sum(),0.0),1.0)
+    shrunk = shrinkage*np.eye(residuals.shape[1]) + (1 - shrinkage)*correlation
+    return shrunk*np.outer(sd,sd)
+
+def dense_projection(S, W, base):
+    """textbook MinT S (S' W^-1 S)^-1 S' W^-1 y"""
+    W_inverse = np.linalg.inv(W)
+    return S @ np.linalg.solve(S.T @ W_inverse @ S,S.T @ W_inverse @ base)
+
+@pytest.fixture
+def hierarchy():
+    return Hierarchy(STRUCTURE)
+
+def assert_coherent(hierarchy, reconciled_df):
+    leaves = reconciled_df[hierarchy.leaves].values.T
+    np.testing.assert_allclose(reconciled_df[hierarchy.aggregates].values.T,hierarchy.A @ leaves,rtol=1e-10)
+
+def test_summing_matrix(hierarchy):
+    assert hierarchy.nodes == ['total','A','B','a1','a2','b1','b2','b3']
+    assert hierarchy.total == 'total'
+    np.testing.assert_array_equal(hierarchy.S.toarray()[:3],[[1,1,1,1,1],[1,1,0,0,0],[0,0,1,1,1]])
+    np.testing.assert_array_equal(hierarchy.S.toarray()[3:],np.eye(5))
+
+def test_cycle_rejected():
+    with pytest.raises(ValueError):
+        Hierarchy({'A':['B','x'],'B':['A','y']})
+
+def test_from_levels_grouped():
+    levels = pd.DataFrame({'category':['c1','c1','c2'],'region':['r1','r2','r1']},index=['s1','s2','s3'])
+    hierarchy = Hierarchy.from_levels(levels)
+    assert hierarchy.aggregates == ['total','c1','c2','r1','r2']
+    df = pd.DataFrame({'s1':[1.0,np.nan],'s2':[2.0,np.nan],'s3':[4.0,np.nan]})
+    all_df = hierarchy.aggregate(df)
+    assert list(all_df.iloc[0]) == [7.0,3.0,4.0,5.0,2.0,1.0,2.0,4.0]
+    #aggregates with no observed leaf are null rather than zero
+    assert all_df.iloc[1].isnull().all()
+    with pytest.raises(ValueError):
+        Hierarchy.from_levels(pd.DataFrame({'category':['s1','c1']},index=['s1','s2']))
+
+def test_bottom_up(hierarchy):
+    forecasts, _ = base_forecasts(hierarchy)
+    reconciled_df = hierarchy.reconcile(forecasts,method='bottom_up')
+    pd.testing.assert_frame_equal(reconciled_df[hierarchy.leaves],forecasts[hierarchy.leaves])
+    assert_coherent(hierarchy,reconciled_df)
+
+@pytest.mark.parametrize('top_down_method',['average_proportions','proportions_of_averages'])
+def test_top_down(hierarchy, top_down_method):
+    forecasts, _ = base_forecasts(hierarchy)
+    actuals = pd.DataFrame(np.random.RandomState(1).uniform(1,10,(24,5)),columns=hierarchy.leaves)
+    reconciled_df = hierarchy.reconcile(forecasts,method='top_down',actuals=actuals,top_down_method=top_down_method)
+    np.testing.assert_allclose(reconciled_df['total'].values,forecasts['total'].values)
+    assert_coherent(hierarchy,reconciled_df)
+
+@pytest.mark.parametrize('dense_limit',[2000,0])
+@pytest.mark.parametrize('method',['ols','wls','mint_shrink'])
+def test_projection_matches_dense(hierarchy, method, dense_limit):
+    forecasts, residuals = base_forecasts(hierarchy)
+    if method == 'ols':
+        W = np.eye(len(hierarchy.nodes))
+    elif method == 'wls':
+        W = np.diag(residuals.var(ddof=1).values)
+    else:
+        W = dense_shrunk_covariance(residuals.values)
+    expected = dense_projection(hierarchy.S.toarray(),W,forecasts.values.T).T
+    #dense_limit 0 solves by conjugate gradient
+    reconciled_df = hierarchy.reconcile(forecasts,method=method,residuals=residuals,dense_limit=dense_limit)
+    np.testing.assert_allclose(reconciled_df.values,expected,rtol=1e-8,atol=1e-8)
+    assert_coherent(hierarchy,reconciled_df)
+    assert list(reconciled_df.columns) == hierarchy.nodes
+    assert reconciled_df.index.equals(forecasts.index)
+
+def test_coherent_forecasts_unchanged(hierarchy):
+    forecasts, residuals = base_forecasts(hierarchy)
+    coherent = hierarchy.reconcile(forecasts,method='bottom_up')
+    reconciled_df = hierarchy.reconcile(coherent,method='mint_shrink',residuals=residuals)
+    np.testing.assert_allclose(reconciled_df.values,coherent.values,rtol=1e-10)
+
+def test_missing_inputs_rejected(hierarchy):
+    forecasts, residuals = base_forecasts(hierarchy)
+    with pytest.raises(ValueError):
+        hierarchy.reconcile(forecasts,method='mint')
+    with pytest.raises(ValueError):
+        hierarchy.reconcile(forecasts,method='wls')
+    with pytest.raises(ValueError):
+        hierarchy.reconcile(forecasts.drop(columns='a1'),method='ols')
+    with pytest.raises(ValueError):
+        Hierarchy({'A':['a1','a2'],'B':['b1']}).reconcile(forecasts,method='top_down',actuals=forecasts)
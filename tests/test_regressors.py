@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from magi import core
+
+def frames():
+    index = pd.date_range('2018-01-01',periods=24,freq='MS')
+    df = pd.DataFrame({'a':np.arange(24.0),'b':np.arange(24.0) + 5},index=index)
+    regressors = pd.DataFrame({'promo':np.tile([0.0,1.0],15)},index=pd.date_range('2018-01-01',periods=30,freq='MS'))
+    return df, regressors
+
+def test_regressors_only_shipped_to_tasks_that_use_them():
+    df, regressors = frames()
+    fc_obj = core.forecast(time_series=df,forecast_periods=6,frequency=12,regressors=regressors)
+    assert 'regressors' not in fc_obj._config()
+    config = fc_obj._config(regressors=True)
+    assert config['regressors'] is regressors
+    assert config['regressors_key'] == fc_obj.regressors_key()
+    #without regressors nothing is added either way
+    assert 'regressors' not in core.forecast(time_series=df,forecast_periods=6,frequency=12)._config(regressors=True)
+
+def test_R_tasks_rebuilt_with_regressors(fake_R_series):
+    df, regressors = frames()
+    fc_obj = core.forecast(time_series=df,forecast_periods=6,frequency=12,regressors=regressors,scheduler='dask')
+    fc_obj.R(model='auto.arima(rdata)',pred=True)
+    #each task's forecast object is rebuilt with the regressors and their key
+    assert sorted(call['name'] for call in fake_R_series.calls) == ['a','b']
+    for call in fake_R_series.calls:
+        pd.testing.assert_frame_equal(call['regressors'],regressors)
+        assert call['regressors_key'] == fc_obj.regressors_key()
+
+def test_cross_validate_rejects_regressors():
+    df, regressors = frames()
+    fc_obj = core.forecast(time_series=df,forecast_periods=6,frequency=12,regressors=regressors)
+    with pytest.raises(ValueError):
+        fc_obj.cross_validate('auto.arima(rdata)',initial=12)
+    with pytest.raises(ValueError):
+        fc_obj.cross_validate('prophet',initial=12)
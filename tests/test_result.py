@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from magi.result import ForecastResult
+
+def forecast_dicts():
+    """two monthly series, b starts two months late and stops a month early, with 2 period forecasts"""
+    index = pd.date_range('2018-01-01',periods=6,freq='MS')
+    time_series = pd.DataFrame({'a':[1.0,2.0,3.0,4.0,5.0,6.0],
+                                'b':[np.nan,np.nan,10.0,11.0,12.0,np.nan]},index=index)
+    forecasted = {}
+    for name, horizon_start in (('a','2018-07-01'),('b','2018-06-01')):
+        x = time_series[name].dropna()
+        future = pd.date_range(horizon_start,periods=2,freq='MS')
+        forecasted[name] = {'predicted':pd.Series(x.iloc[-1] + np.array([1.0,2.0]),index=future),
+                            'lower':x.iloc[-1] + np.array([0.5,1.0]),
+                            'upper':x.iloc[-1] + np.array([1.5,3.0]),
+                            'fitted':x - 0.5,
+                            'residuals':pd.Series(0.5,index=x.index),
+                            'method':'naive_' + name}
+    return time_series, forecasted
+
+@pytest.fixture
+def result():
+    time_series, forecasted = forecast_dicts()
+    return ForecastResult.from_dicts(time_series,forecasted,80,'MS')
+
+def test_wide_frames(result):
+    predicted = result.predicted
+    assert list(predicted.columns) == ['a','b']
+    assert list(predicted.index) == list(pd.date_range('2018-06-01',periods=3,freq='MS'))
+    np.testing.assert_array_equal(predicted['a'].values,[np.nan,7.0,8.0])
+    np.testing.assert_array_equal(predicted['b'].values,[13.0,14.0,np.nan])
+    np.testing.assert_array_equal(result.frame('upper')['b'].dropna().values,[13.5,15.0])
+    fitted = result.fitted
+    assert fitted.index.equals(result.time_series.index)
+    np.testing.assert_array_equal(fitted['b'].values,[np.nan,np.nan,9.5,10.5,11.5,np.nan])
+    full_actuals = result.full_actuals
+    np.testing.assert_array_equal(full_actuals['a'].values,[1.0,2.0,3.0,4.0,5.0,6.0,7.0,8.0])
+    np.testing.assert_array_equal(full_actuals['b'].values,[np.nan,np.nan,10.0,11.0,12.0,13.0,14.0,np.nan])
+    assert result.frame('predicted') is predicted
+
+def test_unknown_output(result):
+    with pytest.raises(ValueError):
+        result.frame('model')
+
+def test_series_matches_input_dict(result):
+    _, forecasted = forecast_dicts()
+    assert len(result) == 2
+    for name in ('a','b'):
+        forecast_dict = result.series(name)
+        assert forecast_dict['method'] == 'naive_' + name
+        assert forecast_dict['level'] == 80
+        pd.testing.assert_series_equal(forecast_dict['predicted'],forecasted[name]['predicted'],check_freq=False)
+        np.testing.assert_array_equal(forecast_dict['lower'],forecasted[name]['lower'])
+        pd.testing.assert_series_equal(forecast_dict['fitted'],forecasted[name]['fitted'],check_names=False,check_freq=False)
+        assert len(forecast_dict['full_fit']) == len(forecasted[name]['fitted']) + 2
+
+def test_to_long_round_trip(result):
+    long_df = result.to_long()
+    assert list(long_df.columns) == ['series','ds','fitted','predicted','lower','upper']
+    #6 history and 2 forecast rows of a, 3 history and 2 forecast rows of b
+    assert len(long_df) == 13
+    #pivoting back gives the wide frames
+    predicted = long_df.pivot(index='ds',columns='series',values='predicted').dropna(how='all')
+    np.testing.assert_array_equal(predicted.values,result.predicted.values)
+    fitted = long_df.pivot(index='ds',columns='series',values='fitted').reindex(result.time_series.index)
+    np.testing.assert_array_equal(fitted.values,result.fitted.values)
+    upper = long_df.pivot(index='ds',columns='series',values='upper').dropna(how='all')
+    np.testing.assert_array_equal(upper.values,result.frame('upper').values)
+
+def test_concat_matches_from_dicts(result):
+    blocks = [{'mean':result.mean[[j]],'lower':result.lower[[j]],'upper':result.upper[[j]],
+               'fitted_values':result.fitted_values[[j]],'residual_values':result.residual_values[[j]],
+               'method':[result.method[j]]} for j in range(2)]
+    concatenated = ForecastResult.concat(result.time_series,blocks,80,'MS')
+    pd.testing.assert_frame_equal(concatenated.full_fit,result.full_fit)
+    assert concatenated.method == result.method
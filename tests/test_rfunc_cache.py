@@ -0,0 +1,44 @@
+import pytest
+
+from magi import core
+
+class FakeR(object):
+    """stands in for rpy2.robjects, counts how often R source is parsed"""
+
+    def __init__(self):
+        self.parsed = []
+
+    def r(self, source):
+        self.parsed.append(source)
+        return ('rfunc',len(self.parsed))
+
+@pytest.fixture
+def fake_R(monkeypatch):
+    fake = FakeR()
+    monkeypatch.setattr(core,'get_R',lambda: fake)
+    core.clear_rfunc_cache()
+    yield fake
+    core.clear_rfunc_cache()
+
+def test_rfunc_reused_for_same_call_shape(fake_R):
+    first = core._R_forecast_rfunc('ets(rdata)',12,80.0)
+    second = core._R_forecast_rfunc('ets(rdata)',12,80.0)
+    assert first is second
+    assert len(fake_R.parsed) == 1
+    assert core.rfunc_cache_info() == {'hits':1,'misses':1,'size':1}
+
+def test_rfunc_compiled_per_call_shape(fake_R):
+    core._R_forecast_rfunc('ets(rdata)',12,80.0)
+    core._R_forecast_rfunc('ets(rdata)',6,80.0)
+    core._R_forecast_rfunc('auto.arima(rdata)',12,80.0)
+    core._R_tsclean_rfunc(True)
+    assert len(fake_R.parsed) == 4
+    assert core.rfunc_cache_info() == {'hits':0,'misses':4,'size':4}
+
+def test_clear_rfunc_cache(fake_R):
+    core._R_forecast_rfunc('ets(rdata)',12,80.0)
+    core._R_forecast_rfunc('ets(rdata)',12,80.0)
+    core.clear_rfunc_cache()
+    assert core.rfunc_cache_info() == {'hits':0,'misses':0,'size':0}
+    core._R_forecast_rfunc('ets(rdata)',12,80.0)
+    assert len(fake_R.parsed) == 2
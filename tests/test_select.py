@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from magi.core import forecast, SELECT_METRICS
+
+MODELS = ['meanf','naive','snaive']
+PATTERN = np.array([10.0,12.0,15.0,13.0,11.0,9.0,8.0,10.0,14.0,18.0,16.0,12.0])
+
+def seasonal_frame():
+    """four years of an exactly repeating monthly pattern (snaive forecasts it perfectly) and a linear trend
+    (naive, the last value, beats the overall mean of a rising series)
+    """
+    index = pd.date_range('2014-01-01',periods=48,freq='MS')
+    return pd.DataFrame({'seasonal':np.tile(PATTERN,4),'trend':10.0 + 2.0*np.arange(48)},index=index)
+
+@pytest.fixture
+def R():
+    pytest.importorskip('rpy2')
+
+def test_rejects_unknown_metric():
+    fc_obj = forecast(time_series=seasonal_frame()['seasonal'],forecast_periods=6,frequency=12)
+    with pytest.raises(ValueError):
+        fc_obj.R_select(MODELS,holdout=12,metric='MSE')
+
+def test_rejects_regressors():
+    df = seasonal_frame()
+    fc_obj = forecast(time_series=df['seasonal'],forecast_periods=6,frequency=12,regressors=df[['trend']])
+    with pytest.raises(ValueError):
+        fc_obj.R_select(MODELS,holdout=12)
+
+def test_selects_model_with_lowest_holdout_error(R):
+    df = seasonal_frame()
+    forecast_dict = forecast(time_series=df['seasonal'],forecast_periods=6,frequency=12).R_select(MODELS,holdout=12)
+    assert forecast_dict['selected'] == 'snaive'
+    scores = forecast_dict['scores']
+    assert list(scores.index) == MODELS and list(scores.columns) == list(SELECT_METRICS)
+    assert scores.loc['snaive','MAE'] == 0.0
+    #meanf forecasts the mean of the 36 training values, which is the mean of the pattern
+    expected_mae = np.mean(np.abs(PATTERN - PATTERN.mean()))
+    assert scores.loc['meanf','MAE'] == pytest.approx(expected_mae)
+    #the winner is refitted on the whole series
+    np.testing.assert_allclose(forecast_dict['predicted'].values,PATTERN[:6])
+    assert forecast_dict['predicted'].index[0] == pd.Timestamp('2018-01-01')
+
+def test_failed_candidate_scores_inf(R):
+    models = ['ets(rdata,model="XYZ")'] + MODELS
+    forecast_dict = forecast(time_series=seasonal_frame()['trend'],forecast_periods=6,frequency=12).R_select(models,holdout=6,metric='RMSE')
+    assert np.isinf(forecast_dict['scores'].iloc[0]).all()
+    assert forecast_dict['selected'] == 'naive'
+
+def test_dataframe_model_table(R):
+    df = seasonal_frame()
+    fc_obj = forecast(time_series=df,forecast_periods=6,frequency=12,n_workers=2,scheduler='pool')
+    result, model_table = fc_obj.R_select(MODELS,holdout=12,metric='MAE')
+    assert list(model_table.columns) == ['model'] + MODELS
+    assert list(model_table['model']) == ['snaive','naive']
+    assert model_table.loc['seasonal','snaive'] == 0.0
+    np.testing.assert_allclose(result.predicted['seasonal'].values,PATTERN[:6])
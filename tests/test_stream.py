@@ -0,0 +1,59 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from magi.core import forecast
+from magi.stream import forecast_parquet
+
+def wide_frame(nrow=24, nseries=7):
+    index = pd.date_range('2018-01-01',periods=nrow,freq='MS',name='date')
+    df = pd.DataFrame(np.random.RandomState(0).uniform(10,20,(nrow,nseries)),index=index,
+                      columns=['s%d' % i for i in range(nseries)])
+    #series start on different dates
+    df.iloc[:5,2] = np.nan
+    return df
+
+@pytest.fixture
+def input_path(tmp_path):
+    path = str(tmp_path / 'wide.parquet')
+    #several row groups, so every batch is read across row group boundaries
+    pq.write_table(pa.Table.from_pandas(wide_frame()),path,row_group_size=5)
+    return path
+
+def read_parts(part_paths):
+    return pd.concat([pq.read_table(path).to_pandas() for path in part_paths],ignore_index=True)
+
+def test_round_trip_matches_in_memory_forecast(input_path, tmp_path):
+    output_path = str(tmp_path / 'out')
+    part_paths = forecast_parquet(input_path,output_path,forecast_periods=3,frequency=12,model='naive',
+                                  backend='numpy',batch_size=3)
+    #7 series in batches of 3
+    assert [os.path.basename(path) for path in part_paths] == ['part-00000.parquet','part-00001.parquet','part-00002.parquet']
+    assert not [name for name in os.listdir(output_path) if name.endswith('.tmp')]
+
+    long_df = read_parts(part_paths)
+    expected = forecast(time_series=wide_frame(),forecast_periods=3,frequency=12).baseline_dataframe('naive').to_long()
+    assert list(long_df.columns) == ['series','ds','fitted','predicted','lower','upper']
+    pd.testing.assert_frame_equal(long_df,expected,check_dtype=False)
+    assert long_df.groupby('series')['predicted'].count().tolist() == [3]*7
+
+def test_resume_skips_written_batches(input_path, tmp_path):
+    output_path = str(tmp_path / 'out')
+    part_paths = forecast_parquet(input_path,output_path,forecast_periods=3,frequency=12,model='naive',
+                                  backend='numpy',batch_size=3)
+    os.remove(part_paths[1])
+    mtime = os.path.getmtime(part_paths[0])
+    resumed = forecast_parquet(input_path,output_path,forecast_periods=3,frequency=12,model='naive',
+                               backend='numpy',batch_size=3,resume=True)
+    assert resumed == part_paths
+    #only the missing batch is forecast again
+    assert os.path.getmtime(part_paths[0]) == mtime
+    assert sorted(read_parts(resumed)['series'].unique()) == ['s%d' % i for i in range(7)]
+
+def test_unknown_method(input_path, tmp_path):
+    with pytest.raises(ValueError):
+        forecast_parquet(input_path,str(tmp_path / 'out'),forecast_periods=3,frequency=12,method='arima')
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from magi import core
+from magi.store import ParamStore
+
+def calls(fake):
+    """(name,update,old_model) of every R_series call"""
+    return [(call['name'],call['update'],call['old_model']) for call in fake.calls]
+
+def frame(nrow=12):
+    index = pd.date_range('2018-01-01',periods=nrow,freq='MS')
+    return pd.DataFrame({'a':np.arange(nrow,dtype=float),'b':np.arange(nrow,dtype=float) + 100},index=index)
+
+def test_series_update_round_trip(tmp_path, fake_R_series):
+    path = str(tmp_path / 'models.pkl')
+    fc_obj = core.forecast(time_series=frame()['a'],forecast_periods=2,frequency=12)
+    forecast_dict = fc_obj.R(model='ets(rdata)',model_store=ParamStore(path))
+    assert calls(fake_R_series) == [('a',True,None)]
+    assert forecast_dict['refit']
+
+    #the next run reapplies the model saved by the first one
+    fc_obj = core.forecast(time_series=frame(13)['a'],forecast_periods=2,frequency=12)
+    forecast_dict = fc_obj.R(model='ets(rdata)',model_store=ParamStore(path))
+    assert calls(fake_R_series)[-1] == ('a',True,b'a:12')
+    assert not forecast_dict['refit']
+    assert ParamStore(path).get('a') == b'a:13'
+
+def test_dataframe_update_uses_each_columns_model(tmp_path, fake_R_series):
+    store = ParamStore(str(tmp_path / 'models.pkl'))
+    store.update({'a':b'a:10'})
+    fc_obj = core.forecast(time_series=frame(),forecast_periods=2,frequency=12,scheduler='dask')
+    predicted = fc_obj.R(model='ets(rdata)',pred=True,model_store=store)
+    assert sorted(calls(fake_R_series)) == [('a',True,b'a:10'),('b',True,None)]
+    assert list(predicted.columns) == ['a','b']
+    #state is written to the store, not returned with the outputs
+    assert store.get('a') == b'a:12' and store.get('b') == b'b:12'
+    assert ParamStore(store.path).get('b') == b'b:12'
+
+def test_refit_ignores_stored_models(fake_R_series):
+    store = ParamStore()
+    store.update({'a':b'a:10','b':b'b:10'})
+    fc_obj = core.forecast(time_series=frame(),forecast_periods=2,frequency=12,scheduler='dask')
+    result = fc_obj.R(model='ets(rdata)',model_store=store,refit=True)
+    assert sorted(calls(fake_R_series)) == [('a',True,None),('b',True,None)]
+    assert result.method == ['ets(rdata)','ets(rdata)']
+    assert store.get('a') == b'a:12'
+
+def test_without_store_runs_plain_fits(fake_R_series):
+    fc_obj = core.forecast(time_series=frame(),forecast_periods=2,frequency=12,scheduler='dask')
+    fc_obj.R(model='ets(rdata)',pred=True)
+    assert sorted(calls(fake_R_series)) == [('a',False,None),('b',False,None)]
+
+def test_update_rejects_batches(fake_R_series):
+    fc_obj = core.forecast(time_series=frame(),forecast_periods=2,frequency=12,scheduler='dask')
+    with pytest.raises(ValueError):
+        fc_obj.R(model='ets(rdata)',model_store=ParamStore(),batch_size=10)
@@ -0,0 +1,45 @@
+import os
+import numpy as np
+import pandas as pd
+
+from magi import core
+from magi.store import ParamStore
+
+def frame(nrow=12):
+    index = pd.date_range('2018-01-01',periods=nrow,freq='MS')
+    return pd.DataFrame({'a':np.arange(nrow,dtype=float),'b':np.arange(nrow,dtype=float) + 100},index=index)
+
+def test_series_warm_start_round_trip(tmp_path, fake_prophet):
+    path = str(tmp_path / 'params.pkl')
+    store = ParamStore(path)
+    series = frame()['a']
+    core.forecast(time_series=series,forecast_periods=2,frequency=12).prophet(param_store=store)
+    assert fake_prophet.fits[-1][1] is None
+    assert store.get('a')['k'] == 12.0
+
+    #next run starts from the parameters saved by the first one
+    store = ParamStore(path)
+    core.forecast(time_series=frame(13)['a'],forecast_periods=2,frequency=12).prophet(param_store=store)
+    assert fake_prophet.fits[-1][1]['k'] == 12.0
+    assert ParamStore(path).get('a')['k'] == 13.0
+
+def test_dataframe_warm_start_per_column(tmp_path, fake_prophet):
+    store = ParamStore(str(tmp_path / 'params.pkl'))
+    store.update({'a':{'k':7.0,'m':0.0,'sigma_obs':1.0,'delta':np.zeros(3),'beta':np.zeros(2)}})
+    df = frame()
+    predicted = core.forecast(time_series=df,forecast_periods=2,frequency=12).prophet(pred=True,param_store=store)
+    inits = {last:init for last, init in fake_prophet.fits}
+    #columns are matched to their own stored parameters, b has none and is fitted cold
+    assert inits[11.0]['k'] == 7.0
+    assert inits[111.0] is None
+    assert list(predicted.columns) == ['a','b']
+    assert store.get('a')['k'] == 12.0 and store.get('b')['k'] == 12.0
+    assert os.path.exists(store.path)
+
+def test_mismatched_params_fall_back_to_cold_fit(fake_prophet):
+    store = ParamStore()
+    store.update({'a':{'k':-1.0}})
+    forecast_dict = core.forecast(time_series=frame()['a'],forecast_periods=2,frequency=12).prophet(param_store=store)
+    assert [init for _, init in fake_prophet.fits] == [None]
+    assert forecast_dict['params']['k'] == 12.0
+    assert store.get('a')['k'] == 12.0